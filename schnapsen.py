@@ -1,28 +1,141 @@
 #!/usr/bin/env python3
 """Schnapsen is a text-based card game for two players."""
 
+import argparse
 from time import sleep
-import gettext
 
-from schnapsen_classes import SchnapsenPlayer, SchnapsenGame
+from schnapsen_cards import SUIT, cards_of
+from schnapsen_classes import SchnapsenPlayer, card_name, suit_name
+from schnapsen_engine import (
+    ComputerStrategy, ObserverGroup, RoundObserver, deal, play_round
+)
+from schnapsen_locale import install
+from schnapsen_strategies import STRATEGIES, create_strategy
 
 
 # Set language.
 LANGUAGE = "en"
 
-# Translate strings.
-translation = gettext.translation("schnapsen", "locales", [LANGUAGE])
-translation.install()
+# Translate strings. The translation is read when it is first used.
+install(LANGUAGE)
 
-# Set other constants.
-PLAYER_NAMES = (_("Player"), _("Computer"))
+# Set other constants. Player names are translated when they are used.
+PLAYER_NAMES = ("Player", "Computer")
 SECONDS = 1.2
 
 
+class HumanStrategy():
+    """Let a human player choose moves on the console."""
+
+    def choose_action(self, player, opponent, game):
+        """Ask the player for an action."""
+        return player.choose_action_human(game.trump_suit, game.trump_card)
+
+    def choose_card(self, player, opponent, game, trick):
+        """Ask the player for a card."""
+        couples = player.get_couples()
+        return player.choose_card_human(
+            couples, game.trump_suit, trick, game.closed
+        )
+
+
+class ConsoleObserver(RoundObserver):
+    """Show the course of a round on the console."""
+
+    def __init__(self, game, players):
+        """Initialize attributes."""
+        self.game = game
+        self.players = players
+
+    def on_action(self, seat, exchange, close):
+        """Show that the trump Jack was exchanged or the talon closed."""
+        if exchange:
+            print(_("The trump Jack was replaced."))
+            print(_("New trump card: {}").format(
+                card_name(self.game.trump_card)
+            ))
+        if close:
+            print(_("The talon is closed. Players can't draw any more cards."))
+            print(_("Players must match suits and take tricks if they can."))
+
+    def on_card(self, seat, card, marriage_points):
+        """Show the card a player has chosen and a possible marriage."""
+        player = self.players[seat]
+        sleep(SECONDS)
+        if marriage_points:
+            suit = suit_name(SUIT[card])
+            print("X", end=" ")
+            if player.human:
+                print(_(
+                    "You marry the couple of {}"
+                ).format(suit), end=" ")
+            else:
+                print(_(
+                    "{computer} marries the couple of {suit}"
+                ).format(computer=player.name, suit=suit), end=" ")
+            print(_("({} points).").format(marriage_points))
+            if player.marriage_points:
+                print(_("Points will be added after the first trick taken."))
+
+        print(">", end=" ")
+        if player.human:
+            print(_("You play the {}.").format(card_name(card)))
+        else:
+            print(_("{} plays the {}.").format(player.name, card_name(card)))
+
+    def on_trick(self, taker, trick, marriage_points):
+        """Show who has taken the trick and the taker's points."""
+        player = self.players[taker]
+        sleep(SECONDS)
+        print()
+        if player.human:
+            print(_("You take this trick."))
+        else:
+            print(_("{} takes this trick.").format(player.name))
+        if marriage_points:
+            print(_("Marriage points added."))
+
+        # Show the player's current points.
+        if player.human:
+            print(_("Your points:"), end=" ")
+        else:
+            print(_("{}'s points:").format(player.name), end=" ")
+        print(f"{player.points} / 66")
+        sleep(SECONDS)
+
+    def on_draw(self, seat, card):
+        """Show that a player has drawn a card."""
+        sleep(SECONDS)
+        show_draw(self.players[seat], card)
+        if len(self.game.stock) == 2:
+            print()
+            print(_("There are only two more cards in the talon."))
+            print()
+        elif not self.game.stock:
+            print()
+            print(_("The last card has been drawn!"))
+            print(_("Players must match suits and take tricks if they can."))
+
+    def on_round_end(self, result):
+        """Explain why the round is over."""
+        if result.reason == "last trick":
+            print()
+            print(_("We've run out of cards."))
+            print(_("The player who took the last trick wins."))
+
+
+def show_draw(player, card):
+    """Show that a player has drawn a card."""
+    if player.human:
+        print(_("You draw a card: {}").format(card_name(card)))
+    else:
+        print(_("{} draws a card.").format(player.name))
+
+
 def create_players():
     """Create the players."""
-    player1 = SchnapsenPlayer(PLAYER_NAMES[0], human=True)
-    player2 = SchnapsenPlayer(PLAYER_NAMES[1])
+    player1 = SchnapsenPlayer(_(PLAYER_NAMES[0]), human=True)
+    player2 = SchnapsenPlayer(_(PLAYER_NAMES[1]))
     players = [player1, player2]
     print(_("Welcome, {} and {}!").format(player1.name, player2.name), end=" ")
     print(_("{}, you will begin.").format(player1.name))
@@ -31,141 +144,44 @@ def create_players():
 
 def start_new_game(players):
     """Create the game instance. Shuffle and deal the cards."""
-    game = SchnapsenGame()
-    game.create_cards()
-    game.shuffle_cards()
+    game = deal(players)
+    print(_("The cards are shuffled."), end=" ")
+    print(_("Trump card: {}").format(card_name(game.trump_card)))
+    print()
     for player in players:
-        for dummy in range(5):
-            card = game.draw_from_stock()
-            player.add_card(card)
+        for card in cards_of(player.hand):
+            show_draw(player, card)
     return game
 
 
-def game_loop(game, players):
-    """Run the game loop."""
-    while True:
+def game_loop(game, players, observer=None, strategy=None):
+    """Run the game loop. Return the result of the round.
 
-        # Start a new trick.
-        trick = []
-        for player in players:
-
-            # Check whether the players have run out of cards.
-            if not player.cards:
-                print()
-                print(_("We've run out of cards."))
-                print(_("The player who took the last trick wins."))
-                return
-
-            # The first player may exchange the trump Jack
-            # and/or close the talon.
-            if not trick and not game.closed:
-                if player.human:
-                    exchange, close = player.choose_action_human(
-                        game.trump_suit, game.trump_card
-                    )
-                else:
-                    exchange, close = player.choose_action_computer(
-                        game.trump_suit
-                    )
-
-                # The active player has chosen to exchange the trump
-                # Jack for the trump card. The talon isn't closed yet.
-                if exchange and not game.closed:
-                    trump_jack = player.pop_trump_jack(game.trump_suit)
-                    player.add_card(game.trump_card)
-                    game.exchange_trump_jack(trump_jack)
-
-                # The active player has chosen to close the talon.
-                if close:
-                    game.close_stock()
-
-            sleep(SECONDS)
-            # The active player chooses a card to play.
-            couples = player.get_couples()
-
-            # A human player chooses the first or the second card.
-            if player.human:
-                chosen_card = player.choose_card_human(
-                    couples, game.trump_suit, trick, game.closed
-                )
-            # A computer player chooses the first card.
-            elif not player.human and not trick:
-                chosen_card = player.choose_card1_computer(
-                    couples, game.trump_suit
-                )
-            # A computer player chooses the second card.
-            elif not player.human and trick:
-                chosen_card = player.choose_card2_computer(
-                    game.trump_suit, trick, game.closed
-                )
-
-            # Check for a victory by marriage.
-            if player.points >= 66:
-                return
-
-            # Display a message to show that the active player has
-            # chosen a card to play.
-            # Append that card to the current trick.
-            card_tuple = (chosen_card, player.name)
-            trick.append(card_tuple)
-            if player.human:
-                print(">", end=" ")
-                print(_("You play the {}.").format(chosen_card['name']))
-            else:
-                print(">", end=" ")
-                print(_("{} plays the {}.").format(
-                    player.name,
-                    chosen_card['name'],
-                ))
+    If an observer is given, it is told everything that happens, too.
+    strategy plays for the computer, by default the built-in strategy.
+    """
+    strategy = strategy or ComputerStrategy()
+    strategies = [
+        HumanStrategy() if player.human else strategy for player in players
+    ]
+    if observer:
+        observer = ObserverGroup(ConsoleObserver(game, players), observer)
+    else:
+        observer = ConsoleObserver(game, players)
+    return play_round(game, players, strategies, observer)
 
-        sleep(SECONDS)
 
-        # One of the players takes the trick.
-        if chosen_card:
-            taker = game.decide_taker(trick, game.trump_suit)
-            for player in players:
-                if player.name == taker:
-                    if player.human:
-                        print()
-                        print(_("You take this trick."))
-                    else:
-                        print()
-                        print(_("{} takes this trick.").format(player.name))
-                    player.add_trick_points(trick)
-
-            # If the second player has taken the trick, switch turns.
-            if taker == players[1].name:
-                players.reverse()
-
-            # Check for a victory by trick-taking.
-            for player in players:
-                if player.points >= 66:
-                    return
-
-            # Both players draw cards.
-            sleep(SECONDS)
-            for player in players:
-                sleep(SECONDS)
-                card = game.draw_from_stock()
-                if card:
-                    player.add_card(card)
-
-
-def results(players):
+def results(players, result):
     """Declare the winner, raise score, and show results."""
+    winner = players[result.winner]
     print()
-    if players[0].human:
+    if winner.human:
         print(_("You WIN this round!"))
     else:
-        print(_("{} WINS this round!").format(players[0].name))
+        print(_("{} WINS this round!").format(winner.name))
     input(_("Press Enter to see the results. "))
 
-    if players[1].points == 0:
-        players[0].score += 3
-    elif players[1].points < 33:
-        players[0].score += 2
-    else:
-        players[0].score += 1
+    winner.score += result.game_points
 
     print()
     print(_("POINTS"))
@@ -179,24 +195,35 @@ def results(players):
     for player in player_score:
         print(f"{player.name}: {player.score}")
 
+    # The winner begins the next round.
+    if result.winner:
+        players.reverse()
+
 
 def reset_attributes(players):
     """Reset players' attributes to prepare for the next round."""
     for player in players:
         player.points, player.marriage_points = 0, 0
-        player.cards = []
-        player.trump_jack = False
+        player.hand = 0
     return players
 
 
 def main():
     """Call methods to play the game."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-o", "--opponent", choices=sorted(STRATEGIES), default="computer",
+        help="the strategy of the computer (default: computer)",
+    )
+    args = parser.parse_args()
+    strategy = create_strategy(args.opponent)
+
     print("SCHNAPSEN\n")
     players = create_players()
     while True:
         game = start_new_game(players)
-        game_loop(game, players)
-        results(players)
+        result = game_loop(game, players, strategy=strategy)
+        results(players, result)
 
         # Ask whether the player wants to start a new game.
         answer = ""
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""Find the mistakes in recorded rounds.
+
+Every decision of a record is replayed and the chosen card is compared
+with the best card. Once the talon is closed or exhausted, the cards of
+both players are known to the analysis and all legal cards are solved
+exactly. Before that, the cards the player could not see are dealt at
+random a number of times, consistent with what the player has learned in
+the round, and each card is played out in these deals, as the Monte
+Carlo strategy does. The regret of a decision is how many game points
+the best card is worth more than the chosen one.
+
+When a player could close the talon, closing and not closing are
+compared in sampled deals, both played out with the computer's strategy.
+A decision whose regret reaches the blunder threshold is a blunder; the
+report shows the decisions, the average regret and the blunders of each
+strategy in the record file, by kind of decision. Sampled regrets are
+noisy and lean high; more samples make them more accurate.
+
+Records are analyzed by a pool of worker processes, in batches of
+records that are read in one go.
+"""
+
+import argparse
+import math
+from collections import Counter
+from multiprocessing import Pool
+
+from schnapsen_cards import cards_of, legal_cards
+from schnapsen_belief import BeliefState
+from schnapsen_classes import SchnapsenPlayer, card_name
+from schnapsen_engine import ObserverGroup, deal, round_turns
+from schnapsen_locale import install
+from schnapsen_montecarlo import belief_position, evaluate_candidates
+from schnapsen_records import RecordReader, ReplayStrategy
+from schnapsen_solver import EndgameSolver
+
+
+BATCH_SIZE = 100
+KINDS = ("lead", "response", "close")
+
+# Each worker process keeps its own solver.
+_solver = None
+
+
+def sampled_values(position, candidates, samples, seed,
+                   solve_closed=True):
+    """Return the average result of each candidate in sampled deals."""
+    totals, count = evaluate_candidates(
+        position, candidates, math.inf, seed, samples, solve_closed
+    )
+    return [total / count for total in totals]
+
+
+def exact_values(player, opponent, game, lead, candidates):
+    """Return the exact result of each candidate with both hands known."""
+    points = (player.points, opponent.points)
+    pending = (player.marriage_points, opponent.marriage_points)
+    if lead is None:
+        return [
+            _solver.lead_value(
+                card, player.hand, opponent.hand, game.trump_suit,
+                *points, *pending,
+            )
+            for card in candidates
+        ]
+    return [
+        _solver.response_value(
+            card, lead, player.hand, opponent.hand, game.trump_suit,
+            *points, *pending,
+        )
+        for card in candidates
+    ]
+
+
+def analyze_record(number, record, samples, seed):
+    """Replay a record and return its decisions.
+
+    Each decision is (seat, kind, regret, chosen, best), where chosen and
+    best are cards or, for the kind "close", whether to close.
+    """
+    global _solver
+    if _solver is None:
+        _solver = EndgameSolver()
+    _solver.clear()
+    players = [SchnapsenPlayer("0"), SchnapsenPlayer("1")]
+    game = deal(players, record.deck)
+    replay = ReplayStrategy(record.moves)
+    beliefs = [BeliefState(seat, players[seat]) for seat in (0, 1)]
+    turns = round_turns(game, players, ObserverGroup(*beliefs))
+    decisions = []
+    could_close, closing = False, False
+    move = None
+    try:
+        while True:
+            seat, decision, trick = turns.send(move)
+            player, opponent = players[seat], players[1 - seat]
+            if trick is None:
+                move = replay.choose_action(player, opponent, game)
+                could_close, closing = True, move[1]
+                continue
+
+            move = replay.choose_card(player, opponent, game, trick)
+            lead = trick[0][0] if trick else None
+            candidates = cards_of(
+                legal_cards(player.hand, lead, game.trump_suit, game.closed)
+            )
+            # Each decision samples its own deals.
+            decision_seed = (seed * 1_000_003 + number) * 64 + len(decisions)
+
+            # Compare closing with playing on, before the lead. Both are
+            # played out with the computer's strategy, as solving only
+            # the closed deals would favour closing.
+            values = None
+            if could_close:
+                position = belief_position(
+                    beliefs[seat], player, opponent, game, lead
+                )
+                open_values = sampled_values(
+                    position._replace(closed=False), candidates, samples,
+                    decision_seed, False,
+                )
+                closed_values = sampled_values(
+                    position._replace(closed=True), candidates, samples,
+                    decision_seed, False,
+                )
+                if closing:
+                    chosen, other = max(closed_values), max(open_values)
+                else:
+                    chosen, other = max(open_values), max(closed_values)
+                decisions.append((
+                    seat, "close", max(other - chosen, 0), closing,
+                    closing if chosen >= other else not closing,
+                ))
+                if not closing:
+                    values = open_values
+                could_close = False
+
+            if len(candidates) == 1:
+                continue
+            if game.closed:
+                values = exact_values(
+                    player, opponent, game, lead, candidates
+                )
+            elif values is None:
+                position = belief_position(
+                    beliefs[seat], player, opponent, game, lead
+                )
+                values = sampled_values(
+                    position, candidates, samples, decision_seed
+                )
+            chosen = values[candidates.index(move[0])]
+            best = max(values)
+            decisions.append((
+                seat, decision, best - chosen, move[0],
+                candidates[values.index(best)],
+            ))
+    except StopIteration:
+        return decisions
+
+
+def analyze_batch(job):
+    """Analyze a batch of records.
+
+    Return a Counter of decisions, regret and blunders by strategy and
+    kind of decision, and the worst blunders of the batch as tuples of
+    (regret, record number, seat, strategy, kind, chosen, best).
+    """
+    path, start, stop, samples, seed, threshold, worst = job
+    stats = Counter()
+    blunders = []
+    with RecordReader(path) as reader:
+        names = reader.strategies
+        records = reader.read_range(start, stop)
+    for number, record in enumerate(records, start):
+        for seat in (0, 1):
+            stats[names[record.seats[seat]], "rounds"] += 1
+        decisions = analyze_record(number, record, samples, seed)
+        for seat, kind, regret, chosen, best in decisions:
+            name = names[record.seats[seat]]
+            stats[name, kind, "decisions"] += 1
+            stats[name, kind, "regret"] += regret
+            if regret >= threshold:
+                stats[name, kind, "blunders"] += 1
+                blunders.append(
+                    (regret, number, seat, name, kind, chosen, best)
+                )
+    blunders.sort(reverse=True)
+    return stats, blunders[:worst]
+
+
+def analyze(path, samples=20, seed=0, threshold=0.5, worst=10,
+            workers=None, batch_size=BATCH_SIZE):
+    """Analyze all records of a file. Return the merged results of
+    analyze_batch and the names of the strategies."""
+    with RecordReader(path) as reader:
+        names = reader.strategies
+        count = len(reader)
+    jobs = [
+        (
+            path, start, min(start + batch_size, count), samples, seed,
+            threshold, worst,
+        )
+        for start in range(0, count, batch_size)
+    ]
+    stats = Counter()
+    blunders = []
+    with Pool(workers) as pool:
+        for batch_stats, batch_blunders in pool.imap_unordered(
+            analyze_batch, jobs
+        ):
+            stats.update(batch_stats)
+            blunders.extend(batch_blunders)
+    blunders.sort(reverse=True)
+    return stats, blunders[:worst], names
+
+
+def describe(kind, move):
+    """Return the description of a move of a kind."""
+    if kind == "close":
+        return "closing" if move else "playing on"
+    return card_name(move)
+
+
+def main():
+    """Parse the command line, analyze the records and show the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("records", help="the record file to analyze")
+    parser.add_argument(
+        "-n", "--samples", type=int, default=20,
+        help="deals sampled per decision before closing (default: 20)",
+    )
+    parser.add_argument(
+        "-b", "--blunder", type=float, default=0.5,
+        help="regret in game points that makes a blunder (default: 0.5)",
+    )
+    parser.add_argument(
+        "-l", "--list", type=int, default=10,
+        help="number of the worst blunders to show (default: 10)",
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=BATCH_SIZE,
+        help=f"records per batch (default: {BATCH_SIZE})",
+    )
+    args = parser.parse_args()
+    install()
+
+    stats, blunders, names = analyze(
+        args.records, args.samples, args.seed, args.blunder, args.list,
+        args.workers, args.batch_size,
+    )
+    print(f"{'Strategy':<16}{'Decision':<10}{'Count':>10}"
+          f"{'Regret':>10}{'Blunders':>10}")
+    for name in dict.fromkeys(names):
+        rounds = stats[name, "rounds"]
+        if not rounds:
+            continue
+        total = 0
+        for kind in KINDS:
+            count = stats[name, kind, "decisions"]
+            regret = stats[name, kind, "regret"]
+            total += regret
+            print(
+                f"{name:<16}{kind:<10}{count:>10}"
+                f"{regret / max(count, 1):>10.3f}"
+                f"{stats[name, kind, 'blunders']:>10}"
+            )
+        print(f"{name:<16}{'per round':<10}{rounds:>10}"
+              f"{total / rounds:>10.3f}")
+    if blunders:
+        print()
+        print("Worst blunders:")
+    for regret, number, seat, name, kind, chosen, best in blunders:
+        print(
+            f"Round {number}, seat {seat} ({name}), {kind}: "
+            f"{describe(kind, chosen)} instead of {describe(kind, best)}, "
+            f"{regret:.2f} game points"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""Simulate millions of rounds at once with NumPy.
+
+A batch of deals is held in integer arrays, and all rounds of the batch
+advance one trick at a time with array operations. Both players use the
+computer's built-in strategy. Options switch off the trump Jack exchange
+or let the leader close the talon before a given trick, which makes it
+possible to study the value of these decisions.
+
+Requires NumPy.
+"""
+
+import argparse
+import random
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from schnapsen_cards import (
+    DECK, SUIT_MASKS, RANK_MASKS, QUEENS, TRICKS, RESPONSES, JACK, QUEEN,
+)
+
+
+BatchResult = namedtuple(
+    "BatchResult",
+    [
+        "winner",       # Seat that won each round. Seat 0 led first.
+        "game_points",  # Game points for the winner of each round.
+        "points",       # Points of both seats at the end of each round.
+    ]
+)
+
+
+def _require_numpy():
+    """Raise an error if NumPy is not installed."""
+    if np is None:
+        raise ImportError("the batch simulator requires NumPy")
+
+
+def deal_batch(size, rng):
+    """Return size shuffled decks from a NumPy random generator."""
+    _require_numpy()
+    keys = rng.random((size, 20))
+    return np.argsort(keys, axis=1).astype(np.int8)
+
+
+def deals_from_seeds(seeds):
+    """Return the decks the engine deals with random.Random(seed)."""
+    _require_numpy()
+    decks = np.empty((len(seeds), 20), dtype=np.int8)
+    for row, seed in enumerate(seeds):
+        stock = list(DECK)
+        random.Random(seed).shuffle(stock)
+        decks[row] = stock
+    return decks
+
+
+def _lowest(masks):
+    """Return the lowest card of each mask, or -1 for empty masks."""
+    low = masks & -masks
+    cards = np.log2(np.where(low == 0, 1, low)).astype(np.int32)
+    return np.where(low == 0, -1, cards)
+
+
+def _cheapest(masks):
+    """Return the card with the fewest points of each mask."""
+    cards = np.full(masks.shape, -1, dtype=np.int32)
+    for rank_mask in RANK_MASKS:
+        lowest = _lowest(masks & rank_mask)
+        cards = np.where((cards < 0) & (lowest >= 0), lowest, cards)
+    return cards
+
+
+def _lead(hands, trump_suits, rng):
+    """Choose the leads of the computer's strategy. Return them and
+    whether they declare a marriage."""
+    queens = hands & (hands >> 1) & QUEENS
+    marry = queens != 0
+
+    # Marry the trump couple if possible, else a random couple.
+    suits_with_couple = np.stack(
+        [(queens & SUIT_MASKS[suit]) != 0 for suit in range(4)], axis=1
+    )
+    count = suits_with_couple.sum(axis=1)
+    pick = (rng.random(len(hands)) * count).astype(np.int32)
+    ranked = np.cumsum(suits_with_couple, axis=1) - 1
+    random_suit = np.argmax(
+        suits_with_couple & (ranked == pick[:, None]), axis=1
+    )
+    trump_couple = (queens >> (trump_suits * 5 + QUEEN)) & 1 == 1
+    suit = np.where(trump_couple, trump_suits, random_suit)
+    couple_card = suit * 5 + QUEEN + (rng.random(len(hands)) < 0.5)
+
+    leads = np.where(marry, couple_card, _lowest(hands))
+    return leads.astype(np.int32), marry
+
+
+def _respond(hands, leads, trump_suits, closed):
+    """Choose the responses of the computer's strategy."""
+    index = trump_suits * 20 + leads
+    higher = RESPONSE_TABLES[0][index] & hands
+    lower = RESPONSE_TABLES[1][index] & hands & ~higher
+    trumps = RESPONSE_TABLES[2][index] & hands
+    no_trumps = hands & ~SUIT_MASK_TABLE[trump_suits]
+    rest = _cheapest(np.where(no_trumps != 0, no_trumps, hands))
+    return np.where(
+        higher != 0, _lowest(higher),
+        np.where(
+            closed & (lower != 0), _lowest(lower),
+            np.where(trumps != 0, _lowest(trumps), rest),
+        ),
+    )
+
+
+def _game_points(loser_points):
+    """Return the game points for the losers' points."""
+    return np.where(
+        loser_points == 0, 3, np.where(loser_points < 33, 2, 1)
+    ).astype(np.int8)
+
+
+def simulate_batch(decks, rng, exchange=True, close_before=None):
+    """Play one round for each deck and return a BatchResult.
+
+    decks holds shuffled decks as returned by deal_batch, dealt like the
+    engine deals them. Seat 0 leads the first trick. If close_before is
+    given, the leader closes the talon before that trick (counted from 0).
+    """
+    _require_numpy()
+    size = len(decks)
+    bits = 1 << decks.astype(np.int32)
+    state = {
+        "ids": np.arange(size),
+        "hands": np.stack(
+            [bits[:, 15:].sum(axis=1), bits[:, 10:15].sum(axis=1)], axis=1
+        ).astype(np.int32),
+        "stock": decks[:, :10].astype(np.int32),
+        "trump_suits": (decks[:, 0] // 5).astype(np.int32),
+        "points": np.zeros((size, 2), dtype=np.int32),
+        "pending": np.zeros((size, 2), dtype=np.int32),
+        "leader": np.zeros(size, dtype=np.int32),
+    }
+    winner = np.zeros(size, dtype=np.int8)
+    game_points = np.zeros(size, dtype=np.int8)
+    final_points = np.zeros((size, 2), dtype=np.int32)
+    closed = False
+
+    def finish(done, seats, extra):
+        """Record the rounds in done, won by seats. Drop them from the
+        state and from the arrays in extra, and return those."""
+        ids = state["ids"][done]
+        rows = np.nonzero(done)[0]
+        winner[ids] = seats[done]
+        final_points[ids] = state["points"][done]
+        game_points[ids] = _game_points(
+            state["points"][rows, 1 - seats[done]]
+        )
+        keep = ~done
+        for key in state:
+            state[key] = state[key][keep]
+        return [array[keep] for array in extra]
+
+    for trick in range(10):
+        rows = np.arange(len(state["ids"]))
+        hands, stock = state["hands"], state["stock"]
+        trump_suits, leader = state["trump_suits"], state["leader"]
+        points, pending = state["points"], state["pending"]
+        lead_hands = hands[rows, leader]
+
+        # The leader may exchange the trump Jack and close the talon.
+        if not closed and exchange:
+            jacks = trump_suits * 5 + JACK
+            swap = (lead_hands >> jacks) & 1 == 1
+            lead_hands = np.where(
+                swap, lead_hands ^ (1 << jacks) ^ (1 << stock[:, 0]),
+                lead_hands,
+            )
+            stock[:, 0] = np.where(swap, jacks, stock[:, 0])
+        if close_before == trick:
+            closed = True
+
+        leads, marry = _lead(lead_hands, trump_suits, rng)
+        hands[rows, leader] = lead_hands ^ (1 << leads)
+
+        # Marriages count at once if the leader has taken a trick.
+        marriage = np.where(leads // 5 == trump_suits, 40, 20) * marry
+        counted = points[rows, leader] > 0
+        points[rows, leader] += marriage * counted
+        pending[rows, leader] += marriage * ~counted
+        done = points[rows, leader] >= 66
+        if done.any():
+            (leads,) = finish(done, leader, [leads])
+            rows = np.arange(len(state["ids"]))
+            hands, stock = state["hands"], state["stock"]
+            trump_suits, leader = state["trump_suits"], state["leader"]
+            points, pending = state["points"], state["pending"]
+
+        follower = 1 - leader
+        follow_hands = hands[rows, follower]
+        responses = _respond(follow_hands, leads, trump_suits, closed)
+        hands[rows, follower] = follow_hands ^ (1 << responses)
+
+        # Decide who takes the trick.
+        outcome = TRICK_TABLE[(trump_suits * 20 + leads) * 20 + responses]
+        taker = np.where(outcome & 1 == 1, follower, leader)
+        points[rows, taker] += (outcome >> 1) + pending[rows, taker]
+        pending[rows, taker] = 0
+        state["leader"] = taker
+
+        # The taker wins with 66 points or with the last trick, which
+        # comes early if the talon was closed.
+        done = (points[rows, taker] >= 66) | (hands[rows, taker] == 0)
+        if done.any():
+            (taker,) = finish(done, taker, [taker])
+            hands, stock = state["hands"], state["stock"]
+            rows = np.arange(len(state["ids"]))
+
+        # Both players draw cards.
+        if not closed:
+            hands[rows, taker] |= 1 << stock[:, 9 - 2 * trick]
+            hands[rows, 1 - taker] |= 1 << stock[:, 8 - 2 * trick]
+            closed = trick == 4
+
+        if not len(state["ids"]):
+            break
+
+    return BatchResult(winner, game_points, final_points)
+
+
+def distribution(result):
+    """Return counts of rounds by winning seat and game points.
+
+    counts[seat, points - 1] is the number of rounds seat won with
+    that many game points.
+    """
+    _require_numpy()
+    counts = np.zeros((2, 3), dtype=np.int64)
+    np.add.at(counts, (result.winner, result.game_points - 1), 1)
+    return counts
+
+
+def engine_distribution(seeds, exchange=True, close_before=None):
+    """Return the distribution of the object engine for seeded deals.
+
+    The players follow the options of simulate_batch.
+    """
+    from schnapsen_classes import SchnapsenPlayer
+    from schnapsen_engine import ComputerStrategy, deal, play_round
+
+    class OptionStrategy(ComputerStrategy):
+        """The computer's strategy with the options of simulate_batch."""
+
+        def choose_action(self, player, opponent, game):
+            """Exchange if allowed and close before trick close_before."""
+            swap, close = super().choose_action(player, opponent, game)
+            trick = game.played.bit_count() // 2
+            return swap and exchange, close_before == trick
+
+    _require_numpy()
+    counts = np.zeros((2, 3), dtype=np.int64)
+    strategies = [OptionStrategy(), OptionStrategy()]
+    for seed in seeds:
+        players = [SchnapsenPlayer("0"), SchnapsenPlayer("1")]
+        game = deal(players, rng=random.Random(seed))
+        result = play_round(game, players, strategies)
+        counts[result.winner, result.game_points - 1] += 1
+    return counts
+
+
+if np is not None:
+    TRICK_TABLE = np.array(TRICKS, dtype=np.int32)
+    RESPONSE_TABLES = np.array(RESPONSES, dtype=np.int32).T.copy()
+    SUIT_MASK_TABLE = np.array(SUIT_MASKS, dtype=np.int32)
+
+
+def main():
+    """Parse the command line and simulate the rounds."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--deals", type=int, default=1_000_000)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=1_000_000)
+    parser.add_argument(
+        "--no-exchange", action="store_true",
+        help="never exchange the trump Jack",
+    )
+    parser.add_argument(
+        "--close-before", type=int, metavar="TRICK",
+        help="let the leader close the talon before this trick (0-4)",
+    )
+    args = parser.parse_args()
+    _require_numpy()
+
+    rng = np.random.default_rng(args.seed)
+    counts = np.zeros((2, 3), dtype=np.int64)
+    for start in range(0, args.deals, args.batch_size):
+        size = min(args.batch_size, args.deals - start)
+        result = simulate_batch(
+            deal_batch(size, rng), rng,
+            exchange=not args.no_exchange, close_before=args.close_before,
+        )
+        counts += distribution(result)
+
+    total = counts.sum()
+    for seat in (0, 1):
+        shares = " ".join(
+            f"{points}: {counts[seat, points - 1] / total:.4f}"
+            for points in (1, 2, 3)
+        )
+        won = counts[seat].sum() / total
+        print(f"Seat {seat} wins {won:.4f} (game points {shares})")
+    average = (counts[0] @ (1, 2, 3) - counts[1] @ (1, 2, 3)) / total
+    print(f"Average game points for seat 0: {average:+.4f}")
+
+
+if __name__ == "__main__":
+    main()
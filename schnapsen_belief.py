@@ -0,0 +1,182 @@
+"""What a player knows about the cards it has not seen.
+
+A BeliefState follows a round as an observer for one seat and updates
+itself with every event in constant time. It keeps the cards the player
+has not seen, the cards known to be in the opponent's hand (the partner
+of a declared marriage, the trump card taken by exchanging the trump
+Jack or drawn last) and the unseen cards the opponent cannot hold,
+because it failed to follow suit, to take the trick or to trump once
+the talon was closed. Cards the opponent cannot hold must be in the
+talon.
+
+The opponent hands consistent with a belief are numbered by the
+colexicographic rank of the unseen cards they hold, so a hand can be
+drawn uniformly with a single random number.
+"""
+
+from schnapsen_cards import (
+    RANK, BIT, QUEEN, FULL_DECK, RESPONSES, BINOMIAL, cards_of,
+    combination_rank, combination_unrank, trump_jack,
+)
+from schnapsen_engine import RoundObserver
+
+
+class BeliefState(RoundObserver):
+    """Follow a round from the point of view of the player in a seat.
+
+    player is the player of the seat, with the cards dealt to it. The
+    belief is over once the round has ended.
+    """
+
+    def __init__(self, seat, player):
+        """Initialize attributes."""
+        self.seat = seat
+        self.player = player
+        self.dealt = player.hand
+        self.over = False
+        self.unseen = 0         # Cards not seen, in no known place.
+        self.known = 0          # Cards known to be in the opponent's hand.
+        self.void = 0           # Unseen cards the opponent cannot hold.
+        self.opponent_size = 0  # Number of cards in the opponent's hand.
+        self.stock_size = 0     # Number of cards in the talon.
+        self.trump_card = None  # Bottom card of the talon, or None.
+        self.trump_suit = None
+        self.closed = False
+        self.lead = None        # Card led in the current trick, or None.
+
+    def on_deal(self, game):
+        self.trump_card, self.trump_suit = game.trump_card, game.trump_suit
+        self.unseen = FULL_DECK & ~self.dealt & ~BIT[self.trump_card]
+        self.known, self.void = 0, 0
+        self.opponent_size = self.dealt.bit_count()
+        self.stock_size = len(game.stock)
+        self.closed = game.closed
+        self.lead = None
+
+    def on_action(self, seat, exchange, close):
+        if exchange:
+            jack = trump_jack(self.trump_suit)
+            if seat != self.seat:
+                # The opponent takes the trump card and shows its Jack.
+                self.known |= BIT[self.trump_card]
+                self.known &= ~BIT[jack]
+                self.unseen &= ~BIT[jack]
+            self.trump_card = jack
+        if close:
+            self.closed = True
+
+    def on_card(self, seat, card, marriage_points):
+        bit = BIT[card]
+        self.unseen &= ~bit
+        self.void &= ~bit
+        if seat == self.seat:
+            self.lead = card if self.lead is None else None
+            return
+
+        self.known &= ~bit
+        self.opponent_size -= 1
+        if marriage_points:
+            # The partner of the King or Queen is in the opponent's hand.
+            partner = card + 1 if RANK[card] == QUEEN else card - 1
+            self.known |= BIT[partner]
+            self.unseen &= ~BIT[partner]
+        if self.lead is None:
+            self.lead = card
+            return
+
+        # The opponent answered under the rules of a closed talon.
+        if self.closed:
+            higher, suit, trumps, dummy = RESPONSES[
+                self.trump_suit * 20 + self.lead
+            ]
+            if bit & suit:
+                if not bit & higher:
+                    self.void |= higher & self.unseen
+            else:
+                self.void |= suit & self.unseen
+                if not bit & trumps:
+                    self.void |= trumps & self.unseen
+        self.lead = None
+
+    def on_trick(self, taker, trick, marriage_points):
+        self.lead = None
+
+    def on_draw(self, seat, card):
+        self.stock_size -= 1
+        if card == self.trump_card:
+            self.trump_card = None
+            if seat != self.seat:
+                self.known |= BIT[card]
+        elif seat == self.seat:
+            self.unseen &= ~BIT[card]
+        if seat != self.seat:
+            self.opponent_size += 1
+        if not self.stock_size:
+            # All cards not seen are in the opponent's hand now.
+            self.closed = True
+            self.known |= self.unseen
+            self.unseen, self.void = 0, 0
+
+    def on_round_end(self, result):
+        self.over = True
+
+    def follows(self, player):
+        """Return whether the belief follows the round of player, or of a
+        copy of it."""
+        return not self.over and (
+            player is self.player or player.hand == self.player.hand
+        )
+
+    def free(self):
+        """Return the unseen cards the opponent may hold."""
+        return self.unseen & ~self.void
+
+    def free_size(self):
+        """Return how many of the free cards the opponent holds."""
+        return self.opponent_size - self.known.bit_count()
+
+    def count(self):
+        """Return the number of opponent hands consistent with the belief.
+        """
+        return BINOMIAL[self.free().bit_count()][self.free_size()]
+
+    def rank(self, hand):
+        """Return the rank of a consistent opponent hand."""
+        free = cards_of(self.free())
+        return combination_rank(
+            [free.index(card) for card in cards_of(hand & ~self.known)]
+        )
+
+    def unrank(self, rank):
+        """Return the opponent hand with a rank below count()."""
+        return unrank_hand(
+            rank, cards_of(self.free()), self.free_size(), self.known
+        )
+
+    def sample(self, rng):
+        """Return an opponent hand drawn uniformly from the consistent
+        hands."""
+        return sample_hand(
+            cards_of(self.free()), self.free_size(), self.known, rng
+        )
+
+
+def unrank_hand(rank, free, size, known=0):
+    """Return the known cards and the size cards of the list free that
+    have a rank, as a mask."""
+    hand = known
+    for position in combination_unrank(rank, size):
+        hand |= BIT[free[position]]
+    return hand
+
+
+def sample_hand(free, size, known, rng):
+    """Return the known cards and size cards of the list free, drawn
+    uniformly, as a mask."""
+    return unrank_hand(
+        rng.randrange(BINOMIAL[len(free)][size]), free, size, known
+    )
+
+
+if __name__ == "__main__":
+    print("This module is meant to be imported by the main module.")
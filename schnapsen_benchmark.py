@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Benchmark the hot paths of the game.
+
+Every benchmark reports operations per second and the memory it
+allocates per operation (the tracemalloc peak of a single call). Results
+can be written to a JSON file and compared against an earlier file; the
+run fails if a benchmark got slower than the allowed threshold.
+"""
+
+import argparse
+import json
+import random
+import sys
+import timeit
+import tracemalloc
+
+from schnapsen_cards import (
+    BIT, CLUBS, HEARTS, SPADES, JACK, QUEEN, KING, TEN, ACE, make_card,
+)
+from schnapsen_classes import SchnapsenPlayer, SchnapsenGame
+from schnapsen_engine import ComputerStrategy, simulate_round
+from schnapsen_solver import EndgameSolver
+
+
+def _player(*cards):
+    """Return a computer player holding cards."""
+    player = SchnapsenPlayer("Computer")
+    for card in cards:
+        player.add_card(card)
+    return player
+
+
+def bench_get_couples():
+    """Find the couples in a hand with one couple."""
+    player = _player(
+        make_card(HEARTS, QUEEN), make_card(HEARTS, KING),
+        make_card(SPADES, ACE), make_card(SPADES, JACK), make_card(CLUBS, TEN),
+    )
+    return player.get_couples
+
+
+def bench_choose_card2_computer():
+    """Answer a lead with the computer's strategy."""
+    player = _player(
+        make_card(HEARTS, QUEEN), make_card(HEARTS, ACE),
+        make_card(SPADES, TEN), make_card(SPADES, JACK), make_card(CLUBS, TEN),
+    )
+    trick = [(make_card(HEARTS, KING), 0)]
+    return lambda: player.choose_card2_computer(SPADES, trick, False)
+
+
+def bench_decide_taker():
+    """Decide who takes a trick."""
+    trick = [(make_card(HEARTS, KING), 0), (make_card(SPADES, JACK), 1)]
+    return lambda: SchnapsenGame.decide_taker(trick, SPADES)
+
+
+def bench_create_and_shuffle():
+    """Create and shuffle the cards of a new game."""
+    def create_and_shuffle():
+        game = SchnapsenGame()
+        game.create_cards()
+        game.shuffle_cards()
+    return create_and_shuffle
+
+
+def bench_round():
+    """Play a whole round between two computer players."""
+    strategies = [ComputerStrategy(), ComputerStrategy()]
+    return lambda: simulate_round(strategies)
+
+
+def bench_solve_endgame():
+    """Solve a 5-vs-5 endgame with an empty transposition table."""
+    solver = EndgameSolver()
+    hands = random.Random(0).sample(range(20), 10)
+    leader = sum(BIT[card] for card in hands[:5])
+    follower = sum(BIT[card] for card in hands[5:])
+
+    def solve():
+        solver.clear()
+        solver.solve(leader, follower, HEARTS)
+    return solve
+
+
+BENCHMARKS = {
+    "get_couples": bench_get_couples,
+    "choose_card2_computer": bench_choose_card2_computer,
+    "decide_taker": bench_decide_taker,
+    "create_and_shuffle": bench_create_and_shuffle,
+    "round": bench_round,
+    "solve_endgame": bench_solve_endgame,
+}
+
+
+def measure(operation, repeat=5):
+    """Return the operations per second and allocated bytes of a call."""
+    timer = timeit.Timer(operation)
+    number, dummy = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+
+    tracemalloc.start()
+    operation()
+    tracemalloc.reset_peak()
+    before, dummy = tracemalloc.get_traced_memory()
+    operation()
+    dummy, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return number / best, peak - before
+
+
+def run(names, repeat=5):
+    """Run benchmarks. Return their results by name."""
+    random.seed(0)
+    results = {}
+    for name in names:
+        ops, allocated = measure(BENCHMARKS[name](), repeat)
+        results[name] = {"ops_per_sec": ops, "bytes_per_op": allocated}
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print the change against a baseline. Return the regressions."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["ops_per_sec"]
+        change = result["ops_per_sec"] / before - 1
+        print(f"{name:<24}{change:>+10.1%}")
+        if change < -threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    """Parse the command line and run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "benchmarks", nargs="*", metavar="BENCHMARK",
+        help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})",
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument(
+        "-o", "--output", metavar="FILE", help="write the results as JSON"
+    )
+    parser.add_argument(
+        "-b", "--baseline", metavar="FILE",
+        help="compare against results written earlier",
+    )
+    parser.add_argument(
+        "-t", "--threshold", type=float, default=0.1,
+        help="allowed slowdown against the baseline (default: 0.1)",
+    )
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark: {name}")
+
+    results = run(args.benchmarks or list(BENCHMARKS), args.repeat)
+    print(f"{'Benchmark':<24}{'ops/sec':>14}{'bytes/op':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<24}{result['ops_per_sec']:>14,.0f}"
+            f"{result['bytes_per_op']:>10}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        print()
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"Slower than the baseline: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Cache decisions by canonical positions.
+
+Two positions that only differ by a permutation of the non-trump suits
+call for the same decision, permuted the same way. A position is made
+canonical by giving the trump suit number 0 and numbering the other
+suits by the cards in them, so all such positions share one cache entry.
+"""
+
+import os
+import pickle
+from collections import OrderedDict
+
+
+def canonical_suits(trump_suit, masks):
+    """Return the permutation that makes a position canonical.
+
+    masks are the sets of cards that describe the position. The result
+    maps each suit to its canonical number.
+    """
+    others = [suit for suit in range(4) if suit != trump_suit]
+    others.sort(
+        key=lambda suit: [(mask >> (5 * suit)) & 31 for mask in masks],
+        reverse=True,
+    )
+    permutation = [0] * 4
+    for number, suit in enumerate(others, 1):
+        permutation[suit] = number
+    return tuple(permutation)
+
+
+def inverse(permutation):
+    """Return the inverse of a permutation of the suits."""
+    result = [0] * 4
+    for suit, number in enumerate(permutation):
+        result[number] = suit
+    return tuple(result)
+
+
+def permute_mask(mask, permutation):
+    """Return a set of cards with its suits permuted."""
+    result = 0
+    for suit, number in enumerate(permutation):
+        result |= ((mask >> (5 * suit)) & 31) << (5 * number)
+    return result
+
+
+def permute_card(card, permutation):
+    """Return a card with its suit permuted."""
+    return permutation[card // 5] * 5 + card % 5
+
+
+class DecisionCache():
+    """Keep the most recently used decisions, up to max_entries.
+
+    Keys and decisions can be any picklable values except None. If
+    share is true, the decisions stored since the last call of take_added
+    are kept, so they can be passed to another cache, for example from
+    worker processes to the main process.
+    """
+
+    def __init__(self, max_entries=100_000, share=False):
+        """Initialize attributes."""
+        self.entries = OrderedDict()
+        self.max_entries = max_entries
+        self.added = {} if share else None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        """Return the number of cached decisions."""
+        return len(self.entries)
+
+    def lookup(self, key):
+        """Return the decision for a key, or None if it is not cached."""
+        decision = self.entries.get(key)
+        if decision is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return decision
+
+    def store(self, key, decision):
+        """Cache a decision. Drop the least recently used if full."""
+        self.entries[key] = decision
+        self.entries.move_to_end(key)
+        if self.added is not None:
+            self.added[key] = decision
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def update(self, entries):
+        """Cache several decisions, given as a dict, without counting
+        them as added."""
+        for key, decision in entries.items():
+            self.entries[key] = decision
+            self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def take_added(self):
+        """Return the decisions stored since the last call, as a dict."""
+        if self.added is None:
+            return {}
+        added, self.added = self.added, {}
+        return added
+
+    def hit_rate(self):
+        """Return the share of lookups that found a decision."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    def save(self, path):
+        """Write the cached decisions to a file."""
+        with open(path, "wb") as file:
+            pickle.dump(dict(self.entries), file, pickle.HIGHEST_PROTOCOL)
+
+    def load(self, path):
+        """Add the decisions of a file written by save, if it exists."""
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                self.update(pickle.load(file))
+
+
+if __name__ == "__main__":
+    print("This module is meant to be imported by the main module.")
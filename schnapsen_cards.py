@@ -0,0 +1,171 @@
+"""Compact encoding of the 20 Schnapsen cards.
+
+A card is an integer from 0 to 19: suit * 5 + rank. Ranks are ordered
+by strength, so a higher card of the same suit has a higher index. A set
+of cards (a hand, the played cards, a suit) is a 20-bit mask in which
+bit n stands for card n.
+"""
+
+from math import comb
+
+# Suits.
+CLUBS, DIAMONDS, HEARTS, SPADES = range(4)
+SUIT_NAMES = ("Clubs", "Diamonds", "Hearts", "Spades")
+SUIT_EMOJIS = ("♣️", "♦️", "♥️", "♠️")
+
+# Ranks, from lowest to highest.
+JACK, QUEEN, KING, TEN, ACE = range(5)
+RANK_NAMES = ("Jack", "Queen", "King", "Ten", "Ace")
+RANK_POINTS = (2, 3, 4, 10, 11)
+
+DECK = tuple(range(20))
+FULL_DECK = (1 << 20) - 1
+
+# Properties of each card, indexed by card.
+SUIT = tuple(card // 5 for card in DECK)
+RANK = tuple(card % 5 for card in DECK)
+POINTS = tuple(RANK_POINTS[card % 5] for card in DECK)
+BIT = tuple(1 << card for card in DECK)
+
+# Masks of all cards of a suit, and of all cards of a rank.
+SUIT_MASKS = tuple(0b11111 << (5 * suit) for suit in range(4))
+RANK_MASKS = tuple(
+    sum(BIT[suit * 5 + rank] for suit in range(4)) for rank in range(5)
+)
+QUEENS = RANK_MASKS[QUEEN]
+
+# Cards of the same suit that are higher or lower than a card.
+HIGHER = tuple(
+    SUIT_MASKS[SUIT[card]] & ~((BIT[card] << 1) - 1) for card in DECK
+)
+LOWER = tuple(SUIT_MASKS[SUIT[card]] & (BIT[card] - 1) for card in DECK)
+
+
+def _takes_trick(lead, response, trump_suit):
+    """Return True if the response takes the trick from the lead."""
+    if SUIT[lead] == SUIT[response]:
+        return response > lead
+    return SUIT[response] == trump_suit
+
+
+# The outcome of every trick, indexed by
+# (trump_suit * 20 + lead) * 20 + response: twice the points of the
+# trick, plus one if the response takes it.
+TRICKS = tuple(
+    (POINTS[lead] + POINTS[response]) * 2
+    + _takes_trick(lead, response, trump_suit)
+    for trump_suit in range(4)
+    for lead in DECK
+    for response in DECK
+)
+
+# Masks for answering a lead, indexed by trump_suit * 20 + lead: the
+# higher cards of the suit, the whole suit, the trumps if the lead is
+# not a trump, and all cards that take the trick.
+RESPONSES = tuple(
+    (
+        HIGHER[lead],
+        SUIT_MASKS[SUIT[lead]],
+        SUIT_MASKS[trump_suit] & ~SUIT_MASKS[SUIT[lead]],
+        HIGHER[lead] | (SUIT_MASKS[trump_suit] & ~SUIT_MASKS[SUIT[lead]]),
+    )
+    for trump_suit in range(4)
+    for lead in DECK
+)
+
+
+# Binomial coefficients, indexed by [n][k], for sets of up to 20 cards.
+BINOMIAL = tuple(tuple(comb(n, k) for k in range(21)) for n in range(21))
+
+
+def combination_rank(positions):
+    """Return the rank of ascending positions in colexicographic order.
+
+    Positions are below 20, such as the places of cards in a list.
+    """
+    return sum(
+        BINOMIAL[position][number]
+        for number, position in enumerate(positions, 1)
+    )
+
+
+def combination_unrank(rank, size):
+    """Return the ascending positions with a colexicographic rank."""
+    positions = [0] * size
+    position = 20
+    for number in range(size, 0, -1):
+        position -= 1
+        while BINOMIAL[position][number] > rank:
+            position -= 1
+        rank -= BINOMIAL[position][number]
+        positions[number - 1] = position
+    return positions
+
+
+def make_card(suit, rank):
+    """Return the card of a suit and rank."""
+    return suit * 5 + rank
+
+
+def cards_of(mask):
+    """Return the cards of a mask as a list, lowest index first."""
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(low.bit_length() - 1)
+        mask ^= low
+    return cards
+
+
+def lowest_card(mask):
+    """Return the card with the lowest index in a non-empty mask."""
+    return (mask & -mask).bit_length() - 1
+
+
+def highest_card(mask):
+    """Return the card with the highest index in a non-empty mask."""
+    return mask.bit_length() - 1
+
+
+def cheapest_card(mask):
+    """Return the card with the fewest points in a non-empty mask.
+
+    Cards with equal points are ordered by suit.
+    """
+    for rank_mask in RANK_MASKS:
+        if mask & rank_mask:
+            return lowest_card(mask & rank_mask)
+    raise ValueError("empty mask")
+
+
+def legal_cards(hand, lead, trump_suit, closed):
+    """Return the cards of a hand that may be played, as a mask.
+
+    lead is the card led in the current trick, or None. Any card may be
+    led, and any card may answer a lead while the talon is open. Once it
+    is closed or exhausted, the follower must take the trick with a card
+    of the same suit if possible, else follow suit, else trump, else play
+    any card.
+    """
+    if lead is None or not closed:
+        return hand
+    higher, suit, trumps, dummy = RESPONSES[trump_suit * 20 + lead]
+    same_suit = hand & suit
+    if same_suit:
+        return (hand & higher) or same_suit
+    return (hand & trumps) or hand
+
+
+def couples_of(mask):
+    """Return the kings and queens of a mask that form couples."""
+    queens = mask & (mask >> 1) & QUEENS
+    return queens | (queens << 1)
+
+
+def trump_jack(trump_suit):
+    """Return the trump Jack."""
+    return trump_suit * 5 + JACK
+
+
+if __name__ == "__main__":
+    print("This module is meant to be imported by the main module.")
@@ -1,17 +1,82 @@
 """Classes for a game of Schnapsen."""
 
 import random
-from collections import defaultdict
+
+from schnapsen_cards import (
+    DECK, SUIT, POINTS, BIT, SUIT_MASKS, TRICKS, RESPONSES,
+    cards_of, lowest_card, highest_card, cheapest_card, couples_of,
+    legal_cards, trump_jack,
+)
+from schnapsen_locale import card_names, suit_names, current_language
+
+
+def suit_name(suit, language=None):
+    """Return the translated name of a suit."""
+    return suit_names(language or current_language())[suit]
+
+
+def card_name(card, language=None):
+    """Return the translated display name of a card."""
+    return card_names(language or current_language())[card]
+
+
+def computer_lead(hand, trump_suit, rng=random):
+    """Choose the computer's first card in a trick from a hand.
+
+    Return the chosen card and whether the computer wants to marry.
+    """
+    couples = couples_of(hand)
+    if couples:
+        # If you have the trump couple, marry it. Otherwise,
+        # marry the couple of a random suit in the list.
+        trump_couple = couples & SUIT_MASKS[trump_suit]
+        if trump_couple:
+            chosen_card = rng.choice(cards_of(trump_couple))
+        else:
+            suits = [s for s in range(4) if couples & SUIT_MASKS[s]]
+            suit = rng.choice(suits)
+            chosen_card = rng.choice(cards_of(couples & SUIT_MASKS[suit]))
+        return chosen_card, True
+    # If you have no couples, play your first card.
+    return lowest_card(hand), False
+
+
+def computer_response(hand, opponent_card, trump_suit, closed):
+    """Choose the computer's second card in a trick from a hand."""
+    higher, suit, trumps, dummy = RESPONSES[trump_suit * 20 + opponent_card]
+    higher_suit_cards = hand & higher
+    lower_suit_cards = hand & suit & ~higher
+    trump_cards = hand & trumps
+
+    # Never choose a card with a higher value than required.
+    if higher_suit_cards:
+        return lowest_card(higher_suit_cards)
+    # If the talon is closed, you have to match the suit.
+    if closed and lower_suit_cards:
+        return lowest_card(lower_suit_cards)
+    if trump_cards:
+        return lowest_card(trump_cards)
+    # If none of the above is true, choose your lowest card,
+    # but not a trump card unless you hold nothing else.
+    no_trumps = hand & ~SUIT_MASKS[trump_suit]
+    return cheapest_card(no_trumps or hand)
 
 
 class SchnapsenPlayer():
-    """A class to represent a player of Schnapsen."""
+    """A class to represent a player of Schnapsen.
+
+    The hand is a mask of cards, ordered by suit and by rank within each
+    suit, so every question about it is answered with a few bitwise
+    operations and needs no updating besides adding and removing cards.
+    """
+
+    __slots__ = ("name", "human", "hand", "points", "marriage_points", "score")
 
     def __init__(self, name, human=False):
         """Initialize attributes."""
         self.name = name
         self.human = human
-        self.cards = []
+        self.hand = 0
         self.points, self.marriage_points = 0, 0
         self.score = 0
 
@@ -20,37 +85,56 @@ class SchnapsenPlayer():
 
     def add_card(self, card):
         """Add a card to the player's hand."""
-        self.cards.append(card)
-        if self.human:
-            print(_("You draw a card: {}").format(card['name']))
-        else:
-            print(_("{} draws a card.").format(self.name))
+        self.hand |= BIT[card]
+
+    def remove_card(self, card):
+        """Remove a card from the player's hand."""
+        self.hand &= ~BIT[card]
+
+    def has_card(self, card):
+        """Return True if the player holds a card."""
+        return bool(self.hand & BIT[card])
+
+    def suit_cards(self, suit):
+        """Return a mask of the player's cards of a suit."""
+        return self.hand & SUIT_MASKS[suit]
+
+    def lowest_of_suit(self, suit):
+        """Return the player's lowest card of a suit, or None."""
+        cards = self.hand & SUIT_MASKS[suit]
+        return lowest_card(cards) if cards else None
+
+    def highest_of_suit(self, suit):
+        """Return the player's highest card of a suit, or None."""
+        cards = self.hand & SUIT_MASKS[suit]
+        return highest_card(cards) if cards else None
+
+    def can_beat(self, card, trump_suit):
+        """Return True if the player holds a card that takes a lead."""
+        return bool(self.hand & RESPONSES[trump_suit * 20 + card][3])
 
     def get_couples(self):
-        """Return a dictionary of matching kings and queens."""
-        kings_queens = defaultdict(list)
-        for card in self.cards:
-            # Check point values to make sure this method works with
-            # translations.
-            if card["points"] in (3, 4):
-                suit = card["suit"]
-                kings_queens[suit].append(card)
-        return {k: v for (k, v) in kings_queens.items() if len(v) == 2}
+        """Return a mask of matching kings and queens."""
+        return couples_of(self.hand)
 
     def choose_card_human(self, couples, trump_suit, trick, closed):
-        """Let a human player choose a card, and return it."""
-        # Sort cards to show them in order.
-        self.cards.sort(
-            key=lambda card: (card["suit"], card["points"]), reverse=True
-        )
+        """Let a human player choose a card.
+
+        Return the chosen card and whether the player wants to marry.
+        """
+        # Show cards in order, highest suit first.
+        cards = cards_of(self.hand)
+        cards.reverse()
+        lead = trick[0][0] if trick else None
+        legal = legal_cards(self.hand, lead, trump_suit, closed)
 
         # Show enumerated cards.
         print()
-        for number, card in enumerate(self.cards, 1):
-            if card["suit"] == trump_suit:
-                print(f"{number} - {card['name']}*")
+        for number, card in enumerate(cards, 1):
+            if SUIT[card] == trump_suit:
+                print(f"{number} - {card_name(card)}*")
             else:
-                print(f"{number} - {card['name']}")
+                print(f"{number} - {card_name(card)}")
         # Show the "marry" option.
         if couples and not trick:
             print(_("M - Marriage"))
@@ -64,25 +148,26 @@ class SchnapsenPlayer():
             user_input = input(_("Your choice: ")).strip()
             if (
                 user_input.isdigit()
-                and int(user_input) in range(1, len(self.cards) + 1)
+                and int(user_input) in range(1, len(cards) + 1)
             ):
                 index = int(user_input) - 1
-                chosen_card = self.cards[index]
-                break
+                if legal & BIT[cards[index]]:
+                    return cards[index], False
+                print(_(
+                    "You have to match suit and take the trick if you can."
+                ))
 
             # The active player chooses a card from the matching
             # couples to play.
             elif user_input.upper() == _("M") and couples and not trick:
-                couple_cards = []
-                for suit in couples:
-                    couple_cards.extend(couples[suit])
+                couple_cards = cards_of(couples)
 
                 print()
                 for number, card in enumerate(couple_cards, 1):
-                    if card["suit"] == trump_suit:
-                        print(f"{number} - {card['name']}*")
+                    if SUIT[card] == trump_suit:
+                        print(f"{number} - {card_name(card)}*")
                     else:
-                        print(f"{number} - {card['name']}")
+                        print(f"{number} - {card_name(card)}")
                 user_input = ""
                 while (
                     not user_input.isdigit()
@@ -92,100 +177,35 @@ class SchnapsenPlayer():
                     prompt = _("Choose a card: ")
                     user_input = input(prompt).strip()
                 index = int(user_input) - 1
-                chosen_card = couple_cards[index]
-                self.marry(chosen_card, trump_suit)
-                break
+                return couple_cards[index], True
 
             else:
                 print(_("Choose one of the options above."))
 
-        # Remove the chosen card from the player's hand and return it.
-        self.cards.remove(chosen_card)
-        return chosen_card
-
-    def choose_card1_computer(self, couples, trump_suit):
-        """Choose the computer's first card in this trick."""
-        if couples:
-            # If you have the trump couple, marry it. Otherwise,
-            # marry the couple of a random suit in the list.
-            if trump_suit in couples:
-                chosen_card = random.choice(couples[trump_suit])
-                self.marry(chosen_card, trump_suit)
-            else:
-                suit = random.choice(list(couples))
-                chosen_card = random.choice(couples[suit])
-                self.marry(chosen_card, trump_suit)
-        # If you have no couples, play your first card.
-        else:
-            chosen_card = self.cards[0]
+    def choose_card1_computer(self, couples, trump_suit, rng=random):
+        """Choose the computer's first card in this trick.
 
-        # Remove the chosen card from the player's hand and return it.
-        self.cards.remove(chosen_card)
-        return chosen_card
+        Return the chosen card and whether the computer wants to marry.
+        """
+        return computer_lead(self.hand, trump_suit, rng)
 
     def choose_card2_computer(self, trump_suit, trick, closed):
         """Choose the computer's second card in this trick."""
-        opponent_card = trick[0][0]
-
-        higher_suit_cards, lower_suit_cards = [], []
-        trump_cards = []
-
-        for card in self.cards:
-            if (
-                    card["suit"] == opponent_card["suit"]
-                    and card["points"] > opponent_card["points"]
-            ):
-                higher_suit_cards.append(card)
-            elif (
-                    card["suit"] == opponent_card["suit"]
-                    and card["points"] < opponent_card["points"]
-            ):
-                lower_suit_cards.append(card)
-            elif (
-                    card["suit"] == trump_suit
-                    and opponent_card["suit"] != trump_suit
-            ):
-                trump_cards.append(card)
-
-        # Never choose a card with a higher value than required.
-        if higher_suit_cards:
-            higher_suit_cards.sort(key=lambda d: d["points"])
-            chosen_card = higher_suit_cards[0]
-        # If the talon is closed, you have to match the suit.
-        elif closed and lower_suit_cards:
-            lower_suit_cards.sort(key=lambda d: d["points"])
-            chosen_card = lower_suit_cards[0]
-        elif trump_cards:
-            trump_cards.sort(key=lambda d: d["points"])
-            chosen_card = trump_cards[0]
-        # If none of the above is true, choose your lowest card,
-        # but not a trump card.
-        else:
-            no_trumps = [c for c in self.cards if c["suit"] != trump_suit]
-            no_trumps.sort(key=lambda d: d["points"])
-            chosen_card = no_trumps[0]
-
-        # Remove the chosen card from the player's hand and return it.
-        self.cards.remove(chosen_card)
-        return chosen_card
+        return computer_response(self.hand, trick[0][0], trump_suit, closed)
 
     def add_trick_points(self, trick):
-        """Count and add the points of a taken trick."""
+        """Count and add the points of a taken trick.
+
+        Return the marriage points that were added along with them.
+        """
         for card_tuple in trick:
-            card = card_tuple[0]
-            self.points += card["points"]
+            self.points += POINTS[card_tuple[0]]
         # Add points from a previous marriage.
-        if self.marriage_points:
-            self.points += self.marriage_points
+        marriage_points = self.marriage_points
+        if marriage_points:
+            self.points += marriage_points
             self.marriage_points = 0
-            print(_("Marriage points added."))
-
-        # Show the player's current points.
-        if self.human:
-            print(_("Your points:"), end=" ")
-        else:
-            print(_("{}'s points:").format(self.name), end=" ")
-        print(f"{self.points} / 66")
+        return marriage_points
 
     def choose_action_human(self, trump_suit, trump_card):
         """Let a human player choose an action.
@@ -194,16 +214,14 @@ class SchnapsenPlayer():
         """
         exchange, close = False, False
         choices = [_("Close the talon")]
-        for card in self.cards:
-            # Look for the trump Jack in the player's cards.
-            # Check the card's point value to ensure this methods works
-            # with translations.
-            if card["points"] == 2 and card["suit"] == trump_suit:
-                exchange_choice = _("Exchange your {} for the {}").format(
-                    card['name'],
-                    trump_card['name'],
-                )
-                choices.append(exchange_choice)
+        # Look for the trump Jack in the player's cards.
+        jack = trump_jack(trump_suit)
+        if self.has_card(jack):
+            exchange_choice = _("Exchange your {} for the {}").format(
+                card_name(jack),
+                card_name(trump_card),
+            )
+            choices.append(exchange_choice)
 
         print()
         print(_("It's your turn."), end=" ")
@@ -233,136 +251,85 @@ class SchnapsenPlayer():
 
     def choose_action_computer(self, trump_suit):
         """Exchange a computer player's trump card, if possible."""
-        exchange, close = False, False
-        for card in self.cards:
-            if card["rank"] == "Jack" and card["suit"] == trump_suit:
-                exchange = True
-                break
-        return exchange, close
+        exchange = self.has_card(trump_jack(trump_suit))
+        return exchange, False
 
     def marry(self, card, trump_suit):
-        """Marry a king and a queen."""
-        if card["suit"] == trump_suit:
+        """Marry a king and a queen. Return the marriage points."""
+        if SUIT[card] == trump_suit:
             points = 40
         else:
             points = 20
 
         # Marriage points are only counted after the player has taken
         # at least one trick.
-        print("X", end=" ")
-        if self.human:
-            print(_(
-                "You marry the couple of {}"
-            ).format(card['suit']), end=" ")
-        else:
-            print(_(
-                "{computer} marries the couple of {suit}"
-            ).format(computer=self.name, suit=card['suit']), end=" ")
-        print(_("({} points).").format(points))
-
         if self.points:
             self.points += points
         else:
             self.marriage_points += points
-            print(_("Points will be added after the first trick taken."))
+        return points
 
     def pop_trump_jack(self, trump_suit):
         """Remove the trump Jack from the player's cards. Return it."""
-        for card in self.cards:
-            # Check the card's point value to ensure this methods works
-            # with translations.
-            if card["points"] == 2 and card["suit"] == trump_suit:
-                trump_jack = card
-                break
-        self.cards.remove(trump_jack)
-        return trump_jack
+        jack = trump_jack(trump_suit)
+        self.hand &= ~BIT[jack]
+        return jack
 
 
 class SchnapsenGame():
     """A class to represent a game of Schnapsen."""
 
-    def __init__(self):
-        """Initialize attributes."""
+    def __init__(self, rng=None):
+        """Initialize attributes.
+
+        rng is the random number generator of the game; without one,
+        the random module is used.
+        """
+        self.rng = rng
         self.stock = []
         self.trump_card, self.trump_suit = None, None
         self.closed = False
+        # Cards of all completed tricks.
+        self.played = 0
+        # Order of the cards before they were dealt.
+        self.deck = ()
 
     def __repr__(self):
         return "Schnapsen is a text-based card game for two players."
 
     def create_cards(self):
         """Create the cards."""
-        ranks_points = (
-            (_("Jack"), 2),
-            (_("Queen"), 3),
-            (_("King"), 4),
-            (_("Ten"), 10),
-            (_("Ace"), 11)
-        )
-
-        suits = (
-            (_("Clubs"), "♣️"),
-            (_("Diamonds"), "♦️"),
-            (_("Hearts"), "♥️"),
-            (_("Spades"), "♠️"),
-        )
-        for suit, suit_emoji in suits:
-            for rank, points in ranks_points:
-                name = _("[{suit_emoji} {rank} of {suit}]").format(
-                    suit_emoji=suit_emoji,
-                    rank=rank,
-                    suit=suit,
-                )
-                card = {
-                    "name": name,
-                    "suit": suit,
-                    "rank": rank,
-                    "points": points
-                }
-                self.stock.append(card)
+        self.stock = list(DECK)
 
     def shuffle_cards(self):
         """Shuffle the cards."""
-        random.shuffle(self.stock)
+        (self.rng or random).shuffle(self.stock)
+        self.set_deck(self.stock)
+
+    def set_deck(self, deck):
+        """Use the cards in the given order. The first is the trump card."""
+        self.stock = list(deck)
+        self.deck = tuple(deck)
         self.trump_card = self.stock[0]
-        self.trump_suit = self.trump_card["suit"]
-        print(_("The cards are shuffled."), end=" ")
-        print(_("Trump card: {}").format(self.trump_card['name']))
-        print()
+        self.trump_suit = SUIT[self.trump_card]
 
     @staticmethod
     def decide_taker(trick, trump_suit):
         """Decide who takes the trick."""
         (card1, player1), (card2, player2) = trick
-        if card1["suit"] == card2["suit"]:
-            # Both cards have the same suit.
-            # The player with the higher card takes the trick.
-            trick.sort(key=lambda t: t[0]["points"])
-            card_tuple = trick[-1]
-            taker = card_tuple[1]
-        else:
-            # Cards have different suites.
-            # If player2 chose a trump suit card, he takes the trick.
-            if card2["suit"] == trump_suit:
-                taker = player2
-            else:
-                taker = player1
-        return taker
+        # The lowest bit of the table entry tells whether the second
+        # card takes the trick.
+        if TRICKS[(trump_suit * 20 + card1) * 20 + card2] & 1:
+            return player2
+        return player1
 
     def draw_from_stock(self):
         """Draw a new card from the talon."""
         if not self.closed:
             card = self.stock.pop()
-            if len(self.stock) == 2:
-                print()
-                print(_("There are only two more cards in the talon."))
-                print()
-            elif not self.stock:
-                print()
-                print(_("The last card has been drawn!"))
-                print(
-                    _("Players must match suits and take tricks if they can.")
-                )
+            # Players must match suits and take tricks once the last
+            # card has been drawn.
+            if not self.stock:
                 self.closed = True
             return card
         else:
@@ -371,15 +338,11 @@ class SchnapsenGame():
     def close_stock(self):
         """Close the talon."""
         self.closed = True
-        print(_("The talon is closed. Players can't draw any more cards."))
-        print(_("Players must match suits and take tricks if they can."))
 
     def exchange_trump_jack(self, trump_jack):
         """Exchange a trump Jack for the trump card."""
         self.stock[0] = trump_jack
         self.trump_card = trump_jack
-        print(_("The trump Jack was replaced."))
-        print(_("New trump card: {}").format(self.trump_card['name']))
 
 
 if __name__ == "__main__":
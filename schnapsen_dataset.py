@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""Export the decisions of many rounds to memory-mapped NumPy arrays.
+
+Rounds are played by computer strategies or replayed from a record file.
+Every card a player chooses becomes one row: what the player knew, the
+move and the outcome of the round for the player. Rows are written into
+preallocated .npy files of a fixed number of rows, one after another, so
+memory use does not grow with the number of rounds. An index file with
+the suffix ".json" lists the files and their numbers of rows, and
+read_chunks maps them without copying.
+
+Requires NumPy.
+"""
+
+import argparse
+import json
+import os
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from schnapsen_classes import SchnapsenPlayer
+from schnapsen_engine import deal, game_rng, round_turns
+from schnapsen_records import MARRIAGE, RecordReader, ReplayStrategy
+from schnapsen_strategies import STRATEGIES, create_strategy, load_plugins
+
+
+CHUNK_ROWS = 1 << 20
+INDEX_SUFFIX = ".json"
+
+if np is not None:
+    DECISION_DTYPE = np.dtype([
+        ("round", "<u4"),       # Number of the round in the export.
+        ("seat", "u1"),         # Seat of the player (0 led first).
+        ("hand", "<u4"),        # Cards in the player's hand, as a mask.
+        ("lead", "i1"),         # Card led in the trick, or -1.
+        ("trump", "u1"),        # Trump suit.
+        ("closed", "?"),        # Whether the talon is closed or empty.
+        ("points", "u1", 2),    # Points of the player and the opponent.
+        ("move", "u1"),         # Card played, plus MARRIAGE if declared.
+        ("outcome", "i1"),      # Game points won, or minus those lost.
+    ])
+
+
+def _require_numpy():
+    """Raise an error if NumPy is not installed."""
+    if np is None:
+        raise ImportError("exporting decisions requires NumPy")
+
+
+def play_decisions(game, players, strategies):
+    """Play a dealt round and return its result and decision points.
+
+    The decision points are tuples of the fields of DECISION_DTYPE from
+    seat to move, as play_round would see them before each card.
+    """
+    turns = round_turns(game, players)
+    decisions = []
+    move = None
+    try:
+        while True:
+            seat, decision, trick = turns.send(move)
+            player, opponent = players[seat], players[1 - seat]
+            if trick is None:
+                move = strategies[seat].choose_action(player, opponent, game)
+                continue
+            move = strategies[seat].choose_card(
+                player, opponent, game, trick
+            )
+            card, marry = move
+            decisions.append((
+                seat, player.hand, trick[0][0] if trick else -1,
+                game.trump_suit, game.closed,
+                (player.points, opponent.points),
+                card | MARRIAGE if marry and not trick else card,
+            ))
+    except StopIteration as stop:
+        return stop.value, decisions
+
+
+def simulated_rounds(strategies, rounds, seed=0):
+    """Yield the results and decision points of rounds played by two
+    strategies, with the random numbers of game_rng."""
+    for number in range(rounds):
+        players = [SchnapsenPlayer("0"), SchnapsenPlayer("1")]
+        game = deal(players, rng=game_rng(seed, number))
+        yield play_decisions(game, players, strategies)
+
+
+def recorded_rounds(path):
+    """Yield the results and decision points of the rounds in a record
+    file."""
+    with RecordReader(path) as reader:
+        for record in reader:
+            players = [SchnapsenPlayer("0"), SchnapsenPlayer("1")]
+            game = deal(players, record.deck)
+            strategy = ReplayStrategy(record.moves)
+            yield play_decisions(game, players, [strategy, strategy])
+
+
+class DecisionWriter():
+    """Write decision points to .npy files of chunk_rows rows each.
+
+    The files are named after prefix and numbered. Only the file being
+    filled is mapped, and the index is written on closing.
+    """
+
+    def __init__(self, prefix, chunk_rows=CHUNK_ROWS):
+        """Initialize attributes."""
+        _require_numpy()
+        self.prefix = prefix
+        self.chunk_rows = chunk_rows
+        self.chunks = []
+        self.chunk = None
+        self.filled = 0
+        self.rounds = 0
+
+    def write_round(self, result, decisions):
+        """Append the decision points of a round with their outcome."""
+        rows = []
+        for seat, *fields in decisions:
+            outcome = result.game_points
+            if seat != result.winner:
+                outcome = -outcome
+            rows.append((self.rounds, seat, *fields, outcome))
+        self.rounds += 1
+        while rows:
+            if self.chunk is None:
+                self._open_chunk()
+            count = min(len(rows), self.chunk_rows - self.filled)
+            self.chunk[self.filled:self.filled + count] = rows[:count]
+            self.filled += count
+            rows = rows[count:]
+            if self.filled == self.chunk_rows:
+                self._close_chunk()
+
+    def rows(self):
+        """Return the number of rows written so far."""
+        return sum(count for name, count in self.chunks) + self.filled
+
+    def _open_chunk(self):
+        """Map a new file of chunk_rows rows."""
+        path = f"{self.prefix}-{len(self.chunks):05d}.npy"
+        self.chunk = np.lib.format.open_memmap(
+            path, mode="w+", dtype=DECISION_DTYPE, shape=(self.chunk_rows,)
+        )
+        self.filled = 0
+
+    def _close_chunk(self):
+        """Write the mapped file to disk and unmap it."""
+        self.chunk.flush()
+        name = os.path.basename(self.chunk.filename)
+        self.chunks.append((name, self.filled))
+        self.chunk = None
+        self.filled = 0
+
+    def close(self):
+        """Close the last file and write the index."""
+        if self.chunk is not None:
+            self._close_chunk()
+        index = {
+            "rounds": self.rounds,
+            "chunks": [
+                {"file": name, "rows": count} for name, count in self.chunks
+            ],
+        }
+        with open(self.prefix + INDEX_SUFFIX, "w") as file:
+            json.dump(index, file, indent=1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_chunks(prefix):
+    """Yield the rows of an export chunk by chunk, mapped read-only."""
+    _require_numpy()
+    with open(prefix + INDEX_SUFFIX) as file:
+        index = json.load(file)
+    directory = os.path.dirname(prefix)
+    for chunk in index["chunks"]:
+        rows = np.load(os.path.join(directory, chunk["file"]), mmap_mode="r")
+        yield rows[:chunk["rows"]]
+
+
+def main():
+    """Parse the command line and export the decisions."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "prefix", help="path and name of the files to write",
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        "-r", "--records", metavar="FILE",
+        help="replay the rounds of a record file",
+    )
+    source.add_argument(
+        "-p", "--play", nargs=2, metavar="STRATEGY",
+        help="let two strategies play: " + ", ".join(sorted(STRATEGIES))
+             + " or those of plug-ins",
+    )
+    parser.add_argument(
+        "--plugin", action="append", metavar="MODULE",
+        help="import a module that registers strategies (repeatable)",
+    )
+    parser.add_argument("-n", "--rounds", type=int, default=100_000)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument(
+        "-c", "--chunk-rows", type=int, default=CHUNK_ROWS,
+        help=f"rows per file (default: {CHUNK_ROWS})",
+    )
+    args = parser.parse_args()
+    _require_numpy()
+    load_plugins(args.plugin)
+
+    if args.records:
+        rounds = recorded_rounds(args.records)
+    else:
+        for name in args.play:
+            if name not in STRATEGIES:
+                parser.error(f"unknown strategy: {name}")
+        strategies = [create_strategy(name) for name in args.play]
+        rounds = simulated_rounds(strategies, args.rounds, args.seed)
+    with DecisionWriter(args.prefix, args.chunk_rows) as writer:
+        for result, decisions in rounds:
+            writer.write_round(result, decisions)
+    print(
+        f"Wrote {writer.rows()} decisions of {writer.rounds} rounds "
+        f"in {len(writer.chunks)} files"
+    )
+
+
+if __name__ == "__main__":
+    main()
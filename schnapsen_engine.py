@@ -0,0 +1,513 @@
+"""Headless engine to play rounds of Schnapsen without any I/O.
+
+The engine applies the rules to a SchnapsenGame and two SchnapsenPlayer
+instances. Moves are chosen by strategy objects, and everything a front
+end wants to show is reported to an optional observer.
+"""
+
+import copy
+import hashlib
+import queue
+import random
+import threading
+from collections import namedtuple
+from time import perf_counter, perf_counter_ns
+
+from schnapsen_cards import DECK, BIT, legal_cards, trump_jack
+from schnapsen_classes import SchnapsenPlayer, SchnapsenGame
+
+
+RoundResult = namedtuple(
+    "RoundResult",
+    [
+        "winner",       # Seat (0 or 1) of the player who won the round.
+        "game_points",  # Game points for the winner: 3, 2 or 1.
+        "points",       # Trick and marriage points of both seats.
+        "marriages",    # Number of marriages declared by both seats.
+        "tricks",       # Number of tricks played.
+        "closed_by",    # Seat that closed the talon, or None.
+        "reason",       # "points", "marriage" or "last trick".
+    ]
+)
+
+
+def game_points(loser_points):
+    """Return the game points the winner of a round receives."""
+    if loser_points == 0:
+        return 3
+    elif loser_points < 33:
+        return 2
+    return 1
+
+
+class ComputerStrategy():
+    """The computer's built-in strategy.
+
+    Strategies are given the player to move, its opponent, the game and
+    the current trick. They must not look at the opponent's hand or at
+    the cards in the talon.
+    """
+
+    def choose_action(self, player, opponent, game):
+        """Decide whether to exchange the trump Jack and/or close."""
+        return player.choose_action_computer(game.trump_suit)
+
+    def round_observer(self, seat, player):
+        """Return a RoundObserver that keeps the strategy informed about
+        the round it plays in seat, or None."""
+        return None
+
+    def choose_card(self, player, opponent, game, trick):
+        """Return the card to play and whether to marry."""
+        if trick:
+            card = player.choose_card2_computer(
+                game.trump_suit, trick, game.closed
+            )
+            return card, False
+        couples = player.get_couples()
+        return player.choose_card1_computer(
+            couples, game.trump_suit, game.rng or random
+        )
+
+
+class DeadlineStrategy():
+    """Let a strategy decide within a deadline, or play the baseline move.
+
+    The strategy decides in a thread of its own, on copies of the player,
+    the opponent, the game and the trick. The copy of the game has a
+    random number generator of its own, seeded from the game's at every
+    decision, so a late decision does not change the random numbers of
+    the round. If it has not decided after deadline seconds, the move of
+    fallback (the computer's strategy by default) is played instead. A
+    thread cannot be stopped, so a late decision runs on and is
+    discarded once it is done; the time the next decision waits for it
+    counts against the next deadline, and the events for the observer of
+    the strategy are held back until then. The numbers of decisions and
+    of moves played by the fallback are counted. Call close to stop the
+    thread.
+    """
+
+    def __init__(self, strategy, deadline, fallback=None):
+        """Initialize attributes."""
+        self.strategy = strategy
+        self.deadline = deadline
+        self.fallback = fallback or ComputerStrategy()
+        self.decisions = 0
+        self.timeouts = 0
+        self.idle = threading.Event()
+        self.idle.set()
+        self.requests = None
+        # Events held back while the strategy is busy, as
+        # (observer, method name, arguments).
+        self.held = []
+
+    def round_observer(self, seat, player):
+        """Return the observer of the strategy, if it has one, so that
+        it is only told about events while the strategy is idle."""
+        get_observer = getattr(self.strategy, "round_observer", None)
+        observer = get_observer(seat, player) if get_observer else None
+        return _HeldObserver(self, observer) if observer else None
+
+    def choose_action(self, player, opponent, game):
+        """Decide whether to exchange the trump Jack and/or close."""
+        move = self.decide(
+            self.strategy.choose_action, (player, opponent, game)
+        )
+        if move is None:
+            return self.fallback.choose_action(player, opponent, game)
+        return move
+
+    def choose_card(self, player, opponent, game, trick):
+        """Return the card to play and whether to marry."""
+        move = self.decide(
+            self.strategy.choose_card, (player, opponent, game, trick)
+        )
+        if move is None:
+            return self.fallback.choose_card(player, opponent, game, trick)
+        return move
+
+    def decide(self, method, args):
+        """Return the move of the strategy, or None if it is late."""
+        self.decisions += 1
+        game = args[2]
+        rng = random.Random((game.rng or random).getrandbits(64))
+        if self.requests is None:
+            self.requests = queue.SimpleQueue()
+            threading.Thread(
+                target=self.work, args=(self.requests,), daemon=True
+            ).start()
+        deadline = perf_counter() + self.deadline
+        if self.idle.wait(self.deadline):
+            self.release()
+            request = _Request(method, _copy_position(rng, *args))
+            self.idle.clear()
+            self.requests.put(request)
+            if request.done.wait(max(deadline - perf_counter(), 0)):
+                if request.error is not None:
+                    raise request.error
+                return request.move
+        self.timeouts += 1
+        return None
+
+    def hold(self, observer, name, args):
+        """Pass an event on to an observer, or hold it back while the
+        strategy is busy."""
+        if self.idle.is_set() and not self.held:
+            getattr(observer, name)(*args)
+        else:
+            self.held.append((observer, name, copy.deepcopy(args)))
+            self.release()
+
+    def release(self):
+        """Pass on the events held back, if the strategy is idle."""
+        if self.idle.is_set():
+            for observer, name, args in self.held:
+                getattr(observer, name)(*args)
+            self.held.clear()
+
+    def work(self, requests):
+        """Decide on the requests, one after another, until close."""
+        while True:
+            request = requests.get()
+            if request is None:
+                return
+            try:
+                request.move = request.method(*request.args)
+            except Exception as error:
+                request.error = error
+            self.idle.set()
+            request.done.set()
+
+    def close(self):
+        """Stop the thread once it is done with its decision."""
+        if self.requests is not None:
+            self.requests.put(None)
+            self.requests = None
+        self.held.clear()
+
+
+def _copy_position(rng, player, opponent, game, trick=None):
+    """Return copies of the arguments of a decision. The game gets the
+    random number generator rng."""
+    game = copy.copy(game)
+    game.stock = list(game.stock)
+    game.rng = rng
+    position = (copy.copy(player), copy.copy(opponent), game)
+    if trick is None:
+        return position
+    return (*position, list(trick))
+
+
+class _Request():
+    """A decision that a DeadlineStrategy hands to its thread."""
+
+    def __init__(self, method, args):
+        """Initialize attributes."""
+        self.method = method
+        self.args = args
+        self.done = threading.Event()
+        self.move = None
+        self.error = None
+
+
+class RoundObserver():
+    """Base class for observers of a round. Every method is a no-op."""
+
+    def on_deal(self, game):
+        """The cards have been dealt and the round starts."""
+
+    def on_decision(self, seat, decision, nanoseconds):
+        """A strategy has taken nanoseconds to decide.
+
+        decision is "action" (exchange and closing), "lead" or
+        "response".
+        """
+
+    def on_action(self, seat, exchange, close):
+        """A player has exchanged the trump Jack and/or closed."""
+
+    def on_card(self, seat, card, marriage_points):
+        """A player has played a card, possibly marrying a couple."""
+
+    def on_trick(self, taker, trick, marriage_points):
+        """A player has taken a trick."""
+
+    def on_draw(self, seat, card):
+        """A player has drawn a card from the talon."""
+
+    def on_round_end(self, result):
+        """The round is over."""
+
+
+class ObserverGroup(RoundObserver):
+    """Pass everything that happens on to several observers."""
+
+    def __init__(self, *observers):
+        """Initialize attributes."""
+        self.observers = observers
+
+    def on_deal(self, game):
+        for observer in self.observers:
+            observer.on_deal(game)
+
+    def on_decision(self, seat, decision, nanoseconds):
+        for observer in self.observers:
+            observer.on_decision(seat, decision, nanoseconds)
+
+    def on_action(self, seat, exchange, close):
+        for observer in self.observers:
+            observer.on_action(seat, exchange, close)
+
+    def on_card(self, seat, card, marriage_points):
+        for observer in self.observers:
+            observer.on_card(seat, card, marriage_points)
+
+    def on_trick(self, taker, trick, marriage_points):
+        for observer in self.observers:
+            observer.on_trick(taker, trick, marriage_points)
+
+    def on_draw(self, seat, card):
+        for observer in self.observers:
+            observer.on_draw(seat, card)
+
+    def on_round_end(self, result):
+        for observer in self.observers:
+            observer.on_round_end(result)
+
+
+class _HeldObserver(RoundObserver):
+    """Pass events on to the observer of a DeadlineStrategy's strategy
+    through the DeadlineStrategy, which holds them back while the
+    strategy is busy."""
+
+    def __init__(self, deadline_strategy, observer):
+        """Initialize attributes."""
+        self.hold = deadline_strategy.hold
+        self.observer = observer
+
+    def on_deal(self, game):
+        self.hold(self.observer, "on_deal", (game,))
+
+    def on_decision(self, seat, decision, nanoseconds):
+        self.hold(
+            self.observer, "on_decision", (seat, decision, nanoseconds)
+        )
+
+    def on_action(self, seat, exchange, close):
+        self.hold(self.observer, "on_action", (seat, exchange, close))
+
+    def on_card(self, seat, card, marriage_points):
+        self.hold(self.observer, "on_card", (seat, card, marriage_points))
+
+    def on_trick(self, taker, trick, marriage_points):
+        self.hold(self.observer, "on_trick", (taker, trick, marriage_points))
+
+    def on_draw(self, seat, card):
+        self.hold(self.observer, "on_draw", (seat, card))
+
+    def on_round_end(self, result):
+        self.hold(self.observer, "on_round_end", (result,))
+
+
+def game_rng(master_seed, index):
+    """Return the random number generator of a game in a simulation.
+
+    It only depends on the master seed of the simulation and the index
+    of the game, so the generators of different games are independent
+    and any game can be played again on its own.
+    """
+    key = f"{master_seed}:{index}".encode()
+    digest = hashlib.blake2b(key, digest_size=16).digest()
+    return random.Random(int.from_bytes(digest, "big"))
+
+
+def deal_games(master_seed, start, count):
+    """Shuffle the decks of count games from index start ahead of play.
+
+    Return a (deck, rng) pair for each game. deal(players, deck, rng)
+    then plays the game as if it had been shuffled with game_rng.
+    """
+    games = []
+    for index in range(start, start + count):
+        rng = game_rng(master_seed, index)
+        deck = list(DECK)
+        rng.shuffle(deck)
+        games.append((tuple(deck), rng))
+    return games
+
+
+def deal(players, deck=None, rng=None):
+    """Create, shuffle and deal the cards. Return the game.
+
+    If a deck is given, its cards are dealt in that order instead. rng is
+    the random number generator of the game (see SchnapsenGame).
+    """
+    game = SchnapsenGame(rng)
+    if deck is None:
+        game.create_cards()
+        game.shuffle_cards()
+    else:
+        game.set_deck(deck)
+    for player in players:
+        for dummy in range(5):
+            player.add_card(game.draw_from_stock())
+    return game
+
+
+def play_round(game, players, strategies, observer=None):
+    """Play a dealt round to the end and return a RoundResult.
+
+    players[0] leads the first trick. strategies[i] chooses the moves of
+    players[i], and seats in the result refer to these indices. The time
+    of every decision is only measured if there is an observer.
+    Strategies that follow the round get their own observers, see
+    ComputerStrategy.round_observer.
+    """
+    everyone = observer
+    for seat, strategy in enumerate(strategies):
+        get_observer = getattr(strategy, "round_observer", None)
+        own = get_observer(seat, players[seat]) if get_observer else None
+        if own:
+            everyone = ObserverGroup(everyone, own) if everyone else own
+    send = round_turns(game, players, everyone).send
+    move = None
+    try:
+        while True:
+            seat, decision, trick = send(move)
+            player, opponent = players[seat], players[1 - seat]
+            if observer:
+                start = perf_counter_ns()
+            if trick is None:
+                move = strategies[seat].choose_action(player, opponent, game)
+            else:
+                move = strategies[seat].choose_card(
+                    player, opponent, game, trick
+                )
+            if observer:
+                observer.on_decision(
+                    seat, decision, perf_counter_ns() - start
+                )
+    except StopIteration as stop:
+        return stop.value
+
+
+def round_turns(game, players, observer=None):
+    """Apply the rules to a dealt round, one decision at a time.
+
+    This generator yields (seat, decision, trick) whenever a player has
+    to decide, and has to be sent the move: (exchange, close) if decision
+    is "action" (trick is None then), or (card, marry) for a "lead" or
+    "response". It returns the RoundResult. This lets callers that cannot
+    block, such as a server, drive a round as play_round does.
+    """
+    leader, follower = 0, 1
+    closed_by = None
+    marriages = [0, 0]
+    tricks = 0
+
+    def finish(winner, reason):
+        loser_points = players[1 - winner].points
+        result = RoundResult(
+            winner,
+            game_points(loser_points),
+            (players[0].points, players[1].points),
+            tuple(marriages),
+            tricks,
+            closed_by,
+            reason,
+        )
+        if observer:
+            observer.on_round_end(result)
+        return result
+
+    if observer:
+        observer.on_deal(game)
+
+    while True:
+
+        # Start a new trick.
+        trick = []
+        for seat in (leader, follower):
+            player = players[seat]
+
+            # The player who took the last trick wins once the
+            # players have run out of cards.
+            if not player.hand:
+                return finish(leader, "last trick")
+
+            # The first player may exchange the trump Jack
+            # and/or close the talon.
+            if not trick and not game.closed:
+                exchange, close = yield seat, "action", None
+                jack = trump_jack(game.trump_suit)
+                if exchange and not player.hand & BIT[jack]:
+                    raise ValueError(f"the trump Jack {jack} is not held")
+                if close and not game.stock:
+                    raise ValueError("the talon is empty")
+                if exchange:
+                    player.pop_trump_jack(game.trump_suit)
+                    player.add_card(game.trump_card)
+                    game.exchange_trump_jack(jack)
+                if close:
+                    game.close_stock()
+                    closed_by = seat
+                if observer and (exchange or close):
+                    observer.on_action(seat, exchange, close)
+
+            card, marry = yield seat, "response" if trick else "lead", trick
+            lead = trick[0][0] if trick else None
+            legal = legal_cards(
+                player.hand, lead, game.trump_suit, game.closed
+            )
+            if not legal & BIT[card]:
+                raise ValueError(f"card {card} may not be played")
+            if marry and not trick and not player.get_couples() & BIT[card]:
+                raise ValueError(f"card {card} is not part of a couple")
+            player.remove_card(card)
+            marriage_points = 0
+            if marry and not trick:
+                marriage_points = player.marry(card, game.trump_suit)
+                marriages[seat] += 1
+            if observer:
+                observer.on_card(seat, card, marriage_points)
+
+            # Check for a victory by marriage.
+            if player.points >= 66:
+                return finish(seat, "marriage")
+
+            trick.append((card, seat))
+
+        # One of the players takes the trick.
+        tricks += 1
+        game.played |= BIT[trick[0][0]] | BIT[trick[1][0]]
+        taker = game.decide_taker(trick, game.trump_suit)
+        marriage_points = players[taker].add_trick_points(trick)
+        if observer:
+            observer.on_trick(taker, trick, marriage_points)
+
+        # If the second player has taken the trick, switch turns.
+        if taker == follower:
+            leader, follower = follower, leader
+
+        # Check for a victory by trick-taking.
+        if players[leader].points >= 66:
+            return finish(leader, "points")
+
+        # Both players draw cards.
+        for seat in (leader, follower):
+            card = game.draw_from_stock()
+            if card is not None:
+                players[seat].add_card(card)
+                if observer:
+                    observer.on_draw(seat, card)
+
+
+def simulate_round(strategies, rng=None):
+    """Deal and play a round between two strategies without any I/O."""
+    players = [SchnapsenPlayer("0"), SchnapsenPlayer("1")]
+    game = deal(players, rng=rng)
+    return play_round(game, players, strategies)
+
+
+if __name__ == "__main__":
+    print("This module is meant to be imported by the main module.")
@@ -0,0 +1,197 @@
+"""Structured events and timing statistics of played rounds.
+
+EventLog turns what the engine reports into Event tuples with a time
+stamp. TimingCollector counts what happens and keeps histograms of the
+time the strategies take for their decisions and of whole rounds. Both
+are observers: pass them to play_round, or combine them with other
+observers in an ObserverGroup. Without an observer, the engine does not
+measure any times.
+"""
+
+from collections import Counter, namedtuple
+from time import perf_counter_ns
+
+from schnapsen_engine import RoundObserver
+
+
+Event = namedtuple(
+    "Event",
+    [
+        "time",     # perf_counter_ns() when the event was reported.
+        "kind",     # "deal", "decision", "action", "card", "trick",
+                    # "draw" or "round end".
+        "seat",     # Seat the event is about, or None.
+        "data",     # Details, see EventLog.
+    ]
+)
+
+
+class EventLog(RoundObserver):
+    """Turn everything that happens in rounds into Events.
+
+    The data of the events are: the trump card for "deal", (decision,
+    nanoseconds) for "decision", (exchange, close) for "action", (card,
+    marriage points) for "card", (trick, marriage points) for "trick",
+    the card for "draw" and the RoundResult for "round end".
+
+    Events are passed to handler if one is given, otherwise they are
+    appended to the events list.
+    """
+
+    def __init__(self, handler=None):
+        """Initialize attributes."""
+        self.events = []
+        self.handler = handler or self.events.append
+
+    def emit(self, kind, seat, data):
+        """Stamp an event with the current time and hand it on."""
+        self.handler(Event(perf_counter_ns(), kind, seat, data))
+
+    def on_deal(self, game):
+        self.emit("deal", None, game.trump_card)
+
+    def on_decision(self, seat, decision, nanoseconds):
+        self.emit("decision", seat, (decision, nanoseconds))
+
+    def on_action(self, seat, exchange, close):
+        self.emit("action", seat, (exchange, close))
+
+    def on_card(self, seat, card, marriage_points):
+        self.emit("card", seat, (card, marriage_points))
+
+    def on_trick(self, taker, trick, marriage_points):
+        self.emit("trick", taker, (tuple(trick), marriage_points))
+
+    def on_draw(self, seat, card):
+        self.emit("draw", seat, card)
+
+    def on_round_end(self, result):
+        self.emit("round end", result.winner, result)
+
+
+class Histogram():
+    """Count values, such as nanoseconds, in buckets of powers of two.
+
+    Bucket n holds the values from 2 ** (n - 1) to 2 ** n - 1.
+    """
+
+    def __init__(self):
+        """Initialize attributes."""
+        self.buckets = [0] * 65
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        """Count a value."""
+        self.buckets[value.bit_length()] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Add the counts of another histogram."""
+        for bucket, count in enumerate(other.buckets):
+            self.buckets[bucket] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def mean(self):
+        """Return the mean of the values, or 0 without values."""
+        return self.total / self.count if self.count else 0
+
+    def percentile(self, percent):
+        """Return an upper bound of a percentile of the values."""
+        wanted = self.count * percent / 100
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                return min(2 ** bucket - 1, self.max)
+        return 0
+
+
+class TimingCollector(RoundObserver):
+    """Count events and keep histograms of decision and round times.
+
+    Decision times are kept by the name of the seat and the decision
+    ("action", "lead" or "response"). Set seats to the names of the
+    strategies before each round; the default names are the seat
+    numbers.
+    """
+
+    def __init__(self, seats=("0", "1")):
+        """Initialize attributes."""
+        self.seats = seats
+        self.counters = Counter()
+        self.histograms = {}
+        self.round_start = None
+
+    def histogram(self, name, decision):
+        """Return the histogram of a seat name and decision."""
+        key = (name, decision)
+        if key not in self.histograms:
+            self.histograms[key] = Histogram()
+        return self.histograms[key]
+
+    def merge(self, other):
+        """Add the counters and histograms of another collector."""
+        self.counters.update(other.counters)
+        for (name, decision), histogram in other.histograms.items():
+            self.histogram(name, decision).merge(histogram)
+
+    def on_deal(self, game):
+        self.counters["rounds"] += 1
+        self.round_start = perf_counter_ns()
+
+    def on_decision(self, seat, decision, nanoseconds):
+        self.histogram(self.seats[seat], decision).add(nanoseconds)
+
+    def on_action(self, seat, exchange, close):
+        self.counters["exchanges"] += bool(exchange)
+        self.counters["closings"] += bool(close)
+
+    def on_card(self, seat, card, marriage_points):
+        self.counters["cards"] += 1
+        self.counters["marriages"] += bool(marriage_points)
+
+    def on_trick(self, taker, trick, marriage_points):
+        self.counters["tricks"] += 1
+
+    def on_draw(self, seat, card):
+        self.counters["draws"] += 1
+
+    def on_round_end(self, result):
+        self.counters[f"won by {result.reason}"] += 1
+        if self.round_start is not None:
+            self.histogram("all", "round").add(
+                perf_counter_ns() - self.round_start
+            )
+
+    def report(self):
+        """Return the statistics as lines of text, times in microseconds.
+        """
+        lines = [
+            f"{'Seat':<16}{'Decision':<10}{'Count':>10}{'Mean':>10}"
+            f"{'p50':>10}{'p90':>10}{'p99':>10}{'Max':>10}"
+        ]
+        for (name, decision), histogram in sorted(self.histograms.items()):
+            times = [
+                histogram.mean(), histogram.percentile(50),
+                histogram.percentile(90), histogram.percentile(99),
+                histogram.max,
+            ]
+            lines.append(
+                f"{name:<16}{decision:<10}{histogram.count:>10}"
+                + "".join(f"{time / 1000:>10.1f}" for time in times)
+            )
+        lines.append("")
+        for name, count in sorted(self.counters.items()):
+            lines.append(f"{name:<26}{count:>10}")
+        return lines
+
+
+if __name__ == "__main__":
+    print("This module is meant to be imported by the main module.")
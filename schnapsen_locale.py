@@ -0,0 +1,84 @@
+"""Translations and translated card names, loaded on first use.
+
+Several languages can be used in one process. The translation of each
+language is read from the locales directory next to this module when it
+is first needed, and the display names of its suits and cards are built
+once and shared as tuples.
+"""
+
+import builtins
+import gettext
+import os
+from functools import lru_cache
+
+from schnapsen_cards import (
+    DECK, SUIT, RANK, SUIT_NAMES, SUIT_EMOJIS, RANK_NAMES,
+)
+
+
+DOMAIN = "schnapsen"
+LOCALE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "locales"
+)
+DEFAULT_LANGUAGE = "en"
+
+# The language of _() after install().
+_language = DEFAULT_LANGUAGE
+
+
+@lru_cache(maxsize=None)
+def get_translation(language):
+    """Return the translation of a language, reading it on first use."""
+    return gettext.translation(DOMAIN, LOCALE_DIR, [language])
+
+
+def languages():
+    """Return the languages that have a translation, sorted."""
+    return sorted(
+        language for language in os.listdir(LOCALE_DIR)
+        if gettext.find(DOMAIN, LOCALE_DIR, [language])
+    )
+
+
+def current_language():
+    """Return the language that was installed last."""
+    return _language
+
+
+def translate(message, language=None):
+    """Return a message translated to a language or the current one."""
+    return get_translation(language or _language).gettext(message)
+
+
+def install(language=DEFAULT_LANGUAGE):
+    """Make _() translate to a language.
+
+    Nothing is read until the first message is translated.
+    """
+    global _language
+    _language = language
+    builtins._ = translate
+
+
+@lru_cache(maxsize=None)
+def suit_names(language):
+    """Return the translated names of the suits."""
+    return tuple(translate(name, language) for name in SUIT_NAMES)
+
+
+@lru_cache(maxsize=None)
+def card_names(language):
+    """Return the translated display names of all cards."""
+    template = translate("[{suit_emoji} {rank} of {suit}]", language)
+    return tuple(
+        template.format(
+            suit_emoji=SUIT_EMOJIS[SUIT[card]],
+            rank=translate(RANK_NAMES[RANK[card]], language),
+            suit=suit_names(language)[SUIT[card]],
+        )
+        for card in DECK
+    )
+
+
+if __name__ == "__main__":
+    print("This module is meant to be imported by the main module.")
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""Compare two computer strategies in matches, stopping early.
+
+A match (a "Bummerl") is played until one side has won 7 game points,
+and the sides take turns to lead the first trick. Matches are played in
+pairs: the second match of a pair deals the same cards in the same order
+with the seats swapped, so the luck of the cards mostly cancels out. A
+pair scores 1 for the first strategy if it wins both matches, 0.5 if the
+matches are split and 0 if it loses both.
+
+After each pair, a sequential probability ratio test weighs the
+hypothesis that the first strategy wins matches with probability p0
+against p1 and stops as soon as one of them is accepted with the error
+rates alpha and beta.
+"""
+
+import argparse
+import math
+import os
+from collections import deque
+from multiprocessing import Pool
+from statistics import NormalDist
+
+from schnapsen_classes import SchnapsenPlayer
+from schnapsen_engine import deal, game_rng, play_round
+from schnapsen_strategies import STRATEGIES, create_strategy, load_plugins
+
+
+MATCH_POINTS = 7
+# Pairs played before the test may stop, as its approximation needs a
+# few scores to estimate their variance.
+MIN_PAIRS = 10
+# The most rounds a match can take, so every round has its own deal.
+MAX_ROUNDS = 2 * MATCH_POINTS - 1
+# Pairs handed to each worker ahead of the results, so the workers never
+# wait while the test looks at a result, and a test that stops early
+# leaves little work behind.
+PENDING_PAIRS = 16
+
+# Strategies of this process, by name.
+_strategies = {}
+
+
+def play_match(strategies, seed, pair, first):
+    """Play a match. Return the side that won it and the number of rounds.
+
+    Side first leads the first trick. The rounds are dealt by the random
+    number generators of the pair.
+    """
+    scores = [0, 0]
+    number = 0
+    while max(scores) < MATCH_POINTS:
+        # The sides take turns to lead, starting with side first.
+        leader = first if number % 2 == 0 else 1 - first
+        sides = (leader, 1 - leader)
+        players = [SchnapsenPlayer(str(side)) for side in sides]
+        game = deal(players, rng=game_rng(seed, pair * MAX_ROUNDS + number))
+        result = play_round(
+            game, players, [strategies[side] for side in sides]
+        )
+        scores[sides[result.winner]] += result.game_points
+        number += 1
+    return scores.index(max(scores)), number
+
+
+def play_pair(job):
+    """Play a pair of matches. Return the matches won by the first
+    strategy and the rounds played."""
+    names, seed, pair = job
+    strategies = []
+    for name in names:
+        if name not in _strategies:
+            _strategies[name] = create_strategy(name)
+        strategies.append(_strategies[name])
+    wins, rounds = 0, 0
+    for first in (0, 1):
+        winner, played = play_match(strategies, seed, pair, first)
+        wins += winner == 0
+        rounds += played
+    return wins, rounds
+
+
+class SequentialTest():
+    """A sequential probability ratio test on the scores of pairs.
+
+    The log-likelihood ratio of match win probability p1 against p0 is
+    approximated from the mean and variance of the scores.
+    """
+
+    def __init__(self, p0=0.5, p1=0.55, alpha=0.05, beta=0.05):
+        """Initialize attributes."""
+        self.p0, self.p1 = p0, p1
+        self.alpha, self.beta = alpha, beta
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self.counts = [0, 0, 0]
+
+    def add(self, wins):
+        """Add the score of a pair, given by the matches won (0 to 2)."""
+        self.counts[wins] += 1
+
+    def pairs(self):
+        """Return the number of pairs."""
+        return sum(self.counts)
+
+    def mean(self):
+        """Return the mean score, the estimated match win probability."""
+        return (self.counts[1] * 0.5 + self.counts[2]) / self.pairs()
+
+    def variance(self):
+        """Return the variance of the scores of pairs."""
+        if not self.pairs():
+            return 0
+        mean = self.mean()
+        return sum(
+            count * (wins / 2 - mean) ** 2
+            for wins, count in enumerate(self.counts)
+        ) / self.pairs()
+
+    def llr(self):
+        """Return the log-likelihood ratio of p1 against p0."""
+        if not self.pairs():
+            return 0
+        slope = (self.p1 - self.p0) * (2 * self.mean() - self.p0 - self.p1)
+        # Without any variance, the mean is certain.
+        if not self.variance():
+            return math.copysign(math.inf, slope) if slope else 0
+        return slope * self.pairs() / (2 * self.variance())
+
+    def decision(self):
+        """Return "p1" or "p0" once a hypothesis is accepted, else None."""
+        if self.pairs() < MIN_PAIRS:
+            return None
+        llr = self.llr()
+        if llr >= self.upper:
+            return "p1"
+        if llr <= self.lower:
+            return "p0"
+        return None
+
+    def interval(self, confidence=0.95):
+        """Return the confidence interval of the match win probability."""
+        if not self.pairs():
+            return 0.0, 1.0
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        error = z * math.sqrt(self.variance() / self.pairs())
+        return self.mean() - error, self.mean() + error
+
+    def fixed_pairs(self):
+        """Return the number of pairs a test of fixed size with the same
+        error rates would need, at the variance seen so far."""
+        normal = NormalDist()
+        z = normal.inv_cdf(1 - self.alpha) + normal.inv_cdf(1 - self.beta)
+        return math.ceil(z * z * self.variance() / (self.p1 - self.p0) ** 2)
+
+
+def run_match(names, test, max_pairs=100_000, seed=0, workers=None,
+              plugins=None):
+    """Play pairs of matches until the test decides or max_pairs pairs
+    have been played. plugins are the modules of other strategies.
+    Return the number of rounds played."""
+    workers = workers or os.cpu_count()
+    rounds = 0
+    with Pool(workers, load_plugins, (plugins,)) as pool:
+        # Only a bounded number of pairs is submitted at a time, and
+        # their results are taken in order, so the result depends on the
+        # seed only.
+        pending = deque()
+        pair = 0
+        while pair < max_pairs or pending:
+            while pair < max_pairs and len(pending) < workers * PENDING_PAIRS:
+                job = (tuple(names), seed, pair)
+                pending.append(pool.apply_async(play_pair, (job,)))
+                pair += 1
+            wins, played = pending.popleft().get()
+            test.add(wins)
+            rounds += played
+            if test.decision():
+                break
+        pool.terminate()
+    return rounds
+
+
+def main():
+    """Parse the command line, play the matches and show the result."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "strategies", nargs=2,
+        help="the two strategies that play against each other: "
+             + ", ".join(sorted(STRATEGIES)) + " or those of plug-ins",
+    )
+    parser.add_argument(
+        "--p0", type=float, default=0.5,
+        help="match win probability of the null hypothesis (default: 0.5)",
+    )
+    parser.add_argument(
+        "--p1", type=float, default=0.55,
+        help="match win probability of the alternative (default: 0.55)",
+    )
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument(
+        "-m", "--max-pairs", type=int, default=100_000,
+        help="stop after this many pairs of matches",
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--plugin", action="append", metavar="MODULE",
+        help="import a module that registers strategies (repeatable)",
+    )
+    args = parser.parse_args()
+    load_plugins(args.plugin)
+    for name in args.strategies:
+        if name not in STRATEGIES:
+            parser.error(f"unknown strategy: {name}")
+    if not 0 < args.p0 < args.p1 < 1:
+        parser.error("p0 and p1 must satisfy 0 < p0 < p1 < 1")
+    if args.max_pairs < 1:
+        parser.error("at least one pair of matches must be played")
+
+    test = SequentialTest(args.p0, args.p1, args.alpha, args.beta)
+    rounds = run_match(
+        args.strategies, test, args.max_pairs, args.seed, args.workers,
+        args.plugin,
+    )
+    first, second = args.strategies
+    pairs = test.pairs()
+    low, high = test.interval()
+    print(f"{first} against {second}: {pairs} pairs of matches, "
+          f"{rounds} rounds")
+    print(f"Pairs won, split, lost: {test.counts[2]}, {test.counts[1]}, "
+          f"{test.counts[0]}")
+    print(f"Match win probability of {first}: {test.mean():.3f} "
+          f"(95% confidence interval {low:.3f} to {high:.3f})")
+    print(f"Log-likelihood ratio {test.llr():.2f}, "
+          f"bounds {test.lower:.2f} and {test.upper:.2f}")
+    decision = test.decision()
+    if decision == "p1":
+        print(f"Accepted p1 = {args.p1}: {first} is stronger.")
+    elif decision == "p0":
+        print(f"Accepted p0 = {args.p0}: {first} is not stronger.")
+    else:
+        print("No decision within the maximum number of pairs.")
+    fixed = test.fixed_pairs()
+    if fixed > pairs:
+        saved = fixed - pairs
+        print(f"A test of fixed size would need {fixed} pairs: "
+              f"{saved} pairs ({saved / fixed:.0%}, about "
+              f"{round(saved * rounds / pairs)} rounds) saved.")
+    else:
+        print(f"A test of fixed size would need {fixed} pairs: "
+              f"none saved.")
+
+
+if __name__ == "__main__":
+    main()
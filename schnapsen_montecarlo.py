@@ -0,0 +1,290 @@
+"""A computer strategy that samples the opponent's hand.
+
+For every move, the strategy deals the unseen cards at random between the
+opponent's hand and the talon, consistent with what it has learned in the
+round (see BeliefState), plays every candidate card in each of these
+deals, and chooses the card with the best average result. Deals with an
+open talon are played out with the computer's built-in strategy; deals
+with a closed talon are solved exactly.
+"""
+
+import random
+from collections import namedtuple
+from time import perf_counter
+
+from schnapsen_belief import BeliefState, unrank_hand
+from schnapsen_cards import (
+    SUIT, BIT, TRICKS, FULL_DECK, BINOMIAL, cards_of, couples_of,
+    legal_cards, trump_jack,
+)
+from schnapsen_classes import computer_lead, computer_response
+from schnapsen_engine import game_points
+from schnapsen_solver import EndgameSolver, SolverStrategy
+
+
+# What the player to move knows about a position.
+Position = namedtuple(
+    "Position",
+    [
+        "hand",             # The player's hand.
+        "unseen",           # Cards in the opponent's hand or the talon.
+        "known",            # Cards known to be in the opponent's hand.
+        "void",             # Unseen cards the opponent cannot hold.
+        "opponent_size",    # Number of cards in the opponent's hand.
+        "trump_card",       # Bottom card of the talon, or None.
+        "trump_suit",
+        "closed",
+        "points",           # Points of the player and the opponent.
+        "pending",          # Marriage points not counted yet.
+        "lead",             # The opponent's lead, or None.
+    ]
+)
+
+# Each worker process keeps its own solver.
+_solver = None
+
+
+def _get_solver():
+    """Return the endgame solver of this process."""
+    global _solver
+    if _solver is None:
+        _solver = EndgameSolver()
+    return _solver
+
+
+def play_out(hands, points, pending, stock, closed, leader, trump_suit,
+             rng, first=None, lead=None):
+    """Play a fully known position to the end with the computer's strategy.
+
+    first, if given, is the card the player to move plays next. lead, if
+    given, has already been played by the leader. Return the game points
+    seat 0 wins, or minus the game points it loses.
+    """
+    while True:
+        follower = 1 - leader
+        if lead is None:
+            hand = hands[leader]
+            if first is not None:
+                lead, first = first, None
+                marry = couples_of(hand) & BIT[lead]
+            else:
+                jack = trump_jack(trump_suit)
+                if not closed and hand & BIT[jack]:
+                    hand ^= BIT[jack] | BIT[stock[0]]
+                    stock[0] = jack
+                lead, marry = computer_lead(hand, trump_suit, rng)
+            hands[leader] = hand ^ BIT[lead]
+            if marry:
+                marriage = 40 if SUIT[lead] == trump_suit else 20
+                if points[leader]:
+                    points[leader] += marriage
+                    if points[leader] >= 66:
+                        score = game_points(points[follower])
+                        return score if leader == 0 else -score
+                else:
+                    pending[leader] += marriage
+
+        if first is not None:
+            response, first = first, None
+        else:
+            response = computer_response(
+                hands[follower], lead, trump_suit, closed
+            )
+        hands[follower] ^= BIT[response]
+
+        # Decide who takes the trick.
+        trick = TRICKS[(trump_suit * 20 + lead) * 20 + response]
+        taker = follower if trick & 1 else leader
+        points[taker] += (trick >> 1) + pending[taker]
+        pending[taker] = 0
+        if points[taker] >= 66 or not hands[taker]:
+            score = game_points(points[1 - taker])
+            return score if taker == 0 else -score
+
+        # Both players draw cards.
+        leader, lead = taker, None
+        if not closed:
+            hands[leader] |= BIT[stock.pop()]
+            hands[1 - leader] |= BIT[stock.pop()]
+            closed = not stock
+
+
+def get_position(player, opponent, game, lead):
+    """Return what a player knows about the current position."""
+    known = player.hand | game.played | BIT[game.trump_card]
+    if lead is not None:
+        known |= BIT[lead]
+    opponent_size = player.hand.bit_count()
+    if lead is not None:
+        opponent_size -= 1
+    return Position(
+        player.hand, FULL_DECK & ~known, 0, 0, opponent_size,
+        game.trump_card, game.trump_suit, game.closed,
+        (player.points, opponent.points),
+        (player.marriage_points, opponent.marriage_points),
+        lead,
+    )
+
+
+def belief_position(belief, player, opponent, game, lead):
+    """Return what a player knows about the current position, as its
+    BeliefState has followed the round."""
+    return Position(
+        player.hand, belief.unseen, belief.known, belief.void,
+        belief.opponent_size, belief.trump_card, game.trump_suit,
+        game.closed, (player.points, opponent.points),
+        (player.marriage_points, opponent.marriage_points), lead,
+    )
+
+
+def evaluate_candidates(position, candidates, budget, seed,
+                        max_samples=None, solve_closed=True):
+    """Sample deals for a while and score each candidate card in them.
+
+    Sampling stops when the budget in seconds is used up or, if given,
+    after max_samples deals. Deals with a closed talon are solved unless
+    solve_closed is false; then they are played out like open ones.
+    Return the summed results of the candidates and the number of deals.
+    """
+    rng = random.Random(seed)
+    solver = _get_solver()
+    deadline = perf_counter() + budget
+    # The opponent holds the known cards and size of the free ones.
+    free = cards_of(position.unseen & ~position.void)
+    size = position.opponent_size - position.known.bit_count()
+    hands = BINOMIAL[len(free)][size]
+    totals = [0] * len(candidates)
+    hand = position.hand
+    my_points, opponent_points = position.points
+    my_pending, opponent_pending = position.pending
+    trump_suit, lead = position.trump_suit, position.lead
+    samples = 0
+
+    while True:
+        opponent_hand = unrank_hand(
+            rng.randrange(hands), free, size, position.known
+        )
+        stock = cards_of(position.unseen & ~opponent_hand)
+        rng.shuffle(stock)
+        if position.trump_card is not None:
+            stock.insert(0, position.trump_card)
+
+        for index, card in enumerate(candidates):
+            if not solve_closed:
+                value = play_out(
+                    [hand, opponent_hand],
+                    [my_points, opponent_points],
+                    [my_pending, opponent_pending],
+                    list(stock), position.closed, 0 if lead is None else 1,
+                    trump_suit, rng, first=card, lead=lead,
+                )
+            elif position.closed and lead is None:
+                value = solver.lead_value(
+                    card, hand, opponent_hand, trump_suit,
+                    my_points, opponent_points, my_pending, opponent_pending,
+                )
+            elif position.closed:
+                value = solver.response_value(
+                    card, lead, hand, opponent_hand, trump_suit,
+                    my_points, opponent_points, my_pending, opponent_pending,
+                )
+            else:
+                value = play_out(
+                    [hand, opponent_hand],
+                    [my_points, opponent_points],
+                    [my_pending, opponent_pending],
+                    list(stock), False, 0 if lead is None else 1,
+                    trump_suit, rng, first=card, lead=lead,
+                )
+            totals[index] += value
+        samples += 1
+        if samples == max_samples or perf_counter() >= deadline:
+            return totals, samples
+
+
+class MonteCarloStrategy(SolverStrategy):
+    """Choose cards by sampling the unseen cards within a time budget.
+
+    budget is the time per move in seconds. If an executor is given, the
+    deals are spread over that many workers of it. In rounds played by
+    play_round, the strategy keeps a BeliefState of its seat.
+    """
+
+    def __init__(self, budget=0.05, seed=None, executor=None, workers=1):
+        """Initialize attributes."""
+        super().__init__()
+        self.budget = budget
+        self.rng = random.Random(seed)
+        self.executor = executor
+        self.workers = workers
+        self.samples = 0
+        self.beliefs = []
+
+    def round_observer(self, seat, player):
+        """Return a BeliefState that follows the round for seat."""
+        # A strategy may play both seats of a round.
+        self.beliefs = [
+            belief for belief in self.beliefs if belief.seat != seat
+        ][-1:]
+        belief = BeliefState(seat, player)
+        self.beliefs.append(belief)
+        return belief
+
+    def choose_card(self, player, opponent, game, trick):
+        """Return the card to play and whether to marry."""
+        # With an empty talon, both hands are known.
+        if not game.stock:
+            return super().choose_card(player, opponent, game, trick)
+
+        lead = trick[0][0] if trick else None
+        if lead is not None and game.closed:
+            candidates = cards_of(
+                legal_cards(player.hand, lead, game.trump_suit, True)
+            )
+        else:
+            candidates = cards_of(player.hand)
+
+        if len(candidates) > 1:
+            position = self.get_position(player, opponent, game, lead)
+            totals = self.evaluate(position, candidates)
+            card = candidates[totals.index(max(totals))]
+        else:
+            card = candidates[0]
+        marry = lead is None and bool(player.get_couples() & BIT[card])
+        return card, marry
+
+    def get_position(self, player, opponent, game, lead):
+        """Return what the player knows about the current position, from
+        its belief if one follows the round."""
+        for belief in self.beliefs:
+            if belief.follows(player):
+                return belief_position(belief, player, opponent, game, lead)
+        return get_position(player, opponent, game, lead)
+
+    def evaluate(self, position, candidates):
+        """Return the summed results of the candidates."""
+        if self.executor is None:
+            totals, samples = evaluate_candidates(
+                position, candidates, self.budget, self.rng.getrandbits(64)
+            )
+            self.samples += samples
+            return totals
+
+        futures = [
+            self.executor.submit(
+                evaluate_candidates, position, candidates, self.budget,
+                self.rng.getrandbits(64),
+            )
+            for dummy in range(self.workers)
+        ]
+        totals = [0] * len(candidates)
+        for future in futures:
+            worker_totals, samples = future.result()
+            self.samples += samples
+            for index, value in enumerate(worker_totals):
+                totals[index] += value
+        return totals
+
+
+if __name__ == "__main__":
+    print("This module is meant to be imported by the main module.")
@@ -0,0 +1,317 @@
+"""Compact binary records of played rounds.
+
+A record file starts with a header that names the strategies in it,
+followed by one record per round, appended one after another:
+
+    1 byte   number of moves
+    1 byte   winner * 4 + game points
+    1 byte   strategy of seat 0 * 16 + strategy of seat 1
+    8 bytes  order of the deck before dealing, as a permutation index
+    n bytes  one byte per move
+
+A move is a card (0 to 19), a card that declares a marriage (MARRIAGE
+plus the card), an exchange of the trump Jack (EXCHANGE) or closing
+the talon (CLOSE). Seat 0 leads the first trick.
+
+Next to each record file, an index file with the suffix ".idx" holds the
+offset of every record as an unsigned 64-bit integer, so records can be
+read by number.
+"""
+
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+from schnapsen_classes import SchnapsenPlayer
+from schnapsen_engine import ObserverGroup, RoundObserver, deal, play_round
+
+
+HEADER = b"SCHN\x01"
+INDEX_SUFFIX = ".idx"
+
+# Moves other than plain cards.
+MARRIAGE = 0x20
+EXCHANGE = 0x40
+CLOSE = 0x41
+
+_record_header = struct.Struct(">BBBQ")
+_offset = struct.Struct("<Q")
+
+GameRecord = namedtuple(
+    "GameRecord", ["deck", "moves", "winner", "game_points", "seats"]
+)
+
+
+def encode_deck(deck):
+    """Return the permutation index of a deck of 20 cards."""
+    cards = list(range(20))
+    code = 0
+    for card in deck:
+        position = cards.index(card)
+        code = code * len(cards) + position
+        del cards[position]
+    return code
+
+
+def decode_deck(code):
+    """Return the deck of 20 cards with a permutation index."""
+    positions = []
+    for radix in range(1, 21):
+        code, position = divmod(code, radix)
+        positions.append(position)
+    cards = list(range(20))
+    return tuple(cards.pop(position) for position in reversed(positions))
+
+
+def encode_record(deck, moves, winner, game_points, seats=(0, 0)):
+    """Return the bytes of a record.
+
+    seats are the numbers of the strategies in the file header that
+    played seat 0 and seat 1.
+    """
+    header = _record_header.pack(
+        len(moves), winner * 4 + game_points, seats[0] * 16 + seats[1],
+        encode_deck(deck),
+    )
+    return header + bytes(moves)
+
+
+class RecordingObserver(RoundObserver):
+    """Collect the moves of a round for a record."""
+
+    def __init__(self):
+        """Initialize attributes."""
+        self.moves = bytearray()
+        self.result = None
+
+    def on_action(self, seat, exchange, close):
+        """Record an exchange of the trump Jack and/or closing."""
+        if exchange:
+            self.moves.append(EXCHANGE)
+        if close:
+            self.moves.append(CLOSE)
+
+    def on_card(self, seat, card, marriage_points):
+        """Record a card."""
+        self.moves.append(card | MARRIAGE if marriage_points else card)
+
+    def on_round_end(self, result):
+        """Keep the result."""
+        self.result = result
+
+
+def record_round(strategies, seats=(0, 0), deck=None, observer=None,
+                 rng=None):
+    """Play a round between two strategies. Return its result and record.
+
+    If an observer is given, it is told everything that happens, too.
+    """
+    players = [SchnapsenPlayer("0"), SchnapsenPlayer("1")]
+    game = deal(players, deck, rng)
+    recorder = RecordingObserver()
+    if observer:
+        observer = ObserverGroup(recorder, observer)
+    else:
+        observer = recorder
+    result = play_round(game, players, strategies, observer)
+    record = encode_record(
+        game.deck, recorder.moves, result.winner, result.game_points, seats
+    )
+    return result, record
+
+
+class ReplayStrategy():
+    """Make the moves of a record, for both players."""
+
+    def __init__(self, moves):
+        """Initialize attributes."""
+        self.moves = moves
+        self.next = 0
+
+    def choose_action(self, player, opponent, game):
+        """Repeat a recorded exchange and/or closing."""
+        exchange = self._take(EXCHANGE)
+        close = self._take(CLOSE)
+        return exchange, close
+
+    def choose_card(self, player, opponent, game, trick):
+        """Repeat a recorded card."""
+        move = self.moves[self.next]
+        self.next += 1
+        return move & ~MARRIAGE, bool(move & MARRIAGE)
+
+    def _take(self, action):
+        """Skip the next move if it is the action. Return True if so."""
+        if self.next < len(self.moves) and self.moves[self.next] == action:
+            self.next += 1
+            return True
+        return False
+
+
+def replay(record, observer=None):
+    """Play a recorded round through the engine. Return its result."""
+    players = [SchnapsenPlayer("0"), SchnapsenPlayer("1")]
+    game = deal(players, record.deck)
+    strategy = ReplayStrategy(record.moves)
+    return play_round(game, players, [strategy, strategy], observer)
+
+
+def _game_record(result, seats, code, moves):
+    """Return the GameRecord of the fields of a record."""
+    return GameRecord(
+        decode_deck(code), moves, result >> 2, result & 3,
+        (seats >> 4, seats & 15),
+    )
+
+
+def _encode_names(names):
+    """Return the file header naming the strategies."""
+    header = bytearray(HEADER)
+    header.append(len(names))
+    for name in names:
+        encoded = name.encode()
+        header.append(len(encoded))
+        header += encoded
+    return bytes(header)
+
+
+class RecordWriter():
+    """Append records to a record file and its index.
+
+    strategies names the strategies whose numbers the records use. A new
+    file is created with them; an existing file must have the same.
+    """
+
+    def __init__(self, path, strategies=("computer",)):
+        """Open the files for appending."""
+        header = _encode_names(strategies)
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as existing:
+                if existing.read(len(header)) != header:
+                    raise ValueError(
+                        f"{path} records other strategies than {strategies}"
+                    )
+        self.file = open(path, "ab")
+        self.index = open(path + INDEX_SUFFIX, "ab")
+        if self.file.tell() == 0:
+            self.file.write(header)
+
+    def write(self, deck, moves, winner, game_points, seats=(0, 0)):
+        """Append a record."""
+        self.write_encoded(
+            encode_record(deck, moves, winner, game_points, seats)
+        )
+
+    def write_encoded(self, record):
+        """Append a record that has already been encoded."""
+        self.index.write(_offset.pack(self.file.tell()))
+        self.file.write(record)
+
+    def close(self):
+        """Close the files."""
+        self.file.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class RecordReader():
+    """Read records from a record file, in order or by number."""
+
+    def __init__(self, path):
+        """Open the record file and map its index, if there is one."""
+        self.file = open(path, "rb")
+        if self.file.read(len(HEADER)) != HEADER:
+            self.file.close()
+            raise ValueError(f"{path} is not a record file")
+        self.strategies = []
+        for dummy in range(self.file.read(1)[0]):
+            length = self.file.read(1)[0]
+            self.strategies.append(self.file.read(length).decode())
+        self.start = self.file.tell()
+        self.index = None
+        index_path = path + INDEX_SUFFIX
+        if os.path.exists(index_path) and os.path.getsize(index_path):
+            with open(index_path, "rb") as index_file:
+                self.index = mmap.mmap(
+                    index_file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+
+    def __iter__(self):
+        """Yield the records from the start of the file."""
+        self.file.seek(self.start)
+        while True:
+            record = self._read()
+            if record is None:
+                return
+            yield record
+
+    def __len__(self):
+        """Return the number of indexed records."""
+        if self.index is None:
+            return 0
+        return len(self.index) // _offset.size
+
+    def __getitem__(self, number):
+        """Return a record by its number."""
+        if not 0 <= number < len(self):
+            raise IndexError("record number out of range")
+        (offset,) = _offset.unpack_from(self.index, number * _offset.size)
+        self.file.seek(offset)
+        return self._read()
+
+    def read_range(self, start, stop):
+        """Return the records numbered start to stop - 1, read in one go.
+        """
+        if not 0 <= start <= stop <= len(self):
+            raise IndexError("record numbers out of range")
+        if start == stop:
+            return []
+        (offset,) = _offset.unpack_from(self.index, start * _offset.size)
+        if stop < len(self):
+            (end,) = _offset.unpack_from(self.index, stop * _offset.size)
+            self.file.seek(offset)
+            data = self.file.read(end - offset)
+        else:
+            self.file.seek(offset)
+            data = self.file.read()
+        records = []
+        position = 0
+        for dummy in range(stop - start):
+            count, result, seats, code = _record_header.unpack_from(
+                data, position
+            )
+            position += _record_header.size
+            moves = data[position:position + count]
+            records.append(_game_record(result, seats, code, moves))
+            position += count
+        return records
+
+    def _read(self):
+        """Read the record at the current position, or return None."""
+        header = self.file.read(_record_header.size)
+        if len(header) < _record_header.size:
+            return None
+        count, result, seats, code = _record_header.unpack(header)
+        return _game_record(result, seats, code, self.file.read(count))
+
+    def close(self):
+        """Close the files."""
+        if self.index is not None:
+            self.index.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    print("This module is meant to be imported by the main module.")
@@ -0,0 +1,575 @@
+#!/usr/bin/env python3
+"""Host many games of Schnapsen over TCP.
+
+Players connect with a line-based client such as telnet or netcat,
+choose their language, enter their name and choose an opponent: a
+computer strategy, or "human" to play against the next player who
+chooses "human", too. Every game is a coroutine that drives the engine
+one decision at a time, so waiting for a player costs no thread. Moves
+of computer strategies that search are computed in a pool of worker
+processes, and the baseline strategy moves instead if they take longer
+than the deadline. The times the computer strategies take are kept, and
+the server shows their percentiles when it stops or receives SIGUSR1.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter_ns
+
+from schnapsen_cards import SUIT, BIT, cards_of, legal_cards, trump_jack
+from schnapsen_classes import SchnapsenPlayer, card_name, suit_name
+from schnapsen_engine import RoundObserver, deal, round_turns
+from schnapsen_events import TimingCollector
+from schnapsen_locale import DEFAULT_LANGUAGE, languages, translate
+from schnapsen_strategies import (
+    BASELINE, STRATEGIES, create_strategy, load_plugins,
+)
+
+
+# Strategies that are cheap enough to run in the event loop.
+LIGHT_STRATEGIES = ("computer", "table")
+# The longest line a player may send, in bytes. Small buffers keep the
+# memory of each connection low.
+LINE_LIMIT = 1024
+
+# Strategies of this process, by name.
+_strategies = {}
+
+
+def computer_move(name, player, opponent, game, trick):
+    """Return the move of a computer strategy.
+
+    trick is None for the choice of an action. This is run in the worker
+    processes, which keep their own strategies.
+    """
+    if name not in _strategies:
+        _strategies[name] = create_strategy(name)
+    strategy = _strategies[name]
+    if trick is None:
+        return strategy.choose_action(player, opponent, game)
+    return strategy.choose_card(player, opponent, game, trick)
+
+
+class Connection():
+    """The connection of a human player, who reads the game in a language
+    of its own."""
+
+    __slots__ = ("reader", "writer", "timeout", "language")
+
+    def __init__(self, reader, writer, timeout, language=DEFAULT_LANGUAGE):
+        """Initialize attributes."""
+        self.reader = reader
+        self.writer = writer
+        self.timeout = timeout
+        self.language = language
+
+    def gettext(self, message):
+        """Return a message in the player's language."""
+        return translate(message, self.language)
+
+    def card_name(self, card):
+        """Return the name of a card in the player's language."""
+        return card_name(card, self.language)
+
+    def suit_name(self, suit):
+        """Return the name of a suit in the player's language."""
+        return suit_name(suit, self.language)
+
+    def send(self, line=""):
+        """Send a line. It is buffered until the next question."""
+        self.writer.write(f"{line}\r\n".encode())
+
+    async def ask(self, prompt):
+        """Send a prompt and return the answer, stripped.
+
+        Raise ConnectionError if the player has left and TimeoutError if
+        the player does not answer in time. A line longer than LINE_LIMIT
+        is discarded and the prompt sent again.
+        """
+        while True:
+            self.writer.write(prompt.encode())
+            await self.writer.drain()
+            try:
+                line = await asyncio.wait_for(
+                    self.reader.readline(), self.timeout
+                )
+                break
+            except ValueError:
+                pass
+        if not line:
+            raise ConnectionError("the player has left")
+        return line.decode(errors="replace").strip()
+
+    async def until_closed(self):
+        """Ignore what the player sends until the connection is closed."""
+        while True:
+            try:
+                if not await self.reader.readline():
+                    return
+            except ValueError:
+                # A line longer than the limit was discarded.
+                pass
+            except ConnectionError:
+                return
+
+    async def close(self):
+        """Send what is buffered and close the connection."""
+        try:
+            await self.writer.drain()
+            self.writer.close()
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class SessionObserver(RoundObserver):
+    """Tell the human players of a game what happens, each in its own
+    language."""
+
+    def __init__(self, game, players, connections):
+        """Initialize attributes."""
+        self.game = game
+        self.players = players
+        self.connections = connections
+
+    def humans(self):
+        """Yield the seats and connections of the human players."""
+        for seat, connection in enumerate(self.connections):
+            if connection:
+                yield seat, connection
+
+    def on_deal(self, game):
+        for seat, connection in self.humans():
+            _ = connection.gettext
+            connection.send(_("The cards are shuffled.") + " " + _(
+                "Trump card: {}"
+            ).format(connection.card_name(game.trump_card)))
+            for card in cards_of(self.players[seat].hand):
+                connection.send(
+                    _("You draw a card: {}").format(connection.card_name(card))
+                )
+
+    def on_action(self, seat, exchange, close):
+        for dummy, connection in self.humans():
+            _ = connection.gettext
+            if exchange:
+                connection.send(_("The trump Jack was replaced."))
+                connection.send(_("New trump card: {}").format(
+                    connection.card_name(self.game.trump_card)
+                ))
+            if close:
+                connection.send(_(
+                    "The talon is closed. Players can't draw any more cards."
+                ))
+
+    def on_card(self, seat, card, marriage_points):
+        name = self.players[seat].name
+        for index, connection in self.humans():
+            _ = connection.gettext
+            if marriage_points:
+                suit = connection.suit_name(SUIT[card])
+                connection.send(
+                    _("You marry the couple of {}").format(suit)
+                    if index == seat else
+                    _("{computer} marries the couple of {suit}").format(
+                        computer=name, suit=suit
+                    )
+                )
+            card_text = connection.card_name(card)
+            connection.send(
+                "> " + _("You play the {}.").format(card_text)
+                if index == seat else
+                "> " + _("{} plays the {}.").format(name, card_text)
+            )
+
+    def on_trick(self, taker, trick, marriage_points):
+        player = self.players[taker]
+        for index, connection in self.humans():
+            _ = connection.gettext
+            if index == taker:
+                connection.send(_("You take this trick."))
+                connection.send(_("Your points:") + f" {player.points} / 66")
+            else:
+                connection.send(
+                    _("{} takes this trick.").format(player.name)
+                )
+                connection.send(
+                    _("{}'s points:").format(player.name)
+                    + f" {player.points} / 66"
+                )
+
+    def on_draw(self, seat, card):
+        for index, connection in self.humans():
+            _ = connection.gettext
+            connection.send(
+                _("You draw a card: {}").format(connection.card_name(card))
+                if index == seat else
+                _("{} draws a card.").format(self.players[seat].name)
+            )
+            if not self.game.stock:
+                connection.send(_("The last card has been drawn!"))
+
+    def on_round_end(self, result):
+        name = self.players[result.winner].name
+        for index, connection in self.humans():
+            _ = connection.gettext
+            if result.reason == "last trick":
+                connection.send(_("We've run out of cards."))
+            connection.send(
+                _("You WIN this round!") if index == result.winner
+                else _("{} WINS this round!").format(name)
+            )
+
+
+async def ask_action(connection, player, game):
+    """Ask a human player whether to exchange the trump Jack and/or
+    close the talon."""
+    _ = connection.gettext
+    exchange = False
+    choices = [_("Close the talon")]
+    jack = trump_jack(game.trump_suit)
+    if player.hand & BIT[jack]:
+        choices.append(_("Exchange your {} for the {}").format(
+            connection.card_name(jack), connection.card_name(game.trump_card)
+        ))
+    connection.send()
+    connection.send(_("It's your turn.") + " " + _(
+        "Do you want to perform an action?"
+    ))
+    while True:
+        for number, choice in enumerate(choices, 1):
+            connection.send(f"{number} - {choice}")
+        answer = await connection.ask(
+            _("Choose an action or press Enter to continue: ")
+        )
+        if answer == "1":
+            return exchange, True
+        elif answer == "2" and len(choices) > 1:
+            exchange = True
+            choices.pop()
+            connection.send(_("Okay, do you want to perform another action?"))
+        elif answer == "":
+            return exchange, False
+
+
+async def ask_card(connection, player, game, trick):
+    """Ask a human player for a card. Return it and whether to marry."""
+    _ = connection.gettext
+    cards = cards_of(player.hand)
+    cards.reverse()
+    couples = player.get_couples() if not trick else 0
+    lead = trick[0][0] if trick else None
+    legal = legal_cards(player.hand, lead, game.trump_suit, game.closed)
+
+    def show(cards):
+        connection.send()
+        for number, card in enumerate(cards, 1):
+            trump = "*" if SUIT[card] == game.trump_suit else ""
+            connection.send(f"{number} - {connection.card_name(card)}{trump}")
+
+    show(cards)
+    if couples:
+        connection.send(_("M - Marriage"))
+    if trick and game.closed:
+        connection.send(
+            _("You have to match suit and take the trick if you can.")
+        )
+    while True:
+        answer = await connection.ask(_("Your choice: "))
+        if answer.isdigit() and int(answer) in range(1, len(cards) + 1):
+            card = cards[int(answer) - 1]
+            if legal & BIT[card]:
+                return card, False
+            connection.send(
+                _("You have to match suit and take the trick if you can.")
+            )
+        elif answer.upper() == _("M") and couples:
+            couple_cards = cards_of(couples)
+            show(couple_cards)
+            while True:
+                answer = await connection.ask(_("Choose a card: "))
+                if (
+                    answer.isdigit()
+                    and int(answer) in range(1, len(couple_cards) + 1)
+                ):
+                    return couple_cards[int(answer) - 1], True
+        else:
+            connection.send(_("Choose one of the options above."))
+
+
+class SchnapsenServer():
+    """Pair up connections and play their games.
+
+    executor computes the moves of computer strategies that search.
+    timeout is the number of seconds a player may take to answer, and
+    deadline the number of seconds a strategy in the executor may take
+    to decide. Every player chooses a language, language by default.
+    """
+
+    def __init__(self, executor, timeout=600, deadline=None,
+                 language=DEFAULT_LANGUAGE):
+        """Initialize attributes."""
+        self.executor = executor
+        self.timeout = timeout
+        self.deadline = deadline
+        self.language = language
+        self.languages = languages()
+        self.waiting = None
+        self.games = 0
+        self.timings = TimingCollector()
+
+    async def handle(self, reader, writer):
+        """Serve a new connection until its game is over."""
+        connection = Connection(reader, writer, self.timeout, self.language)
+        _ = connection.gettext
+        try:
+            connection.send("SCHNAPSEN")
+            if len(self.languages) > 1:
+                language = ""
+                while language not in self.languages:
+                    language = await connection.ask(
+                        _("Language ({}): ").format(", ".join(self.languages))
+                    ) or self.language
+                connection.language = language
+            name = await connection.ask(_("Your name: ")) or _("Player")
+            opponent = ""
+            while opponent not in STRATEGIES and opponent != "human":
+                choices = ", ".join([*sorted(STRATEGIES), "human"])
+                opponent = await connection.ask(
+                    _("Opponent ({}): ").format(choices)
+                ) or "computer"
+            if opponent != "human":
+                await self.play_game(
+                    [connection, None], [name, _("Computer")], opponent
+                )
+            else:
+                waiting = await self.take_waiting()
+                if waiting is None:
+                    await self.wait_for_opponent(connection, name)
+                    return
+                first, first_name, done = waiting
+                try:
+                    await self.play_game(
+                        [first, connection], [first_name, name]
+                    )
+                finally:
+                    done.set_result(None)
+                    await first.close()
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+        await connection.close()
+
+    async def take_waiting(self):
+        """Return the connection, name and done future of the waiting
+        player, who is waiting no more, or None if nobody is waiting.
+
+        Players who have left are closed and skipped.
+        """
+        while self.waiting:
+            first, first_name, done, watch = self.waiting
+            self.waiting = None
+            # Stop watching the connection before its player is asked.
+            watch.cancel()
+            await asyncio.wait([watch])
+            if watch.cancelled():
+                return first, first_name, done
+            done.set_result(None)
+            await first.close()
+        return None
+
+    async def wait_for_opponent(self, connection, name):
+        """Wait until another player has joined and the game is over.
+
+        A player who leaves or whom nobody joins in time stops waiting.
+        """
+        _ = connection.gettext
+        done = asyncio.get_running_loop().create_future()
+        watch = asyncio.ensure_future(connection.until_closed())
+        self.waiting = (connection, name, done, watch)
+        connection.send(_("Waiting for another player..."))
+        await asyncio.wait(
+            [done, watch], timeout=self.timeout,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        if self.waiting and self.waiting[0] is connection:
+            self.waiting = None
+            if not watch.done():
+                watch.cancel()
+                connection.send(_("No other player has come."))
+            await connection.close()
+            return
+        await done
+
+    async def move(self, seat, connections, players, game, trick, opponent):
+        """Return the move of the player at seat."""
+        player, other = players[seat], players[1 - seat]
+        connection = connections[seat]
+        if connection is None:
+            start = perf_counter_ns()
+            move = await self.computer_move(
+                opponent, player, other, game, trick
+            )
+            if trick is None:
+                decision = "action"
+            else:
+                decision = "response" if trick else "lead"
+            self.timings.histogram(opponent, decision).add(
+                perf_counter_ns() - start
+            )
+            return move
+        elif trick is None:
+            return await ask_action(connection, player, game)
+        return await ask_card(connection, player, game, trick)
+
+    async def computer_move(self, name, player, opponent, game, trick):
+        """Return the move of a computer strategy, or of the baseline
+        strategy if it misses the deadline."""
+        if name in LIGHT_STRATEGIES:
+            return computer_move(name, player, opponent, game, trick)
+        future = asyncio.get_running_loop().run_in_executor(
+            self.executor, computer_move, name, player, opponent, game, trick,
+        )
+        try:
+            return await asyncio.wait_for(future, self.deadline)
+        except asyncio.TimeoutError:
+            # The worker finishes the late move, which is discarded.
+            self.timings.counters[f"{name} timeouts"] += 1
+            return computer_move(BASELINE, player, opponent, game, trick)
+
+    def show_timings(self):
+        """Print the times the computer strategies took to decide."""
+        if self.timings.histograms:
+            for line in self.timings.report():
+                print(line)
+
+    async def play_game(self, connections, names, opponent=None):
+        """Play rounds until the human players stop or one of them leaves.
+
+        connections[i] is None for the computer player, whose strategy is
+        named by opponent.
+        """
+        self.games += 1
+        players = [SchnapsenPlayer(name) for name in names]
+        try:
+            while True:
+                game = deal(players)
+                observer = SessionObserver(game, players, connections)
+                turns = round_turns(game, players, observer)
+                move = None
+                try:
+                    while True:
+                        seat, decision, trick = turns.send(move)
+                        move = await self.move(
+                            seat, connections, players, game, trick, opponent
+                        )
+                except StopIteration as stop:
+                    result = stop.value
+
+                players[result.winner].score += result.game_points
+                for connection in connections:
+                    if connection:
+                        _ = connection.gettext
+                        connection.send()
+                        connection.send(_("TOTAL SCORE"))
+                        for player in players:
+                            connection.send(f"{player.name}: {player.score}")
+
+                for connection in connections:
+                    if connection:
+                        _ = connection.gettext
+                        answer = ""
+                        while answer not in (_("y"), _("n")):
+                            answer = await connection.ask(
+                                _("Start a new game? (y/n) ")
+                            )
+                            answer = answer.lower()
+                        if answer == _("n"):
+                            return
+
+                # The winner begins the next round.
+                if result.winner:
+                    players.reverse()
+                    connections.reverse()
+                for player in players:
+                    player.points, player.marriage_points = 0, 0
+                    player.hand = 0
+        except (ConnectionError, asyncio.TimeoutError):
+            for connection in connections:
+                if connection:
+                    connection.send(connection.gettext(
+                        "The game is over, a player has left."
+                    ))
+        finally:
+            self.games -= 1
+
+
+async def serve(host, port, workers=None, timeout=600, deadline=None,
+                plugins=None, language=DEFAULT_LANGUAGE):
+    """Run the server until it is cancelled or terminated."""
+    # Spawned workers do not inherit the listening socket, nor the
+    # strategies of plug-ins.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        workers, context, initializer=load_plugins, initargs=(plugins,)
+    ) as executor:
+        server = SchnapsenServer(executor, timeout, deadline, language)
+        tcp_server = await asyncio.start_server(
+            server.handle, host, port, limit=LINE_LIMIT
+        )
+        async with tcp_server:
+            loop = asyncio.get_running_loop()
+            try:
+                loop.add_signal_handler(signal.SIGTERM, tcp_server.close)
+                loop.add_signal_handler(signal.SIGUSR1, server.show_timings)
+            except (NotImplementedError, AttributeError):
+                pass
+            try:
+                await tcp_server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+            server.show_timings()
+
+
+def main():
+    """Parse the command line and run the server."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=6666)
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None,
+        help="processes for searching strategies (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "-t", "--timeout", type=float, default=600,
+        help="seconds a player may take to answer (default: 600)",
+    )
+    parser.add_argument(
+        "-d", "--deadline", type=float, default=5,
+        help="seconds a searching strategy may take to decide before the "
+             "baseline strategy moves instead (default: 5)",
+    )
+    parser.add_argument(
+        "--plugin", action="append", metavar="MODULE",
+        help="import a module that registers strategies (repeatable)",
+    )
+    parser.add_argument(
+        "-l", "--language", default=DEFAULT_LANGUAGE,
+        help="language offered to the players first (default: en)",
+    )
+    args = parser.parse_args()
+
+    load_plugins(args.plugin)
+    try:
+        asyncio.run(serve(
+            args.host, args.port, args.workers, args.timeout, args.deadline,
+            args.plugin, args.language,
+        ))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
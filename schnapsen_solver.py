@@ -0,0 +1,356 @@
+"""Exact solver for Schnapsen endgames.
+
+Once the talon is closed or exhausted, players must follow suit and take
+the trick if they can, and once the last card has been drawn both hands
+are known. The solver searches these positions to the end with alpha-beta
+pruning and a transposition table.
+
+Values are the game points (1 to 3) the leader of the current trick wins,
+or minus the game points the leader loses.
+"""
+
+from schnapsen_cards import (
+    SUIT, POINTS, BIT, TRICKS, RESPONSES, FULL_DECK, cards_of, couples_of,
+    legal_cards,
+)
+from schnapsen_cache import (
+    canonical_suits, inverse, permute_card, permute_mask,
+)
+from schnapsen_engine import ComputerStrategy, game_points
+
+
+# Bounds stored in the transposition table.
+EXACT, LOWER_BOUND, UPPER_BOUND = range(3)
+
+INFINITY = 4
+
+
+def order_leads(hand):
+    """Return the cards of a hand in the order the leader tries them.
+
+    Marriages first, then high cards before low cards.
+    """
+    couples = couples_of(hand)
+    return sorted(
+        cards_of(hand),
+        key=lambda card: (not couples & BIT[card], -POINTS[card]),
+    )
+
+
+class EndgameSolver():
+    """Solve endgames with a closed talon exactly."""
+
+    def __init__(self, max_entries=1_000_000):
+        """Initialize attributes."""
+        self.table = {}
+        self.max_entries = max_entries
+        self.nodes = 0
+
+    def clear(self):
+        """Empty the transposition table."""
+        self.table.clear()
+
+    def solve(self, leader_hand, follower_hand, trump_suit,
+              leader_points=0, follower_points=0,
+              leader_pending=0, follower_pending=0):
+        """Return the value of a position for the leader."""
+        return self._search(
+            leader_hand, follower_hand, leader_points, follower_points,
+            leader_pending, follower_pending, trump_suit,
+            -INFINITY, INFINITY,
+        )
+
+    def best_lead(self, leader_hand, follower_hand, trump_suit,
+                  leader_points=0, follower_points=0,
+                  leader_pending=0, follower_pending=0):
+        """Return the best card to lead and its value for the leader."""
+        best_card, best_value = None, -INFINITY
+        for card in order_leads(leader_hand):
+            value = self._lead_value(
+                card, leader_hand, follower_hand,
+                leader_points, follower_points,
+                leader_pending, follower_pending, trump_suit,
+                best_value, INFINITY,
+            )
+            if value > best_value:
+                best_card, best_value = card, value
+        return best_card, best_value
+
+    def best_response(self, lead, follower_hand, leader_hand, trump_suit,
+                      follower_points=0, leader_points=0,
+                      follower_pending=0, leader_pending=0):
+        """Return the best answer to a lead and its value for the follower.
+
+        leader_hand no longer holds the lead, and leader_points already
+        include a marriage declared with it.
+        """
+        best_card, best_value = None, -INFINITY
+        responses = legal_cards(follower_hand, lead, trump_suit, True)
+        for card in cards_of(responses):
+            value = -self._trick_value(
+                lead, card, leader_hand, follower_hand ^ BIT[card],
+                leader_points, follower_points,
+                leader_pending, follower_pending, trump_suit,
+                -INFINITY, -best_value,
+            )
+            if value > best_value:
+                best_card, best_value = card, value
+        return best_card, best_value
+
+    def lead_value(self, card, leader_hand, follower_hand, trump_suit,
+                   leader_points=0, follower_points=0,
+                   leader_pending=0, follower_pending=0):
+        """Return the value of leading a card for the leader."""
+        return self._lead_value(
+            card, leader_hand, follower_hand,
+            leader_points, follower_points,
+            leader_pending, follower_pending, trump_suit,
+            -INFINITY, INFINITY,
+        )
+
+    def response_value(self, card, lead, follower_hand, leader_hand,
+                       trump_suit, follower_points=0, leader_points=0,
+                       follower_pending=0, leader_pending=0):
+        """Return the value of answering a lead for the follower."""
+        return -self._trick_value(
+            lead, card, leader_hand, follower_hand ^ BIT[card],
+            leader_points, follower_points,
+            leader_pending, follower_pending, trump_suit,
+            -INFINITY, INFINITY,
+        )
+
+    def _search(self, leader_hand, follower_hand, leader_points,
+                follower_points, leader_pending, follower_pending,
+                trump_suit, alpha, beta):
+        """Return the value of a position for the leader."""
+        self.nodes += 1
+        key = (
+            leader_hand
+            | follower_hand << 20
+            | leader_points << 40
+            | follower_points << 47
+            | leader_pending // 20 << 54
+            | follower_pending // 20 << 57
+            | trump_suit << 60
+        )
+        entry = self.table.get(key)
+        best_move = None
+        if entry is not None:
+            value, bound, best_move = entry
+            if bound == EXACT:
+                return value
+            if bound == LOWER_BOUND and value >= beta:
+                return value
+            if bound == UPPER_BOUND and value <= alpha:
+                return value
+
+        original_alpha = alpha
+        leads = order_leads(leader_hand)
+        if best_move is not None:
+            leads.remove(best_move)
+            leads.insert(0, best_move)
+
+        best_value = -INFINITY
+        for card in leads:
+            value = self._lead_value(
+                card, leader_hand, follower_hand,
+                leader_points, follower_points,
+                leader_pending, follower_pending, trump_suit,
+                alpha, beta,
+            )
+            if value > best_value:
+                best_value, best_move = value, card
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        if best_value <= original_alpha:
+            bound = UPPER_BOUND
+        elif best_value >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        if len(self.table) >= self.max_entries:
+            self.table.clear()
+        self.table[key] = (best_value, bound, best_move)
+        return best_value
+
+    def _lead_value(self, card, leader_hand, follower_hand,
+                    leader_points, follower_points,
+                    leader_pending, follower_pending, trump_suit,
+                    alpha, beta):
+        """Return the value of a lead for the leader.
+
+        A lead from a couple always declares the marriage.
+        """
+        if couples_of(leader_hand) & BIT[card]:
+            marriage = 40 if SUIT[card] == trump_suit else 20
+            if leader_points:
+                leader_points += marriage
+                if leader_points >= 66:
+                    return game_points(follower_points)
+            else:
+                leader_pending += marriage
+        leader_hand ^= BIT[card]
+
+        # The follower picks the response that is worst for the leader.
+        worst = INFINITY
+        responses = legal_cards(follower_hand, card, trump_suit, True)
+        for response in self._order_responses(card, responses, trump_suit):
+            value = self._trick_value(
+                card, response, leader_hand, follower_hand ^ BIT[response],
+                leader_points, follower_points,
+                leader_pending, follower_pending, trump_suit,
+                alpha, min(beta, worst),
+            )
+            if value < worst:
+                worst = value
+                if worst <= alpha:
+                    break
+        return worst
+
+    @staticmethod
+    def _order_responses(lead, responses, trump_suit):
+        """Return responses that win the trick first, cheapest first."""
+        winning = responses & RESPONSES[trump_suit * 20 + lead][3]
+        cards = cards_of(winning)
+        cards.sort(key=POINTS.__getitem__)
+        losing = cards_of(responses & ~winning)
+        losing.sort(key=POINTS.__getitem__)
+        return cards + losing
+
+    def _trick_value(self, lead, response, leader_hand, follower_hand,
+                     leader_points, follower_points,
+                     leader_pending, follower_pending, trump_suit,
+                     alpha, beta):
+        """Return the value of a completed trick for its leader."""
+        trick = TRICKS[(trump_suit * 20 + lead) * 20 + response]
+        points = trick >> 1
+
+        if not trick & 1:
+            leader_points += points + leader_pending
+            if leader_points >= 66 or not leader_hand:
+                return game_points(follower_points)
+            return self._search(
+                leader_hand, follower_hand, leader_points, follower_points,
+                0, follower_pending, trump_suit, alpha, beta,
+            )
+        follower_points += points + follower_pending
+        if follower_points >= 66 or not follower_hand:
+            return -game_points(leader_points)
+        return -self._search(
+            follower_hand, leader_hand, follower_points, leader_points,
+            0, leader_pending, trump_suit, -beta, -alpha,
+        )
+
+
+class SolverStrategy(ComputerStrategy):
+    """Play the computer's strategy, but solve the endgame exactly.
+
+    As soon as the last card has been drawn, the opponent's hand is
+    known: it holds every card that has neither been played nor is in
+    the player's own hand.
+    """
+
+    def __init__(self, solver=None, cache=None, tablebase=None):
+        """Initialize attributes.
+
+        If a DecisionCache is given, endgame decisions are looked up in
+        it by their canonical positions. If a Tablebase is given, the
+        positions it holds are looked up there instead of being solved.
+        """
+        self.solver = solver or EndgameSolver()
+        self.cache = cache
+        self.tablebase = tablebase
+
+    def choose_card(self, player, opponent, game, trick):
+        """Return the card to play and whether to marry."""
+        if game.stock:
+            return super().choose_card(player, opponent, game, trick)
+
+        lead = trick[0][0] if trick else None
+        opponent_hand = FULL_DECK & ~(player.hand | game.played)
+        if lead is not None:
+            opponent_hand &= ~BIT[lead]
+        position = (
+            player.hand, opponent_hand, lead, game.trump_suit,
+            (player.points, opponent.points),
+            (player.marriage_points, opponent.marriage_points),
+        )
+        card = None
+        if self.tablebase is not None:
+            card = self.table_card(*position)
+        if card is None and self.cache is None:
+            card = self.best_card(*position)
+        elif card is None:
+            card = self.cached_card(*position)
+        if trick:
+            return card, False
+        return card, bool(player.get_couples() & BIT[card])
+
+    def best_card(self, hand, opponent_hand, lead, trump_suit, points,
+                  pending):
+        """Return the best card to lead, or to answer a lead with.
+
+        points and pending are those of the player and the opponent.
+        """
+        if lead is not None:
+            card, dummy = self.solver.best_response(
+                lead, hand, opponent_hand, trump_suit, *points, *pending
+            )
+        else:
+            card, dummy = self.solver.best_lead(
+                hand, opponent_hand, trump_suit, *points, *pending
+            )
+        return card
+
+    def table_card(self, hand, opponent_hand, lead, trump_suit, points,
+                   pending):
+        """Return best_card from the tablebase, or None if the position
+        is not in it."""
+        if pending != (0, 0):
+            return None
+        if lead is not None:
+            found = self.tablebase.best_response(
+                lead, hand, opponent_hand, trump_suit, *points
+            )
+        else:
+            found = self.tablebase.best_lead(
+                hand, opponent_hand, trump_suit, *points
+            )
+        return None if found is None else found[0]
+
+    def cached_card(self, hand, opponent_hand, lead, trump_suit, points,
+                    pending):
+        """Return best_card of the canonical position, through the cache.
+
+        The card is always solved in the canonical position, so the
+        choice between equally good cards does not depend on the cache.
+        """
+        lead_mask = 0 if lead is None else BIT[lead]
+        permutation = canonical_suits(
+            trump_suit, (hand, opponent_hand, lead_mask)
+        )
+        hand = permute_mask(hand, permutation)
+        opponent_hand = permute_mask(opponent_hand, permutation)
+        if lead is not None:
+            lead = permute_card(lead, permutation)
+        # Hands, lead + 1, points and pending marriages in 20-point steps.
+        lead_code = 0 if lead is None else lead + 1
+        key = (
+            hand | opponent_hand << 20 | lead_code << 40
+            | points[0] << 45 | points[1] << 52
+            | pending[0] // 20 << 59 | pending[1] // 20 << 62
+        )
+        card = self.cache.lookup(key)
+        if card is None:
+            card = self.best_card(
+                hand, opponent_hand, lead, 0, points, pending
+            )
+            self.cache.store(key, card)
+        return permute_card(card, inverse(permutation))
+
+
+if __name__ == "__main__":
+    print("This module is meant to be imported by the main module.")
@@ -0,0 +1,199 @@
+"""The state of a round as plain integers, with moves that can be undone.
+
+GameState applies the same rules as the engine, but keeps everything in
+integers, masks and tuples, so its snapshots are immutable tuples that
+cost next to nothing to take and restore. Search-based strategies can
+apply a move, look further and undo it without copying players or games.
+
+Moves are the numbers used in records: a card (0 to 19), a card that
+declares a marriage (MARRIAGE plus the card), EXCHANGE for the trump
+Jack and CLOSE for closing the talon.
+"""
+
+from schnapsen_cards import (
+    SUIT, BIT, TRICKS, cards_of, couples_of, legal_cards, trump_jack,
+)
+from schnapsen_engine import game_points
+from schnapsen_records import MARRIAGE, EXCHANGE, CLOSE
+
+
+class GameState():
+    """A round of Schnapsen with both hands and the talon known.
+
+    hands, points and pending (marriage points not counted yet) are
+    pairs indexed by seat. The talon holds the first stock_size cards of
+    stock, except that its bottom card is trump_card, which may have been
+    exchanged. lead is the card led in the current trick, or None.
+    winner is set once the round is over.
+    """
+
+    __slots__ = (
+        "stock", "trump_suit", "hands", "points", "pending", "stock_size",
+        "trump_card", "closed", "leader", "lead", "played", "winner",
+        "game_points", "history",
+    )
+
+    def __init__(self, deck):
+        """Deal a deck like the engine does. Seat 0 leads."""
+        self.stock = tuple(deck[:10])
+        self.trump_suit = SUIT[deck[0]]
+        self.hands = (
+            sum(BIT[card] for card in deck[15:]),
+            sum(BIT[card] for card in deck[10:15]),
+        )
+        self.points, self.pending = (0, 0), (0, 0)
+        self.stock_size = 10
+        self.trump_card = deck[0]
+        self.closed = False
+        self.leader = 0
+        self.lead = None
+        self.played = 0
+        self.winner, self.game_points = None, 0
+        self.history = []
+
+    @classmethod
+    def from_game(cls, game, players, leader, lead=None):
+        """Return the state of a round played with the engine's objects.
+
+        leader is the seat that leads the current trick, and lead the
+        card it has led, if any.
+        """
+        state = cls.__new__(cls)
+        state.stock = tuple(game.stock)
+        state.trump_suit = game.trump_suit
+        state.hands = (players[0].hand, players[1].hand)
+        state.points = (players[0].points, players[1].points)
+        state.pending = (
+            players[0].marriage_points, players[1].marriage_points
+        )
+        state.stock_size = len(game.stock)
+        state.trump_card = game.stock[0] if game.stock else None
+        state.closed = game.closed
+        state.leader = leader
+        state.lead = lead
+        state.played = game.played
+        state.winner, state.game_points = None, 0
+        state.history = []
+        return state
+
+    def snapshot(self):
+        """Return everything that moves change, as a tuple."""
+        return (
+            self.hands, self.points, self.pending, self.stock_size,
+            self.trump_card, self.closed, self.leader, self.lead,
+            self.played, self.winner, self.game_points,
+        )
+
+    def restore(self, snapshot):
+        """Return to a snapshot."""
+        (
+            self.hands, self.points, self.pending, self.stock_size,
+            self.trump_card, self.closed, self.leader, self.lead,
+            self.played, self.winner, self.game_points,
+        ) = snapshot
+
+    def to_move(self):
+        """Return the seat that moves next."""
+        return self.leader if self.lead is None else 1 - self.leader
+
+    def moves(self):
+        """Return the legal moves of the seat to move."""
+        if self.winner is not None:
+            return []
+        hand = self.hands[self.to_move()]
+        if self.lead is not None:
+            return cards_of(
+                legal_cards(hand, self.lead, self.trump_suit, self.closed)
+            )
+        moves = cards_of(hand)
+        moves += [card | MARRIAGE for card in cards_of(couples_of(hand))]
+        if not self.closed:
+            if hand & BIT[trump_jack(self.trump_suit)]:
+                moves.append(EXCHANGE)
+            moves.append(CLOSE)
+        return moves
+
+    def apply(self, move):
+        """Make a move. It can be taken back with undo."""
+        self.history.append(self.snapshot())
+        seat = self.to_move()
+        if move == EXCHANGE:
+            jack = trump_jack(self.trump_suit)
+            swap = BIT[jack] | BIT[self.trump_card]
+            self._set_hand(seat, self.hands[seat] ^ swap)
+            self.trump_card = jack
+        elif move == CLOSE:
+            self.closed = True
+        elif self.lead is None:
+            card = move & ~MARRIAGE
+            self._set_hand(seat, self.hands[seat] ^ BIT[card])
+            self.lead = card
+            if move & MARRIAGE:
+                self._marry(seat, card)
+        else:
+            self._play_trick(move)
+
+    def undo(self):
+        """Take back the last move."""
+        self.restore(self.history.pop())
+
+    def _set_hand(self, seat, hand):
+        """Replace the hand of a seat."""
+        if seat:
+            self.hands = (self.hands[0], hand)
+        else:
+            self.hands = (hand, self.hands[1])
+
+    def _add(self, pair, seat, value):
+        """Return a pair with value added to the entry of a seat."""
+        if seat:
+            return (pair[0], pair[1] + value)
+        return (pair[0] + value, pair[1])
+
+    def _finish(self, winner):
+        """End the round."""
+        self.winner = winner
+        self.game_points = game_points(self.points[1 - winner])
+
+    def _marry(self, seat, card):
+        """Count a marriage now if the seat has taken a trick, else later.
+        """
+        marriage = 40 if SUIT[card] == self.trump_suit else 20
+        if self.points[seat]:
+            self.points = self._add(self.points, seat, marriage)
+            if self.points[seat] >= 66:
+                self._finish(seat)
+        else:
+            self.pending = self._add(self.pending, seat, marriage)
+
+    def _play_trick(self, card):
+        """Answer the lead with a card, and settle the trick."""
+        leader, follower = self.leader, 1 - self.leader
+        self._set_hand(follower, self.hands[follower] ^ BIT[card])
+        trick = TRICKS[(self.trump_suit * 20 + self.lead) * 20 + card]
+        taker = follower if trick & 1 else leader
+        self.points = self._add(
+            self.points, taker, (trick >> 1) + self.pending[taker]
+        )
+        self.pending = self._add(self.pending, taker, -self.pending[taker])
+        self.played |= BIT[self.lead] | BIT[card]
+        self.leader, self.lead = taker, None
+        if self.points[taker] >= 66 or not self.hands[taker]:
+            self._finish(taker)
+            return
+
+        # Both players draw cards.
+        if not self.closed:
+            self.stock_size -= 2
+            drawn = (
+                self.stock[self.stock_size + 1],
+                self.stock[self.stock_size] if self.stock_size
+                else self.trump_card,
+            )
+            self._set_hand(taker, self.hands[taker] | BIT[drawn[0]])
+            self._set_hand(1 - taker, self.hands[1 - taker] | BIT[drawn[1]])
+            self.closed = not self.stock_size
+
+
+if __name__ == "__main__":
+    print("This module is meant to be imported by the main module.")
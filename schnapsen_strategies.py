@@ -0,0 +1,60 @@
+"""The computer strategies that can be chosen by name.
+
+A strategy is an object with two methods, as ComputerStrategy has:
+choose_action(player, opponent, game) returns whether to exchange the
+trump Jack and whether to close, and choose_card(player, opponent, game,
+trick) returns the card to play and whether to marry. It may also have
+round_observer(seat, player) to follow the rounds it plays.
+
+Strategies are registered with a name and a factory that takes no
+arguments, such as the class. Other strategies can be added by plug-ins:
+modules that call register when they are imported.
+"""
+
+import importlib
+
+from schnapsen_engine import ComputerStrategy
+from schnapsen_montecarlo import MonteCarloStrategy
+from schnapsen_solver import SolverStrategy
+from schnapsen_valuetable import TableStrategy
+
+
+# The strategy whose moves are played when another one runs late.
+BASELINE = "computer"
+
+# Factories of the strategies, by name.
+STRATEGIES = {}
+
+
+def register(name, factory):
+    """Make a strategy available under a name."""
+    if name in STRATEGIES:
+        raise ValueError(f"strategy {name} is already registered")
+    STRATEGIES[name] = factory
+
+
+def load_plugins(modules):
+    """Import plug-in modules by name, so they register their strategies.
+    """
+    for module in modules or ():
+        importlib.import_module(module)
+
+
+def create_strategy(name):
+    """Return a new strategy of a registered name."""
+    if name not in STRATEGIES:
+        raise ValueError(
+            f"unknown strategy {name}, choose from "
+            + ", ".join(sorted(STRATEGIES))
+        )
+    return STRATEGIES[name]()
+
+
+register("computer", ComputerStrategy)
+register("solver", SolverStrategy)
+register("montecarlo", MonteCarloStrategy)
+register("table", TableStrategy)
+
+
+if __name__ == "__main__":
+    print("This module is meant to be imported by the main module.")
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""Build and read a table of solved endgames, memory-mapped from a file.
+
+Once the last card has been drawn, every card that is in neither hand has
+been played, so a position with the leader to lead is given by the two
+hands, the trump suit and the points of both players. The table holds the
+value and the best lead of every such position with up to a given number
+of cards in each hand. Lookups read single bytes through mmap, so many
+processes can share one table in the operating system's page cache.
+
+Suits are permuted so that trumps are suit 0. The points of both players
+always add up to the points of the played cards plus the marriages they
+have declared, so they are stored as the leader's points (1 to 65) and
+the declared marriages in 20-point steps (0 to 5). Positions in which a
+player has a marriage pending are not in the table.
+
+Tables are built one hand size after the other, as the positions after
+a trick are those of the next smaller size. The positions of one size
+are split among worker processes. Building requires NumPy; reading does
+not.
+"""
+
+import argparse
+import mmap
+import struct
+from math import comb
+from multiprocessing import Pool
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from schnapsen_cards import (
+    SUIT, POINTS, BIT, TRICKS, cards_of, combination_rank,
+    combination_unrank, couples_of, legal_cards,
+)
+from schnapsen_engine import game_points
+from schnapsen_solver import INFINITY, order_leads
+
+
+MAGIC = b"SCHNAPSENTB1"
+HEADER = struct.Struct("<12sB")
+MAX_CARDS = 5
+
+# Point states of a pair of hands: declared marriages (0 to 5 times 20
+# points) times the leader's points (1 to 65).
+MARRIAGE_STEPS = 6
+LEADER_POINTS = 65
+STATES = MARRIAGE_STEPS * LEADER_POINTS
+
+# The entry of a state that cannot be reached.
+UNREACHABLE = 255
+
+# Union ranks handed to a worker at a time.
+CHUNK_SIZE = 256
+
+
+def level_pairs(cards):
+    """Return the number of pairs of hands with cards cards each."""
+    return comb(20, 2 * cards) * comb(2 * cards, cards)
+
+
+def level_offsets(max_cards):
+    """Return the file offset of each hand size, and the file size."""
+    offsets = [HEADER.size]
+    for cards in range(1, max_cards + 1):
+        offsets.append(offsets[-1] + level_pairs(cards) * STATES)
+    return offsets[:-1], offsets[-1]
+
+
+def pair_index(leader_hand, follower_hand):
+    """Return the index of a pair of hands among those of its size."""
+    union = cards_of(leader_hand | follower_hand)
+    size = len(union) // 2
+    leader = [
+        position for position, card in enumerate(union)
+        if leader_hand & BIT[card]
+    ]
+    return (
+        combination_rank(union) * comb(2 * size, size)
+        + combination_rank(leader)
+    )
+
+
+def swap_suits(mask, trump_suit):
+    """Exchange the cards of the trump suit and suit 0 in a set of cards."""
+    if not trump_suit:
+        return mask
+    shift = 5 * trump_suit
+    low, high = mask & 31, (mask >> shift) & 31
+    mask &= ~(31 | 31 << shift)
+    return mask | high | low << shift
+
+
+def swap_card(card, trump_suit):
+    """Exchange the suit of a card like swap_suits."""
+    if SUIT[card] == trump_suit:
+        return card % 5
+    if SUIT[card] == 0:
+        return trump_suit * 5 + card
+    return card
+
+
+def point_state(leader_hand, follower_hand, leader_points,
+                follower_points):
+    """Return the point state of a position, or None if it is not
+    stored."""
+    remaining = sum(POINTS[card] for card in cards_of(
+        leader_hand | follower_hand
+    ))
+    marriages = leader_points + follower_points - (120 - remaining)
+    if (
+        marriages % 20
+        or not 0 <= marriages // 20 < MARRIAGE_STEPS
+        or not 1 <= leader_points <= LEADER_POINTS
+        or not 0 <= follower_points <= 65
+    ):
+        return None
+    return marriages // 20 * LEADER_POINTS + leader_points - 1
+
+
+class Tablebase():
+    """Look up endgames in a table file written by build."""
+
+    def __init__(self, path):
+        """Map the file and read its header."""
+        self.path = path
+        with open(path, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.max_cards = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an endgame table")
+        self.offsets, size = level_offsets(self.max_cards)
+        if len(self.map) != size:
+            raise ValueError(f"{path} is incomplete")
+
+    def __getstate__(self):
+        """Pickle the path only. The file is mapped again on loading."""
+        return self.path
+
+    def __setstate__(self, path):
+        """Map the file of a pickled table."""
+        self.__init__(path)
+
+    def close(self):
+        """Unmap the file."""
+        self.map.close()
+
+    def entry(self, leader_hand, follower_hand, leader_points,
+              follower_points):
+        """Return the entry of a position with trump suit 0, or None."""
+        size = bin(leader_hand).count("1")
+        if (
+            not 1 <= size <= self.max_cards
+            or bin(follower_hand).count("1") != size
+        ):
+            return None
+        state = point_state(
+            leader_hand, follower_hand, leader_points, follower_points
+        )
+        if state is None:
+            return None
+        offset = (
+            self.offsets[size - 1]
+            + pair_index(leader_hand, follower_hand) * STATES + state
+        )
+        return self.map[offset]
+
+    def best_lead(self, leader_hand, follower_hand, trump_suit,
+                  leader_points, follower_points):
+        """Return the best card to lead and its value for the leader.
+
+        Return None if the position is not in the table.
+        """
+        leader_hand = swap_suits(leader_hand, trump_suit)
+        follower_hand = swap_suits(follower_hand, trump_suit)
+        entry = self.entry(
+            leader_hand, follower_hand, leader_points, follower_points
+        )
+        if entry is None or entry == UNREACHABLE:
+            return None
+        card = cards_of(leader_hand)[entry >> 3]
+        return swap_card(card, trump_suit), (entry & 7) - 3
+
+    def best_response(self, lead, follower_hand, leader_hand, trump_suit,
+                      follower_points, leader_points):
+        """Return the best answer to a lead and its value for the
+        follower.
+
+        leader_hand no longer holds the lead, and leader_points already
+        include a marriage declared with it. Return None if a position
+        after the trick is not in the table.
+        """
+        lead = swap_card(lead, trump_suit)
+        follower_hand = swap_suits(follower_hand, trump_suit)
+        leader_hand = swap_suits(leader_hand, trump_suit)
+        best_card, best_value = None, -INFINITY
+        for card in cards_of(legal_cards(follower_hand, lead, 0, True)):
+            trick = TRICKS[lead * 20 + card]
+            hands = (leader_hand, follower_hand ^ BIT[card])
+            if trick & 1:
+                points = follower_points + (trick >> 1)
+                if points >= 66 or not hands[1]:
+                    value = game_points(leader_points)
+                else:
+                    value = self._value(
+                        hands[1], hands[0], points, leader_points
+                    )
+            else:
+                points = leader_points + (trick >> 1)
+                if points >= 66 or not hands[0]:
+                    value = -game_points(follower_points)
+                else:
+                    value = self._value(
+                        hands[0], hands[1], points, follower_points
+                    )
+                    if value is not None:
+                        value = -value
+            if value is None:
+                return None
+            if value > best_value:
+                best_card, best_value = card, value
+        return swap_card(best_card, trump_suit), best_value
+
+    def _value(self, leader_hand, follower_hand, leader_points,
+               follower_points):
+        """Return the value of a position with trump suit 0, or None."""
+        entry = self.entry(
+            leader_hand, follower_hand, leader_points, follower_points
+        )
+        if entry is None or entry == UNREACHABLE:
+            return None
+        return (entry & 7) - 3
+
+
+def _require_numpy():
+    """Raise an error if NumPy is not installed."""
+    if np is None:
+        raise ImportError("building endgame tables requires NumPy")
+
+
+def solve_pair(leader_hand, follower_hand, smaller):
+    """Return the entries of a pair of hands with trump suit 0.
+
+    smaller holds the entries of the pairs with one card less in each
+    hand, indexed like the table, or None for hands of one card.
+    """
+    marriages, leader_points = _MARRIAGES, _LEADER_POINTS
+    remaining = sum(POINTS[card] for card in cards_of(
+        leader_hand | follower_hand
+    ))
+    follower_points = 120 - remaining + 20 * marriages - leader_points
+    reachable = (follower_points >= 0) & (follower_points <= 65)
+    wins = _GAME_POINTS[np.clip(follower_points, 0, 65)]
+
+    cards = cards_of(leader_hand)
+    best = np.full(STATES, -INFINITY, dtype=np.int8)
+    best_lead = np.zeros(STATES, dtype=np.uint8)
+    for card in order_leads(leader_hand):
+        points, declared = leader_points, marriages
+        if couples_of(leader_hand) & BIT[card]:
+            marriage = 40 if SUIT[card] == 0 else 20
+            points = points + marriage
+            declared = np.minimum(declared + marriage // 20, 5)
+        rest = leader_hand ^ BIT[card]
+        losses = _GAME_POINTS[np.clip(points, 0, 65)]
+
+        # The follower picks the response that is worst for the leader.
+        worst = np.full(STATES, INFINITY, dtype=np.int8)
+        for response in cards_of(legal_cards(follower_hand, card, 0, True)):
+            trick = TRICKS[card * 20 + response]
+            others = follower_hand ^ BIT[response]
+            if trick & 1:
+                taker = follower_points + (trick >> 1)
+                value = -losses
+                if smaller is not None:
+                    child = _child(smaller, others, rest, declared, taker)
+                    value = np.where(taker >= 66, value, -child)
+            else:
+                taker = points + (trick >> 1)
+                value = wins
+                if smaller is not None:
+                    child = _child(smaller, rest, others, declared, taker)
+                    value = np.where(taker >= 66, value, child)
+            worst = np.minimum(worst, value)
+        if couples_of(leader_hand) & BIT[card]:
+            worst = np.where(points >= 66, wins, worst)
+        better = worst > best
+        best = np.where(better, worst, best)
+        best_lead[better] = cards.index(card)
+
+    entries = (best + 3).astype(np.uint8) | best_lead << 3
+    entries[~reachable] = UNREACHABLE
+    return entries
+
+
+def _child(smaller, leader_hand, follower_hand, marriages, leader_points):
+    """Return the values of the positions after a trick."""
+    start = pair_index(leader_hand, follower_hand) * STATES
+    states = marriages * LEADER_POINTS + np.clip(leader_points, 1, 65) - 1
+    return _VALUES[smaller[start + states]]
+
+
+def solve_chunk(job):
+    """Return the entries of the pairs with a range of union ranks."""
+    path, cards, start, stop = job
+    smaller = None
+    if cards > 1:
+        with open(path, "rb") as file:
+            table = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        offsets, size = level_offsets(cards - 1)
+        smaller = np.frombuffer(
+            table, np.uint8, level_pairs(cards - 1) * STATES, offsets[-1]
+        )
+    subsets = comb(2 * cards, cards)
+    entries = np.empty((stop - start) * subsets * STATES, dtype=np.uint8)
+    for rank in range(start, stop):
+        union = combination_unrank(rank, 2 * cards)
+        for number in range(subsets):
+            positions = combination_unrank(number, cards)
+            leader_hand = sum(BIT[union[index]] for index in positions)
+            follower_hand = sum(BIT[card] for card in union) ^ leader_hand
+            begin = ((rank - start) * subsets + number) * STATES
+            entries[begin:begin + STATES] = solve_pair(
+                leader_hand, follower_hand, smaller
+            )
+    return start, entries.tobytes()
+
+
+def build(path, max_cards=3, workers=None):
+    """Solve all endgames with up to max_cards cards in each hand and
+    write them to a file."""
+    _require_numpy()
+    if not 1 <= max_cards <= MAX_CARDS:
+        raise ValueError(f"hands hold 1 to {MAX_CARDS} cards")
+    offsets, size = level_offsets(max_cards)
+    with open(path, "wb") as file:
+        file.truncate(size)
+        file.write(HEADER.pack(MAGIC[:-1] + b"0", max_cards))
+
+    with open(path, "r+b") as file, Pool(workers) as pool:
+        for cards in range(1, max_cards + 1):
+            unions = comb(20, 2 * cards)
+            jobs = [
+                (path, cards, start, min(start + CHUNK_SIZE, unions))
+                for start in range(0, unions, CHUNK_SIZE)
+            ]
+            pair_size = comb(2 * cards, cards) * STATES
+            for start, entries in pool.imap_unordered(solve_chunk, jobs):
+                file.seek(offsets[cards - 1] + start * pair_size)
+                file.write(entries)
+            file.flush()
+        # The header is only valid once every size has been written.
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, max_cards))
+
+
+if np is not None:
+    # The declared marriages and the leader's points of each state.
+    _MARRIAGES = np.arange(STATES) // LEADER_POINTS
+    _LEADER_POINTS = np.arange(STATES) % LEADER_POINTS + 1
+    # Game points by the points of the loser, and values by table entries.
+    _GAME_POINTS = np.array(
+        [game_points(points) for points in range(66)], dtype=np.int8
+    )
+    _VALUES = np.array(
+        [(entry & 7) - 3 for entry in range(256)], dtype=np.int8
+    )
+
+
+def main():
+    """Parse the command line and build a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("file", help="the table file to write")
+    parser.add_argument(
+        "-c", "--cards", type=int, default=3,
+        help=f"largest number of cards in each hand (1 to {MAX_CARDS}, "
+             "default: 3)",
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    args = parser.parse_args()
+    if not 1 <= args.cards <= MAX_CARDS:
+        parser.error(f"--cards must be between 1 and {MAX_CARDS}")
+    offsets, size = level_offsets(args.cards)
+    print(f"Writing {size / 2**20:,.1f} MiB to {args.file}")
+    build(args.file, args.cards, args.workers)
+
+
+if __name__ == "__main__":
+    main()
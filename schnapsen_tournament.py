@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""Play a tournament between two computer strategies.
+
+Rounds are split into shards that are played by a pool of worker
+processes. Every game has its own random numbers, derived from the seed
+of the tournament and the number of the game, so a tournament with the
+same seed gives the same results however many workers play it, and any
+shard can be played again on its own.
+"""
+
+import argparse
+from collections import Counter
+from multiprocessing import Pool
+
+from schnapsen_cache import DecisionCache
+from schnapsen_classes import SchnapsenPlayer
+from schnapsen_engine import DeadlineStrategy, deal, game_rng, play_round
+from schnapsen_events import TimingCollector
+from schnapsen_records import RecordWriter, record_round
+from schnapsen_solver import SolverStrategy
+from schnapsen_strategies import (
+    BASELINE, STRATEGIES, create_strategy, load_plugins,
+)
+from schnapsen_tablebase import Tablebase
+
+
+SHARD_SIZE = 1000
+CACHE_SIZE = 500_000
+
+# The decision cache and the endgame table of each worker process, if
+# they are used.
+_cache = None
+_tablebase = None
+
+
+def init_worker(entries, tablebase_path, plugins=None):
+    """Give a worker process a decision cache that holds entries, unless
+    entries is None, the endgame table in a file, if given, and the
+    strategies of plug-in modules."""
+    global _cache, _tablebase
+    load_plugins(plugins)
+    if entries is not None:
+        _cache = DecisionCache(CACHE_SIZE, share=True)
+        _cache.update(entries)
+    if tablebase_path:
+        _tablebase = Tablebase(tablebase_path)
+
+
+def play_shard(job):
+    """Play the rounds of one shard.
+
+    Return a Counter for each side, the encoded records of the rounds if
+    they are recorded, a TimingCollector if times are measured and, if
+    decisions are cached, the new decisions with the numbers of hits and
+    misses. The sides take turns to lead the first trick. With a
+    deadline, moves that take longer are played by the baseline strategy
+    and counted as timeouts.
+    """
+    names, seed, shard, rounds, record, timings, deadline = job
+    strategies = [create_strategy(name) for name in names]
+    stats = [Counter(), Counter()]
+    records = []
+    collector = TimingCollector() if timings else None
+    if _cache is not None:
+        hits, misses = _cache.hits, _cache.misses
+    for strategy in strategies:
+        if isinstance(strategy, SolverStrategy):
+            strategy.cache = _cache
+            strategy.tablebase = _tablebase
+    if deadline:
+        strategies = [
+            DeadlineStrategy(strategy, deadline, create_strategy(BASELINE))
+            for strategy in strategies
+        ]
+    for number in range(rounds):
+        # Side 0 leads in even rounds, side 1 in odd rounds.
+        sides = (0, 1) if number % 2 == 0 else (1, 0)
+        seat_strategies = [strategies[side] for side in sides]
+        rng = game_rng(seed, shard * SHARD_SIZE + number)
+        if collector:
+            collector.seats = [f"{side}: {names[side]}" for side in sides]
+        if record:
+            result, encoded = record_round(
+                seat_strategies, sides, observer=collector, rng=rng
+            )
+            records.append(encoded)
+        else:
+            players = [SchnapsenPlayer(str(side)) for side in sides]
+            game = deal(players, rng=rng)
+            result = play_round(game, players, seat_strategies, collector)
+        for seat, side in enumerate(sides):
+            counter = stats[side]
+            counter["rounds"] += 1
+            counter["marriages"] += result.marriages[seat]
+            if seat == result.winner:
+                counter["wins"] += 1
+                counter["game_points"] += result.game_points
+    if deadline:
+        for side, strategy in enumerate(strategies):
+            strategy.close()
+            stats[side]["decisions"] += strategy.decisions
+            stats[side]["timeouts"] += strategy.timeouts
+    cached = None
+    if _cache is not None:
+        cached = (
+            _cache.take_added(), _cache.hits - hits, _cache.misses - misses
+        )
+    return stats, records, collector, cached
+
+
+def run_tournament(names, rounds, seed=0, workers=None, record_path=None,
+                   collector=None, cache=None, tablebase_path=None,
+                   deadline=None, plugins=None):
+    """Play a tournament and return the merged Counters of both sides.
+
+    If record_path is given, the rounds are appended to that record file
+    in the order of the shards. If a TimingCollector is given, the times
+    and counts of all shards are merged into it. If a DecisionCache is
+    given, the workers start with its decisions and the decisions they
+    add, their hits and their misses are merged into it. If the path of
+    an endgame table is given, the workers look up endgames in it. A
+    deadline in seconds limits every decision, see play_shard, and
+    plugins are the modules of other strategies.
+    """
+    jobs = []
+    for shard, start in enumerate(range(0, rounds, SHARD_SIZE)):
+        size = min(SHARD_SIZE, rounds - start)
+        jobs.append((
+            tuple(names), seed, shard, size, bool(record_path),
+            collector is not None, deadline,
+        ))
+
+    stats = [Counter(), Counter()]
+    writer = RecordWriter(record_path, names) if record_path else None
+    entries = None if cache is None else dict(cache.entries)
+    with Pool(
+        workers, init_worker, (entries, tablebase_path, plugins)
+    ) as pool:
+        # Shards are only taken in order when their records are written.
+        if writer:
+            shards = pool.imap(play_shard, jobs)
+        else:
+            shards = pool.imap_unordered(play_shard, jobs)
+        for shard_stats, records, shard_collector, cached in shards:
+            for side in (0, 1):
+                stats[side].update(shard_stats[side])
+            if collector:
+                collector.merge(shard_collector)
+            if cache is not None:
+                added, hits, misses = cached
+                cache.update(added)
+                cache.hits += hits
+                cache.misses += misses
+            for record in records:
+                writer.write_encoded(record)
+    if writer:
+        writer.close()
+    return stats
+
+
+def show_stats(names, stats):
+    """Print the statistics of both sides."""
+    print(f"{'Strategy':<16}{'Rounds':>10}{'Win rate':>10}"
+          f"{'Points/round':>14}{'Marriages/round':>17}")
+    for side, name in enumerate(names):
+        counter = stats[side]
+        rounds = counter["rounds"] or 1
+        print(
+            f"{name:<16}{counter['rounds']:>10}"
+            f"{counter['wins'] / rounds:>10.3f}"
+            f"{counter['game_points'] / rounds:>14.3f}"
+            f"{counter['marriages'] / rounds:>17.3f}"
+        )
+    if any(counter["decisions"] for counter in stats):
+        print()
+        for side, name in enumerate(names):
+            counter = stats[side]
+            print(
+                f"{name}: {counter['timeouts']} of {counter['decisions']} "
+                f"decisions past the deadline"
+            )
+
+
+def main():
+    """Parse the command line and run the tournament."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "strategies", nargs=2,
+        help="the two strategies that play against each other: "
+             + ", ".join(sorted(STRATEGIES)) + " or those of plug-ins",
+    )
+    parser.add_argument("-n", "--rounds", type=int, default=100_000)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "-r", "--record", metavar="FILE",
+        help="append the rounds to a record file",
+    )
+    parser.add_argument(
+        "-t", "--timings", action="store_true",
+        help="show how long the strategies take for their decisions",
+    )
+    parser.add_argument(
+        "-c", "--cache", metavar="FILE",
+        help="cache endgame decisions in a file, across tournaments",
+    )
+    parser.add_argument(
+        "-e", "--endgames", metavar="FILE",
+        help="look up endgames in a table built by schnapsen_tablebase.py",
+    )
+    parser.add_argument(
+        "-d", "--deadline", type=float, default=None,
+        help="seconds a decision may take before the baseline strategy "
+             "plays the move instead",
+    )
+    parser.add_argument(
+        "--plugin", action="append", metavar="MODULE",
+        help="import a module that registers strategies (repeatable)",
+    )
+    args = parser.parse_args()
+    load_plugins(args.plugin)
+    for name in args.strategies:
+        if name not in STRATEGIES:
+            parser.error(f"unknown strategy: {name}")
+    collector = TimingCollector() if args.timings else None
+    cache = None
+    if args.cache:
+        cache = DecisionCache(CACHE_SIZE)
+        cache.load(args.cache)
+    stats = run_tournament(
+        args.strategies, args.rounds, args.seed, args.workers, args.record,
+        collector, cache, args.endgames, args.deadline, args.plugin,
+    )
+    show_stats(args.strategies, stats)
+    if cache is not None:
+        cache.save(args.cache)
+        print()
+        print(
+            f"Decision cache: {len(cache)} decisions, "
+            f"hit rate {cache.hit_rate():.3f}"
+        )
+    if collector:
+        print()
+        for line in collector.report():
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""A computer strategy that plays by a table of values learned in self-play.
+
+Each card a player may play is described by a few features: its suit and
+rank, the card it answers, whether it declares a marriage or takes the
+trick, the length of its suit in the hand, the size of the talon and
+the points of both players. Together they give the index of an entry in
+a table of values, and the strategy plays the card with the highest
+value. Choosing a card takes a few table lookups and no search.
+
+Training lets the strategy play against itself on all CPU cores, trying
+a random card now and then. At one decision of each round, every legal
+card is played and the round played out, and each value becomes the
+average of how many game points such a card won more than the other
+cards. The sums behind the averages are kept in a checkpoint file, so
+training can be stopped and continued, and the values are exported to a
+compact table file for play.
+"""
+
+import argparse
+import os
+import pickle
+import random
+from array import array
+from functools import lru_cache
+from multiprocessing import Pool
+
+from schnapsen_cards import (
+    SUIT, RANK, BIT, TRICKS, SUIT_MASKS, cards_of, legal_cards,
+)
+from schnapsen_classes import SchnapsenPlayer
+from schnapsen_engine import ComputerStrategy, deal, game_rng, play_round
+
+
+MAGIC = b"SCHNAPSENVT1"
+TABLE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "schnapsen_table.bin"
+)
+
+# Positions (talon closed, talon size, points of both players) and cards
+# (trump, rank, card answered, marriage or trick taken, suit length).
+POSITIONS = 2 * 6 * 4 * 4
+CARDS = 2 * 5 * 11 * 2 * 3
+ENTRIES = POSITIONS * CARDS
+
+
+def position_feature(closed, stock_size, points, opponent_points):
+    """Return the index of a position among POSITIONS."""
+    return (
+        ((closed * 6 + stock_size // 2) * 4 + min(points // 17, 3)) * 4
+        + min(opponent_points // 17, 3)
+    )
+
+
+def card_feature(card, hand, lead, trump_suit, couples):
+    """Return the index of a card among CARDS.
+
+    lead is the card it answers, or None. couples are the cards of the
+    hand that declare a marriage when led.
+    """
+    if lead is None:
+        answered = 0
+        flag = bool(couples & BIT[card])
+    else:
+        answered = 1 + RANK[lead] + 5 * (SUIT[lead] == trump_suit)
+        flag = TRICKS[(trump_suit * 20 + lead) * 20 + card] & 1
+    length = (hand & SUIT_MASKS[SUIT[card]]).bit_count()
+    return (
+        (((SUIT[card] == trump_suit) * 5 + RANK[card]) * 11 + answered) * 2
+        + flag
+    ) * 3 + min(length, 3) - 1
+
+
+class TableStrategy(ComputerStrategy):
+    """Play the card with the highest value in a table.
+
+    Exchanging the trump Jack and closing are left to the computer's
+    strategy. values is an array of ENTRIES values, or the values of the
+    table file TABLE_PATH, which all strategies of a process share. While
+    training, epsilon is the probability of trying a random card.
+    """
+
+    def __init__(self, values=None, epsilon=0):
+        """Initialize attributes."""
+        self.values = load_table(TABLE_PATH) if values is None else values
+        self.epsilon = epsilon
+
+    def choose_card(self, player, opponent, game, trick):
+        """Return the card to play and whether to marry."""
+        lead = trick[0][0] if trick else None
+        hand = player.hand
+        legal = legal_cards(hand, lead, game.trump_suit, game.closed)
+        couples = player.get_couples() if lead is None else 0
+        position = position_feature(
+            game.closed, len(game.stock), player.points, opponent.points
+        )
+
+        best_card, best_value = None, None
+        cards = legal
+        while cards:
+            low = cards & -cards
+            cards ^= low
+            card = low.bit_length() - 1
+            entry = (
+                card_feature(card, hand, lead, game.trump_suit, couples)
+                * POSITIONS + position
+            )
+            value = self.values[entry]
+            if best_value is None or value > best_value:
+                best_card, best_value = card, value
+
+        if self.epsilon and (game.rng or random).random() < self.epsilon:
+            best_card = (game.rng or random).choice(cards_of(legal))
+        return best_card, bool(couples & BIT[best_card])
+
+
+@lru_cache(maxsize=None)
+def load_table(path):
+    """Return the values of a table file written by export, reading it
+    on first use. The values are shared and must not be changed."""
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a value table")
+        values = array("f")
+        values.frombytes(file.read())
+    if len(values) != ENTRIES:
+        raise ValueError(f"{path} has {len(values)} values, not {ENTRIES}")
+    return values
+
+
+class _RecordingStrategy(TableStrategy):
+    """Play like TableStrategy and note the cards a seat could play."""
+
+    def __init__(self, values, epsilon, seat, decisions):
+        """Initialize attributes."""
+        super().__init__(values, epsilon)
+        self.seat = seat
+        self.decisions = decisions
+
+    def choose_card(self, player, opponent, game, trick):
+        """Return the card to play and whether to marry, and note the
+        seat, the entries of all legal cards and the move."""
+        lead = trick[0][0] if trick else None
+        couples = player.get_couples() if lead is None else 0
+        position = position_feature(
+            game.closed, len(game.stock), player.points, opponent.points
+        )
+        legal = legal_cards(player.hand, lead, game.trump_suit, game.closed)
+        candidates = [
+            (
+                card, bool(couples & BIT[card]),
+                card_feature(card, player.hand, lead, game.trump_suit,
+                             couples) * POSITIONS + position,
+            )
+            for card in cards_of(legal)
+        ]
+        move = super().choose_card(player, opponent, game, trick)
+        self.decisions.append((self.seat, candidates, move))
+        return move
+
+
+class _RolloutStrategy(TableStrategy):
+    """Play the moves given first, for both seats, then like
+    TableStrategy."""
+
+    def __init__(self, values, moves):
+        """Initialize attributes."""
+        super().__init__(values)
+        self.moves = moves
+        self.next = 0
+
+    def choose_card(self, player, opponent, game, trick):
+        """Return the next given move, or the best card."""
+        if self.next < len(self.moves):
+            self.next += 1
+            return self.moves[self.next - 1]
+        return super().choose_card(player, opponent, game, trick)
+
+
+def play_games(job):
+    """Play rounds of self-play and compare the cards at one decision of
+    each round.
+
+    Every legal card of the decision is played and the round is played
+    out with the values. Return the sums and numbers of the game points
+    each card won more than the average of the cards, by entry, as dicts.
+    """
+    values, seed, start, rounds, epsilon = job
+    sums, counts = {}, {}
+    for number in range(start, start + rounds):
+        players = [SchnapsenPlayer("0"), SchnapsenPlayer("1")]
+        game = deal(players, rng=game_rng(seed, number))
+        decisions = []
+        strategies = [
+            _RecordingStrategy(values, epsilon, seat, decisions)
+            for seat in (0, 1)
+        ]
+        play_round(game, players, strategies)
+        choices = [
+            index for index, (seat, candidates, move) in enumerate(decisions)
+            if len(candidates) > 1
+        ]
+        if not choices:
+            continue
+
+        chosen = game.rng.choice(choices)
+        seat, candidates, move = decisions[chosen]
+        moves = [move for seat, candidates, move in decisions[:chosen]]
+        won = []
+        for card, marry, entry in candidates:
+            players = [SchnapsenPlayer("0"), SchnapsenPlayer("1")]
+            rollout = _RolloutStrategy(values, moves + [(card, marry)])
+            result = play_round(
+                deal(players, game.deck), players, [rollout, rollout]
+            )
+            points = result.game_points
+            won.append(points if seat == result.winner else -points)
+        average = sum(won) / len(won)
+        for (card, marry, entry), points in zip(candidates, won):
+            sums[entry] = sums.get(entry, 0) + points - average
+            counts[entry] = counts.get(entry, 0) + 1
+    return sums, counts
+
+
+class Training():
+    """The state of a training run, saved in checkpoints."""
+
+    def __init__(self, seed=0):
+        """Initialize attributes."""
+        self.seed = seed
+        self.rounds = 0
+        self.sums = array("d", bytes(8 * ENTRIES))
+        self.counts = array("Q", bytes(8 * ENTRIES))
+
+    def values(self):
+        """Return the average advantage of each entry, 0 if unseen."""
+        return array("f", (
+            total / count if count else 0
+            for total, count in zip(self.sums, self.counts)
+        ))
+
+    def add(self, sums, counts):
+        """Add the results of play_games."""
+        for entry, total in sums.items():
+            self.sums[entry] += total
+            self.counts[entry] += counts[entry]
+
+    def save(self, path):
+        """Write a checkpoint, replacing the previous one at once.
+
+        Only plain values are pickled, so a checkpoint does not depend
+        on where this class was defined.
+        """
+        state = {
+            "seed": self.seed,
+            "rounds": self.rounds,
+            "sums": self.sums.tobytes(),
+            "counts": self.counts.tobytes(),
+        }
+        with open(path + ".tmp", "wb") as file:
+            pickle.dump(state, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def load(path):
+        """Return the training run saved in a checkpoint."""
+        with open(path, "rb") as file:
+            state = pickle.load(file)
+        training = Training(state["seed"])
+        training.rounds = state["rounds"]
+        training.sums = array("d", state["sums"])
+        training.counts = array("Q", state["counts"])
+        return training
+
+
+def train(checkpoint, iterations, rounds, seed=0, workers=None,
+          epsilon=0.1, every=1):
+    """Continue the training in a checkpoint file, or start it.
+
+    Each iteration plays rounds rounds with the values of the previous
+    iterations, split among the worker processes. The checkpoint is
+    saved every every iterations and at the end. Return the Training.
+    """
+    if os.path.exists(checkpoint):
+        training = Training.load(checkpoint)
+    else:
+        training = Training(seed)
+    workers = workers or os.cpu_count()
+    size = -(-rounds // workers)
+    with Pool(workers) as pool:
+        for iteration in range(1, iterations + 1):
+            values = training.values()
+            jobs = [
+                (
+                    values, training.seed, training.rounds + start,
+                    min(size, rounds - start), epsilon,
+                )
+                for start in range(0, rounds, size)
+            ]
+            for sums, counts in pool.imap_unordered(play_games, jobs):
+                training.add(sums, counts)
+            training.rounds += rounds
+            if iteration % every == 0 or iteration == iterations:
+                training.save(checkpoint)
+    return training
+
+
+def export(training, path):
+    """Write the values of a training run to a table file."""
+    with open(path + ".tmp", "wb") as file:
+        file.write(MAGIC)
+        file.write(training.values().tobytes())
+    os.replace(path + ".tmp", path)
+
+
+def main():
+    """Parse the command line and train or export."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    trainer = commands.add_parser(
+        "train", help="train by self-play, continuing a checkpoint",
+    )
+    trainer.add_argument("checkpoint", help="the checkpoint file")
+    trainer.add_argument(
+        "-i", "--iterations", type=int, default=10,
+        help="number of iterations (default: 10)",
+    )
+    trainer.add_argument(
+        "-n", "--rounds", type=int, default=100_000,
+        help="rounds per iteration (default: 100000)",
+    )
+    trainer.add_argument(
+        "-s", "--seed", type=int, default=0,
+        help="seed of a new training run",
+    )
+    trainer.add_argument(
+        "-w", "--workers", type=int, default=None,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    trainer.add_argument(
+        "-e", "--epsilon", type=float, default=0.1,
+        help="probability of trying a random card (default: 0.1)",
+    )
+    trainer.add_argument(
+        "--every", type=int, default=1,
+        help="save the checkpoint every this many iterations",
+    )
+    exporter = commands.add_parser(
+        "export", help="write the values of a checkpoint to a table file",
+    )
+    exporter.add_argument("checkpoint", help="the checkpoint file")
+    exporter.add_argument(
+        "table", nargs="?", default=TABLE_PATH,
+        help="the table file to write (default: schnapsen_table.bin "
+             "next to this module, which the strategy loads)",
+    )
+    args = parser.parse_args()
+
+    if args.command == "train":
+        training = train(
+            args.checkpoint, args.iterations, args.rounds, args.seed,
+            args.workers, args.epsilon, args.every,
+        )
+        seen = sum(1 for count in training.counts if count)
+        print(
+            f"Trained on {training.rounds} rounds, "
+            f"{seen} of {ENTRIES} entries seen"
+        )
+    else:
+        export(Training.load(args.checkpoint), args.table)
+        print(f"Wrote {args.table}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Check the batch simulator against the engine.
+
+Run with: python3 -m unittest test_schnapsen_batch
+"""
+
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from schnapsen_batch import (
+    deals_from_seeds, distribution, engine_distribution, simulate_batch,
+)
+
+
+DEALS = 5000
+# Both simulators play the same decks and only choose couples with
+# different random numbers, so their shares differ by much less.
+TOLERANCE = 0.01
+
+
+@unittest.skipIf(np is None, "the batch simulator requires NumPy")
+class BatchTest(unittest.TestCase):
+    """Compare the distributions of results of both simulators."""
+
+    def check(self, **options):
+        """Compare the shares of wins by seat and game points."""
+        seeds = range(DEALS)
+        result = simulate_batch(
+            deals_from_seeds(seeds), np.random.default_rng(0), **options
+        )
+        batch = distribution(result) / DEALS
+        engine = engine_distribution(seeds, **options) / DEALS
+        self.assertLess(np.abs(batch - engine).max(), TOLERANCE)
+
+    def test_default(self):
+        self.check()
+
+    def test_no_exchange(self):
+        self.check(exchange=False)
+
+    def test_closing(self):
+        for close_before in range(5):
+            with self.subTest(close_before=close_before):
+                self.check(close_before=close_before)
+
+
+if __name__ == "__main__":
+    unittest.main()
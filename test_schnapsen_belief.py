@@ -0,0 +1,119 @@
+"""Check the ranking of hands and what a BeliefState knows.
+
+Run with: python3 -m unittest test_schnapsen_belief
+"""
+
+import random
+import unittest
+from itertools import combinations
+from math import comb
+
+from schnapsen_belief import BeliefState
+from schnapsen_cards import (
+    BIT, cards_of, combination_rank, combination_unrank, legal_cards,
+    trump_jack,
+)
+from schnapsen_classes import SchnapsenPlayer
+from schnapsen_engine import ComputerStrategy, deal, game_rng, play_round
+
+
+GAMES = 2000
+
+
+class CheckingStrategy(ComputerStrategy):
+    """Make random legal moves and check the belief of its seat against
+    the opponent's hand at every decision."""
+
+    def __init__(self, test, rng):
+        """Initialize attributes."""
+        self.test = test
+        self.rng = rng
+        self.belief = None
+        self.decisions = 0
+
+    def round_observer(self, seat, player):
+        """Follow the round with a new belief."""
+        self.belief = BeliefState(seat, player)
+        return self.belief
+
+    def check(self, opponent):
+        """Compare the belief with the opponent's hand."""
+        belief, hand = self.belief, opponent.hand
+        self.test.assertEqual(belief.known & ~hand, 0)
+        self.test.assertEqual(hand & ~(belief.known | belief.free()), 0)
+        self.test.assertEqual(hand.bit_count(), belief.opponent_size)
+        rank = belief.rank(hand)
+        self.test.assertLess(rank, belief.count())
+        self.test.assertEqual(belief.unrank(rank), hand)
+        self.decisions += 1
+
+    def choose_action(self, player, opponent, game):
+        """Exchange half of the time and close a tenth of the time."""
+        self.check(opponent)
+        jack = trump_jack(game.trump_suit)
+        exchange = bool(player.hand & BIT[jack]) and self.rng.random() < 0.5
+        return exchange, self.rng.random() < 0.1
+
+    def choose_card(self, player, opponent, game, trick):
+        """Play a random legal card, marrying if it can."""
+        self.check(opponent)
+        lead = trick[0][0] if trick else None
+        legal = legal_cards(player.hand, lead, game.trump_suit, game.closed)
+        card = self.rng.choice(cards_of(legal))
+        return card, not trick and bool(player.get_couples() & BIT[card])
+
+
+class RankTest(unittest.TestCase):
+    """Ranks of combinations and hands."""
+
+    def test_combinations(self):
+        """Every subset of up to 10 positions has its colexicographic
+        rank."""
+        for universe in range(11):
+            for size in range(universe + 1):
+                subsets = sorted(
+                    combinations(range(universe), size),
+                    key=lambda subset: subset[::-1],
+                )
+                for rank, subset in enumerate(subsets):
+                    self.assertEqual(combination_rank(subset), rank)
+                    self.assertEqual(
+                        combination_unrank(rank, size), list(subset)
+                    )
+
+    def test_hands(self):
+        """Every hand of free cards and known cards survives rank and
+        unrank."""
+        belief = BeliefState(0, SchnapsenPlayer("0"))
+        free = [1, 4, 5, 9, 12, 13, 17, 19]
+        belief.unseen = sum(BIT[card] for card in free) | BIT[7]
+        belief.void = BIT[7]
+        belief.known = BIT[2] | BIT[15]
+        for size in range(len(free) + 1):
+            belief.opponent_size = size + 2
+            self.assertEqual(belief.count(), comb(len(free), size))
+            ranks = set()
+            for cards in combinations(free, size):
+                hand = sum(BIT[card] for card in cards) | belief.known
+                rank = belief.rank(hand)
+                ranks.add(rank)
+                self.assertEqual(belief.unrank(rank), hand)
+            self.assertEqual(ranks, set(range(belief.count())))
+
+
+class BeliefTest(unittest.TestCase):
+    """Follow seeded games with a belief for each seat."""
+
+    def test_games(self):
+        strategies = [
+            CheckingStrategy(self, random.Random(seat)) for seat in (0, 1)
+        ]
+        for number in range(GAMES):
+            players = [SchnapsenPlayer("0"), SchnapsenPlayer("1")]
+            game = deal(players, rng=game_rng(0, number))
+            play_round(game, players, strategies)
+        self.assertGreater(strategies[0].decisions, GAMES * 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""Check the decision cache and its canonical positions.
+
+Run with: python3 -m unittest test_schnapsen_cache
+"""
+
+import random
+import unittest
+
+from schnapsen_cache import DecisionCache, permute_card, permute_mask
+from schnapsen_cards import DECK, BIT, cards_of
+from schnapsen_solver import EndgameSolver, SolverStrategy
+
+
+POSITIONS = 300
+
+
+def random_position(rng):
+    """Return the arguments of cached_card for a random endgame in which
+    no two non-trump suits look alike, so the best card is unique up to
+    the permutation."""
+    while True:
+        deck = list(DECK)
+        rng.shuffle(deck)
+        size = rng.randint(1, 5)
+        hand = sum(BIT[card] for card in deck[:size])
+        opponent_hand = sum(BIT[card] for card in deck[size:2 * size])
+        lead = None
+        if rng.random() < 0.5:
+            lead = deck[size]
+            opponent_hand ^= BIT[lead]
+        trump_suit = rng.randrange(4)
+        lead_mask = 0 if lead is None else BIT[lead]
+        masks = (hand, opponent_hand, lead_mask)
+        suits = [
+            tuple(mask >> (5 * suit) & 31 for mask in masks)
+            for suit in range(4) if suit != trump_suit
+        ]
+        if len(set(suits)) == 3:
+            points = (rng.randint(0, 60), rng.randint(0, 60))
+            return hand, opponent_hand, lead, trump_suit, points, (0, 0)
+
+
+class CanonicalTest(unittest.TestCase):
+    """Solve positions and suit-permuted copies through the cache."""
+
+    def test_permuted_positions(self):
+        rng = random.Random(0)
+        strategy = SolverStrategy(cache=DecisionCache())
+        solver = EndgameSolver()
+        for dummy in range(POSITIONS):
+            position = random_position(rng)
+            hand, opponent_hand, lead, trump_suit, points, pending = position
+            card = strategy.cached_card(*position)
+            self.assertTrue(hand & BIT[card])
+
+            # The card is as good as the best one.
+            if lead is None:
+                best = solver.best_lead(
+                    hand, opponent_hand, trump_suit, *points
+                )[1]
+                value = solver.lead_value(
+                    card, hand, opponent_hand, trump_suit, *points
+                )
+            else:
+                best = solver.best_response(
+                    lead, hand, opponent_hand, trump_suit, *points
+                )[1]
+                value = solver.response_value(
+                    card, lead, hand, opponent_hand, trump_suit, *points
+                )
+            self.assertEqual(value, best, position)
+
+            permutation = tuple(rng.sample(range(4), 4))
+            hits = strategy.cache.hits
+            permuted = strategy.cached_card(
+                permute_mask(hand, permutation),
+                permute_mask(opponent_hand, permutation),
+                None if lead is None else permute_card(lead, permutation),
+                permutation[trump_suit], points, pending,
+            )
+            self.assertEqual(strategy.cache.hits, hits + 1)
+            self.assertEqual(
+                permuted, permute_card(card, permutation),
+                (position, permutation),
+            )
+
+    def test_permute(self):
+        permutation = (2, 0, 3, 1)
+        for card in DECK:
+            self.assertEqual(
+                permute_mask(BIT[card], permutation),
+                BIT[permute_card(card, permutation)],
+            )
+        hand = BIT[0] | BIT[7] | BIT[19]
+        self.assertEqual(
+            cards_of(permute_mask(hand, permutation)),
+            sorted(permute_card(card, permutation) for card in (0, 7, 19)),
+        )
+
+
+class LeastRecentlyUsedTest(unittest.TestCase):
+    """The bound on the entries and the counts of lookups."""
+
+    def test_bound(self):
+        cache = DecisionCache(max_entries=3)
+        for key in "abc":
+            cache.store(key, key.upper())
+        self.assertEqual(cache.lookup("a"), "A")
+        cache.store("d", "D")
+        self.assertEqual(len(cache), 3)
+        self.assertIsNone(cache.lookup("b"))
+        self.assertEqual(cache.lookup("c"), "C")
+        cache.update({"e": "E", "f": "F"})
+        self.assertEqual(list(cache.entries), ["c", "e", "f"])
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+        self.assertAlmostEqual(cache.hit_rate(), 2 / 3)
+
+    def test_shared(self):
+        cache = DecisionCache(share=True)
+        cache.store("a", 1)
+        cache.update({"b": 2})
+        cache.store("c", 3)
+        self.assertEqual(cache.take_added(), {"a": 1, "c": 3})
+        self.assertEqual(cache.take_added(), {})
+        self.assertEqual(DecisionCache().take_added(), {})
+        self.assertEqual(DecisionCache().hit_rate(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
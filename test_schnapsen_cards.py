@@ -0,0 +1,71 @@
+"""Check the legal-move generator against the rules, card by card.
+
+Run with: python3 -m unittest test_schnapsen_cards
+"""
+
+import unittest
+from itertools import combinations
+
+from schnapsen_cards import (
+    DECK, SUIT, RANK, BIT, cards_of, legal_cards,
+)
+
+
+MAX_HAND = 5
+
+
+def reference_legal(hand, lead, trump_suit, closed):
+    """Return the cards of a list that may be played, as a list.
+
+    This is the rule as written: while the talon is open or when leading,
+    any card. Once it is closed or exhausted, a higher card of the suit
+    led, else any card of that suit, else a trump, else any card.
+    """
+    if lead is None or not closed:
+        return list(hand)
+    same_suit = [card for card in hand if SUIT[card] == SUIT[lead]]
+    if same_suit:
+        higher = [card for card in same_suit if RANK[card] > RANK[lead]]
+        return higher or same_suit
+    trumps = [card for card in hand if SUIT[card] == trump_suit]
+    return trumps or list(hand)
+
+
+class LegalCardsTest(unittest.TestCase):
+    """Compare legal_cards with reference_legal in every position."""
+
+    def test_leading(self):
+        for size in range(1, MAX_HAND + 1):
+            for hand in combinations(DECK, size):
+                mask = sum(BIT[card] for card in hand)
+                for trump_suit in range(4):
+                    for closed in (False, True):
+                        self.assertEqual(
+                            legal_cards(mask, None, trump_suit, closed), mask
+                        )
+
+    def test_responding(self):
+        """Every hand of up to MAX_HAND cards, lead, trump suit and
+        state of the talon."""
+        for lead in DECK:
+            others = [card for card in DECK if card != lead]
+            for size in range(1, MAX_HAND + 1):
+                for hand in combinations(others, size):
+                    mask = sum(BIT[card] for card in hand)
+                    for trump_suit in range(4):
+                        for closed in (False, True):
+                            expected = reference_legal(
+                                hand, lead, trump_suit, closed
+                            )
+                            legal = legal_cards(
+                                mask, lead, trump_suit, closed
+                            )
+                            if cards_of(legal) != expected:
+                                self.fail(
+                                    f"hand {hand}, lead {lead}, trump "
+                                    f"suit {trump_suit}, closed {closed}"
+                                )
+
+
+if __name__ == "__main__":
+    unittest.main()
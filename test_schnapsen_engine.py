@@ -0,0 +1,173 @@
+"""Check that the engine refuses moves against the rules and that a late
+strategy still plays in time.
+
+Run with: python3 -m unittest test_schnapsen_engine
+"""
+
+import time
+import unittest
+
+from schnapsen_cards import DECK, BIT, trump_jack
+from schnapsen_classes import SchnapsenPlayer
+from schnapsen_engine import (
+    ComputerStrategy, DeadlineStrategy, RoundObserver, deal, game_rng,
+    play_round, round_turns,
+)
+
+
+# Seconds a decision may take, and seconds the slow strategy takes for
+# every third one.
+DEADLINE = 0.02
+SLOW = 0.1
+
+
+def start_round(holds_jack):
+    """Deal a round in which the first player holds the trump Jack or
+    not, and run it to the first decision. Return the game, players and
+    turns."""
+    for shift in range(len(DECK)):
+        deck = DECK[shift:] + DECK[:shift]
+        players = [SchnapsenPlayer("0"), SchnapsenPlayer("1")]
+        game = deal(players, deck)
+        jack = trump_jack(game.trump_suit)
+        if bool(players[0].hand & BIT[jack]) == holds_jack:
+            turns = round_turns(game, players)
+            next(turns)
+            return game, players, turns
+    raise AssertionError("no such deal")
+
+
+class ActionTest(unittest.TestCase):
+    """Exchanging the trump Jack and closing the talon."""
+
+    def test_exchange(self):
+        game, players, turns = start_round(holds_jack=True)
+        trump_card = game.trump_card
+        self.assertEqual(turns.send((True, False))[1], "lead")
+        self.assertTrue(players[0].hand & BIT[trump_card])
+        self.assertEqual(game.trump_card, trump_jack(game.trump_suit))
+
+    def test_exchange_without_jack(self):
+        game, players, turns = start_round(holds_jack=False)
+        hand = players[0].hand
+        with self.assertRaises(ValueError):
+            turns.send((True, False))
+        self.assertEqual(players[0].hand, hand)
+
+    def test_close(self):
+        game, players, turns = start_round(holds_jack=False)
+        self.assertEqual(turns.send((False, True))[1], "lead")
+        self.assertTrue(game.closed)
+
+    def test_close_empty_talon(self):
+        game, players, turns = start_round(holds_jack=False)
+        game.stock.clear()
+        with self.assertRaises(ValueError):
+            turns.send((False, True))
+
+
+class EventLog(RoundObserver):
+    """Note the events of a round, and that none arrives while the
+    strategy it belongs to is deciding."""
+
+    def __init__(self, test, strategy=None):
+        """Initialize attributes."""
+        self.test = test
+        self.strategy = strategy
+        self.events = []
+
+    def note(self, *event):
+        if self.strategy is not None:
+            self.test.assertFalse(self.strategy.busy, event)
+        self.events.append(event)
+
+    def on_deal(self, game):
+        self.note("deal", game.deck)
+
+    def on_action(self, seat, exchange, close):
+        self.note("action", seat, exchange, close)
+
+    def on_card(self, seat, card, marriage_points):
+        self.note("card", seat, card, marriage_points)
+
+    def on_trick(self, taker, trick, marriage_points):
+        self.note("trick", taker, tuple(trick), marriage_points)
+
+    def on_draw(self, seat, card):
+        self.note("draw", seat, card)
+
+    def on_round_end(self, result):
+        self.note("end", result)
+
+
+class SlowStrategy(ComputerStrategy):
+    """Play like the computer, but take too long for every third
+    decision."""
+
+    def __init__(self, test):
+        """Initialize attributes."""
+        self.test = test
+        self.busy = False
+        self.decisions = 0
+        self.log = None
+        self.games = []
+
+    def round_observer(self, seat, player):
+        self.log = EventLog(self.test, self)
+        return self.log
+
+    def decide(self, game):
+        """Spend the time of a decision."""
+        self.decisions += 1
+        self.games.append(game)
+        if self.decisions % 3 == 0:
+            time.sleep(SLOW)
+        game.rng.random()
+
+    def choose_action(self, player, opponent, game):
+        self.busy = True
+        self.decide(game)
+        self.busy = False
+        return super().choose_action(player, opponent, game)
+
+    def choose_card(self, player, opponent, game, trick):
+        self.busy = True
+        self.decide(game)
+        self.busy = False
+        return super().choose_card(player, opponent, game, trick)
+
+
+class DeadlineTest(unittest.TestCase):
+    """A strategy that runs late."""
+
+    def test_late_strategy(self):
+        slow = SlowStrategy(self)
+        strategy = DeadlineStrategy(slow, DEADLINE)
+        rounds = []
+        try:
+            for number in range(10):
+                players = [SchnapsenPlayer("0"), SchnapsenPlayer("1")]
+                game = deal(players, rng=game_rng(0, number))
+                log = EventLog(self)
+                # play_round raises ValueError for an illegal move.
+                play_round(
+                    game, players, [strategy, ComputerStrategy()], log
+                )
+                rounds.append((game, log, slow.log))
+                # The events held back are passed on once it is done.
+                strategy.idle.wait()
+                strategy.release()
+        finally:
+            strategy.close()
+
+        self.assertGreater(strategy.timeouts, 0)
+        self.assertLess(strategy.timeouts, strategy.decisions)
+        for game, log, own in rounds:
+            self.assertEqual(own.events, log.events)
+        # The thread decides with random numbers of its own.
+        rngs = {id(game.rng) for game, log, own in rounds}
+        self.assertFalse(rngs & {id(game.rng) for game in slow.games})
+
+
+if __name__ == "__main__":
+    unittest.main()
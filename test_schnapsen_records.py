@@ -0,0 +1,127 @@
+"""Check that record files give back the rounds written to them.
+
+Run with: python3 -m unittest test_schnapsen_records
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+from schnapsen_cards import DECK, BIT, cards_of, legal_cards, trump_jack
+from schnapsen_engine import ComputerStrategy
+from schnapsen_records import (
+    RecordReader, RecordWriter, RecordingObserver, decode_deck,
+    encode_deck, record_round, replay,
+)
+
+
+ROUNDS = 200
+STRATEGIES = ("computer", "random")
+
+
+class RandomStrategy():
+    """Make random legal moves, closing and declaring marriages now and
+    then."""
+
+    def __init__(self, rng):
+        """Initialize attributes."""
+        self.rng = rng
+
+    def choose_action(self, player, opponent, game):
+        """Exchange half of the time and close a fifth of the time."""
+        jack = trump_jack(game.trump_suit)
+        exchange = bool(player.hand & BIT[jack]) and self.rng.random() < 0.5
+        return exchange, self.rng.random() < 0.2
+
+    def choose_card(self, player, opponent, game, trick):
+        """Play a random legal card, marrying if it can."""
+        lead = trick[0][0] if trick else None
+        legal = legal_cards(player.hand, lead, game.trump_suit, game.closed)
+        card = self.rng.choice(cards_of(legal))
+        return card, not trick and bool(player.get_couples() & BIT[card])
+
+
+class RecordsTest(unittest.TestCase):
+    """Write seeded rounds to a file and read them back."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "games.rec")
+
+        rng = random.Random(0)
+        strategies = [ComputerStrategy(), RandomStrategy(rng)]
+        self.rounds = []
+        for number in range(ROUNDS):
+            deck = list(DECK)
+            rng.shuffle(deck)
+            seats = (number % 2, 1 - number % 2)
+            recorder = RecordingObserver()
+            result, encoded = record_round(
+                [strategies[seat] for seat in seats], seats, deck, recorder
+            )
+            self.rounds.append(
+                (tuple(deck), bytes(recorder.moves), result, seats, encoded)
+            )
+
+        # The second half is appended to the file of the first.
+        for half in (self.rounds[:ROUNDS // 2], self.rounds[ROUNDS // 2:]):
+            with RecordWriter(self.path, STRATEGIES) as writer:
+                for deck, moves, result, seats, encoded in half:
+                    if seats[0]:
+                        writer.write_encoded(encoded)
+                    else:
+                        writer.write(
+                            deck, moves, result.winner, result.game_points,
+                            seats,
+                        )
+
+    def check(self, record, original):
+        """Compare a record with the round written to it."""
+        deck, moves, result, seats, encoded = original
+        self.assertEqual(record.deck, deck)
+        self.assertEqual(bytes(record.moves), moves)
+        self.assertEqual(record.winner, result.winner)
+        self.assertEqual(record.game_points, result.game_points)
+        self.assertEqual(record.seats, seats)
+        self.assertEqual(replay(record), result)
+
+    def test_in_order(self):
+        with RecordReader(self.path) as reader:
+            self.assertEqual(reader.strategies, list(STRATEGIES))
+            records = list(reader)
+        self.assertEqual(len(records), ROUNDS)
+        for record, original in zip(records, self.rounds):
+            self.check(record, original)
+
+    def test_by_number(self):
+        with RecordReader(self.path) as reader:
+            self.assertEqual(len(reader), ROUNDS)
+            for number in random.Random(1).sample(range(ROUNDS), 50):
+                self.check(reader[number], self.rounds[number])
+            for start, stop in ((0, ROUNDS), (17, 60), (ROUNDS - 3, ROUNDS)):
+                for record, original in zip(
+                    reader.read_range(start, stop), self.rounds[start:stop]
+                ):
+                    self.check(record, original)
+            self.assertEqual(reader.read_range(5, 5), [])
+            with self.assertRaises(IndexError):
+                reader[ROUNDS]
+
+    def test_other_strategies(self):
+        with self.assertRaises(ValueError):
+            RecordWriter(self.path, ("computer",))
+
+    def test_deck_codes(self):
+        rng = random.Random(2)
+        for dummy in range(1000):
+            deck = list(DECK)
+            rng.shuffle(deck)
+            code = encode_deck(deck)
+            self.assertLess(code, 2 ** 64)
+            self.assertEqual(decode_deck(code), tuple(deck))
+
+
+if __name__ == "__main__":
+    unittest.main()
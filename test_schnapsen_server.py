@@ -0,0 +1,84 @@
+"""Check how the server copes with misbehaving clients.
+
+Run with: python3 -m unittest test_schnapsen_server
+"""
+
+import asyncio
+import unittest
+
+from schnapsen_server import LINE_LIMIT, SchnapsenServer
+
+
+LONG_LINE = b"x" * (2 * LINE_LIMIT) + b"\n"
+
+
+class ServerTest(unittest.IsolatedAsyncioTestCase):
+    """Play against a server listening on a free port."""
+
+    async def asyncSetUp(self):
+        self.server = SchnapsenServer(None, timeout=5)
+        self.tcp_server = await asyncio.start_server(
+            self.server.handle, "127.0.0.1", 0, limit=LINE_LIMIT
+        )
+        self.port = self.tcp_server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.tcp_server.close()
+        await self.tcp_server.wait_closed()
+
+    async def connect(self):
+        """Connect and choose English. Return the streams."""
+        reader, writer = await asyncio.open_connection(
+            "127.0.0.1", self.port
+        )
+        await self.prompt(reader, b"Language")
+        writer.write(b"en\n")
+        return reader, writer
+
+    async def prompt(self, reader, start):
+        """Read up to a prompt that starts with start. Return the text."""
+        text = b""
+        while not text.rsplit(b"\n", 1)[-1].startswith(start):
+            text += await asyncio.wait_for(reader.readuntil(b": "), 5)
+        return text
+
+    async def test_long_line_asks_again(self):
+        reader, writer = await self.connect()
+        await self.prompt(reader, b"Your name")
+        writer.write(LONG_LINE)
+        await self.prompt(reader, b"Your name")
+        writer.write(b"Alice\n")
+        await self.prompt(reader, b"Opponent")
+        writer.write(b"computer\n")
+        line = await asyncio.wait_for(reader.readline(), 5)
+        self.assertTrue(line.startswith(b"The cards are shuffled."), line)
+        writer.close()
+        await writer.wait_closed()
+
+    async def test_opponent_is_told(self):
+        players = []
+        for name in (b"Alice", b"Bob"):
+            reader, writer = await self.connect()
+            await self.prompt(reader, b"Your name")
+            writer.write(name + b"\n")
+            await self.prompt(reader, b"Opponent")
+            writer.write(b"human\n")
+            players.append((reader, writer))
+        (first, first_writer), (second, second_writer) = players
+
+        # Alice, who leads, sends a long line instead of an action, is
+        # asked again and leaves.
+        await self.prompt(first, b"Choose an action")
+        first_writer.write(LONG_LINE)
+        await self.prompt(first, b"Choose an action")
+        first_writer.close()
+        await first_writer.wait_closed()
+
+        text = await asyncio.wait_for(second.read(), 5)
+        self.assertIn(b"The game is over, a player has left.", text)
+        second_writer.close()
+        await second_writer.wait_closed()
+
+
+if __name__ == "__main__":
+    unittest.main()
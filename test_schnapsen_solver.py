@@ -0,0 +1,154 @@
+"""Check the endgame solver against a plain minimax search.
+
+Run with: python3 -m unittest test_schnapsen_solver
+"""
+
+import random
+import unittest
+
+from schnapsen_cards import (
+    DECK, SUIT, RANK, POINTS, BIT, cards_of, couples_of, legal_cards,
+)
+from schnapsen_engine import game_points
+from schnapsen_solver import EndgameSolver
+
+
+POSITIONS = 300
+# Positions with the same hands and different points, solved one after
+# the other with the same transposition table.
+VARIANTS = 5
+
+
+def minimax(leader_hand, follower_hand, trump_suit, leader_points,
+            follower_points, leader_pending, follower_pending):
+    """Return the value of a position for the leader, trying every card
+    without pruning."""
+    return max(
+        lead_minimax(
+            card, leader_hand, follower_hand, trump_suit, leader_points,
+            follower_points, leader_pending, follower_pending,
+        )
+        for card in cards_of(leader_hand)
+    )
+
+
+def lead_minimax(card, leader_hand, follower_hand, trump_suit,
+                 leader_points, follower_points, leader_pending,
+                 follower_pending):
+    """Return the value of a lead for the leader, trying every response.
+    A lead from a couple declares the marriage."""
+    if couples_of(leader_hand) & BIT[card]:
+        marriage = 40 if SUIT[card] == trump_suit else 20
+        if leader_points:
+            leader_points += marriage
+            if leader_points >= 66:
+                return game_points(follower_points)
+        else:
+            leader_pending += marriage
+    return min(
+        trick_value(
+            card, response, leader_hand ^ BIT[card],
+            follower_hand ^ BIT[response], trump_suit, leader_points,
+            follower_points, leader_pending, follower_pending,
+        )
+        for response in cards_of(
+            legal_cards(follower_hand, card, trump_suit, True)
+        )
+    )
+
+
+def trick_value(lead, response, leader_hand, follower_hand, trump_suit,
+                leader_points, follower_points, leader_pending,
+                follower_pending):
+    """Return the value of a completed trick for its leader."""
+    if SUIT[response] == SUIT[lead]:
+        follower_takes = RANK[response] > RANK[lead]
+    else:
+        follower_takes = SUIT[response] == trump_suit
+    points = POINTS[lead] + POINTS[response]
+    if follower_takes:
+        follower_points += points + follower_pending
+        if follower_points >= 66 or not follower_hand:
+            return -game_points(leader_points)
+        return -minimax(
+            follower_hand, leader_hand, trump_suit, follower_points,
+            leader_points, 0, leader_pending,
+        )
+    leader_points += points + leader_pending
+    if leader_points >= 66 or not leader_hand:
+        return game_points(follower_points)
+    return minimax(
+        leader_hand, follower_hand, trump_suit, leader_points,
+        follower_points, 0, follower_pending,
+    )
+
+
+def random_positions(rng, exhausted, count):
+    """Return the arguments of solve for count random positions with the
+    same hands, so that they share entries of the transposition table.
+
+    With a closed talon, the points are small and the positions differ
+    by the pending marriages of players without points. With an
+    exhausted talon, all other cards have been played and the positions
+    differ by how their points are split between the players.
+    """
+    deck = list(DECK)
+    rng.shuffle(deck)
+    size = rng.randint(1, 5)
+    hands = (
+        sum(BIT[card] for card in deck[:size]),
+        sum(BIT[card] for card in deck[size:2 * size]),
+        rng.randrange(4),
+    )
+    points = [rng.choice([0, rng.randint(2, 50)]) for side in (0, 1)]
+    positions = []
+    for dummy in range(count):
+        pending = [0, 0]
+        if exhausted:
+            points = [0, 0]
+            for card in deck[2 * size:]:
+                points[rng.randrange(2)] += POINTS[card]
+            points = [point % 66 for point in points]
+        else:
+            pending = [
+                rng.choice([0, 20, 40]) if not point else 0
+                for point in points
+            ]
+        positions.append(hands + (*points, *pending))
+    return positions
+
+
+class SolverTest(unittest.TestCase):
+    """Compare the values of the solver with minimax."""
+
+    def check(self, exhausted):
+        """Compare the values of positions, their best leads and all
+        their leads."""
+        rng = random.Random(exhausted)
+        solvers = [EndgameSolver(), EndgameSolver(max_entries=50)]
+        for dummy in range(POSITIONS // 2 // VARIANTS):
+            for position in random_positions(rng, exhausted, VARIANTS):
+                expected = minimax(*position)
+                for solver in solvers:
+                    self.assertEqual(
+                        solver.solve(*position), expected, position
+                    )
+                    card, value = solver.best_lead(*position)
+                    self.assertEqual(value, expected, position)
+                    self.assertTrue(position[0] & BIT[card])
+                    for card in cards_of(position[0]):
+                        self.assertEqual(
+                            solver.lead_value(card, *position),
+                            lead_minimax(card, *position),
+                            (card, position),
+                        )
+
+    def test_closed_talon(self):
+        self.check(exhausted=False)
+
+    def test_exhausted_talon(self):
+        self.check(exhausted=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""Check GameState against the engine's rules.
+
+Run with: python3 -m unittest test_schnapsen_state
+"""
+
+import random
+import unittest
+
+from schnapsen_cards import DECK
+from schnapsen_classes import SchnapsenPlayer
+from schnapsen_engine import deal, round_turns
+from schnapsen_records import MARRIAGE, EXCHANGE, CLOSE
+from schnapsen_state import GameState
+
+
+GAMES = 2000
+
+
+class LockstepTest(unittest.TestCase):
+    """Play random games with the engine and GameState side by side."""
+
+    def check_same(self, state, game, players):
+        """Compare the state with the engine's objects."""
+        self.assertEqual(state.hands, (players[0].hand, players[1].hand))
+        self.assertEqual(
+            state.points, (players[0].points, players[1].points)
+        )
+        self.assertEqual(
+            state.pending,
+            (players[0].marriage_points, players[1].marriage_points),
+        )
+        talon = list(state.stock[:state.stock_size])
+        if talon:
+            talon[0] = state.trump_card
+        self.assertEqual(talon, game.stock)
+        self.assertEqual(state.closed, game.closed)
+
+    def apply(self, state, move):
+        """Check that undoing every legal move restores the state, then
+        make the move."""
+        before = state.snapshot()
+        for other in state.moves():
+            state.apply(other)
+            state.undo()
+            self.assertEqual(state.snapshot(), before)
+        self.assertIn(move, state.moves())
+        state.apply(move)
+
+    def test_random_games(self):
+        for number in range(GAMES):
+            rng = random.Random(number)
+            deck = list(DECK)
+            rng.shuffle(deck)
+            players = [SchnapsenPlayer("0"), SchnapsenPlayer("1")]
+            game = deal(players, deck)
+            state = GameState(deck)
+            turns = round_turns(game, players)
+            move = None
+            try:
+                while True:
+                    seat, decision, trick = turns.send(move)
+                    self.check_same(state, game, players)
+                    self.assertEqual(state.to_move(), seat)
+                    moves = state.moves()
+                    if decision == "action":
+                        exchange = EXCHANGE in moves and rng.random() < 0.5
+                        close = rng.random() < 0.1
+                        if exchange:
+                            self.apply(state, EXCHANGE)
+                        if close:
+                            self.apply(state, CLOSE)
+                        move = exchange, close
+                    else:
+                        choice = rng.choice(
+                            [m for m in moves if m not in (EXCHANGE, CLOSE)]
+                        )
+                        self.apply(state, choice)
+                        move = choice & ~MARRIAGE, bool(choice & MARRIAGE)
+            except StopIteration as stop:
+                result = stop.value
+            self.check_same(state, game, players)
+            self.assertEqual(state.winner, result.winner)
+            self.assertEqual(state.game_points, result.game_points)
+            self.assertEqual(state.moves(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
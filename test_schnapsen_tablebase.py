@@ -0,0 +1,107 @@
+"""Check a memory-mapped endgame table against the solver.
+
+Run with: python3 -m unittest test_schnapsen_tablebase
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from schnapsen_cards import DECK, SUIT, POINTS, BIT, cards_of, couples_of
+from schnapsen_solver import EndgameSolver
+from schnapsen_tablebase import Tablebase, build
+
+
+MAX_CARDS = 2
+SAMPLES = 3000
+
+
+def random_position(rng):
+    """Return hands, trump suit and points of a position that may be in
+    the table, or None."""
+    deck = list(DECK)
+    rng.shuffle(deck)
+    size = rng.randint(1, MAX_CARDS)
+    leader_hand = sum(BIT[card] for card in deck[:size])
+    follower_hand = sum(BIT[card] for card in deck[size:2 * size])
+    played = sum(POINTS[card] for card in deck[2 * size:])
+    marriages = rng.choice([0, 0, 0, 20, 40, 60])
+    leader_points = rng.randint(1, 65)
+    follower_points = played + marriages - leader_points
+    if not 0 <= follower_points <= 65:
+        return None
+    return (
+        leader_hand, follower_hand, rng.randrange(4),
+        leader_points, follower_points,
+    )
+
+
+@unittest.skipIf(np is None, "building endgame tables requires NumPy")
+class TablebaseTest(unittest.TestCase):
+    """Build a small table and compare a sample of lookups."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.directory.name, "endgames.tb")
+        build(path, MAX_CARDS, workers=2)
+        cls.table = Tablebase(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.table.close()
+        cls.directory.cleanup()
+
+    def test_lookups(self):
+        rng = random.Random(0)
+        solver = EndgameSolver()
+        found = 0
+        for dummy in range(SAMPLES):
+            position = random_position(rng)
+            if position is None:
+                continue
+            (leader_hand, follower_hand, trump_suit, leader_points,
+             follower_points) = position
+            best = self.table.best_lead(*position)
+            if best is None:
+                continue
+            found += 1
+            card, value = best
+            self.assertEqual(value, solver.solve(*position), position)
+            self.assertTrue(leader_hand & BIT[card])
+            self.assertEqual(
+                solver.lead_value(card, *position), value, position
+            )
+
+            # Answer every lead of the position.
+            for lead in cards_of(leader_hand):
+                points = leader_points
+                if couples_of(leader_hand) & BIT[lead]:
+                    points += 40 if SUIT[lead] == trump_suit else 20
+                    if points >= 66:
+                        continue
+                answer = self.table.best_response(
+                    lead, follower_hand, leader_hand ^ BIT[lead],
+                    trump_suit, follower_points, points,
+                )
+                if answer is None:
+                    continue
+                self.assertEqual(
+                    answer[1],
+                    solver.best_response(
+                        lead, follower_hand, leader_hand ^ BIT[lead],
+                        trump_suit, follower_points, points,
+                    )[1],
+                    (lead, position),
+                )
+        self.assertGreater(found, SAMPLES // 5)
+
+
+if __name__ == "__main__":
+    unittest.main()